@@ -1,38 +1,117 @@
 """The 46elks integration."""
+import asyncio
+import functools
+import hashlib
 import json
 import logging
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
 
 import requests
 import voluptuous as vol
+from homeassistant.components import webhook
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import CONF_WEBHOOK_ID, Platform
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
 from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.util import dt as dt_util
 
 from .const import (
     API_BASE_URL,
+    API_POOL_SIZE,
     API_TIMEOUT,
+    CAPTURE_FILE,
+    CONF_ALLOWED_SENDERS,
     CONF_API_PASSWORD,
+    CONF_API_TIMEOUT,
     CONF_API_USERNAME,
+    CONF_CAPTURE_TRAFFIC,
+    CONF_COMMANDS,
+    CONF_DAILY_SPEND_CAP,
+    CONF_DEFAULT_COUNTRY,
     CONF_DEFAULT_SENDER,
+    CONF_DRY_RUN,
+    CONF_HEDGE_READS,
+    CONF_HISTORY_LIMIT,
+    CONF_REGISTER_SMS_URL,
+    CONF_ROUTES,
+    CONF_SEND_CONCURRENCY,
+    CONF_SUBACCOUNTS,
+    CONF_SYNC_MEDIA,
+    DEFAULT_COUNTRY,
+    DEFAULT_DELIVERY_TIMEOUT,
+    DEFAULT_ESCALATION_TIMEOUT,
+    DEFAULT_PROFILE_DURATION,
+    DEFAULT_SEND_CONCURRENCY,
+    DEFAULT_WAVE_DELAY,
     DOMAIN,
+    ESTIMATED_CALL_COST,
+    ESTIMATED_MMS_COST,
+    HISTORY_FETCH_LIMIT,
+    MEDIA_CHUNK_SIZE,
+    MEDIA_SYNC_INTERVAL,
+    SERVICE_ESCALATE_CALL,
     SERVICE_MAKE_CALL,
     SERVICE_SEND_MMS,
     SERVICE_SEND_SMS,
+    SERVICE_START_PROFILE,
+    SERVICE_STOP_PROFILE,
+    SERVICE_SYNC_MEDIA,
+    STATISTICS_INTERVAL,
 )
+from .analytics import TrafficAnalytics
+from .audio import AudioAssets
+from .capture import TrafficCapture
+from .contacts import ContactGroups
+from .delivery import DeliveryTracker
+from .escalation import EVENT_ANSWER, EVENT_HANGUP, EscalationManager
+from .hedging import HedgePolicy
+from .inbound import InboundSmsHandler
+from .ledger import BalanceLedger
+from .media import MediaSync
+from .models import parse_cost, parse_created
+from .phone import normalize, normalize_recipients
+from .profiling import PROFILER, traced
+from .routing import RoutingTable
+from .scheduler import PartialSendError, SendScheduler
+from .sensor import update_interval
+from .statistics import StatisticsImporter
+from .templates import render_messages, valid_template
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR]
 
-SEND_SMS_SCHEMA = vol.Schema(
-    {
-        vol.Optional("from"): cv.string,
-        vol.Required("to"): cv.string,
-        vol.Required("message"): cv.string,
-    }
+TEMPLATE_FIELDS = {
+    vol.Optional("variables", default={}): dict,
+    vol.Optional("recipient_variables", default={}): {cv.string: dict},
+}
+
+DELIVERY_FIELDS = {
+    vol.Optional("wait_for_delivery", default=False): cv.boolean,
+    vol.Optional("delivery_timeout", default=DEFAULT_DELIVERY_TIMEOUT): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=600)
+    ),
+}
+
+SEND_SMS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional("from"): cv.string,
+            vol.Required("to"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Exclusive("message", "content"): cv.string,
+            vol.Exclusive("template", "content"): vol.All(cv.string, valid_template),
+            **TEMPLATE_FIELDS,
+            vol.Exclusive("send_at", "schedule"): vol.Any(cv.datetime, cv.time),
+            vol.Exclusive("delay", "schedule"): cv.positive_time_period,
+            vol.Optional("dry_run"): cv.boolean,
+            **DELIVERY_FIELDS,
+        }
+    ),
+    cv.has_at_least_one_key("message", "template"),
 )
 
 MAKE_CALL_SCHEMA = vol.Schema(
@@ -40,38 +119,247 @@ MAKE_CALL_SCHEMA = vol.Schema(
         vol.Required("from"): cv.string,
         vol.Required("to"): cv.string,
         vol.Required("audio_url"): cv.string,
+        vol.Optional("transcode", default=False): cv.boolean,
     }
 )
 
-SEND_MMS_SCHEMA = vol.Schema(
+ESCALATE_CALL_SCHEMA = vol.Schema(
     {
         vol.Required("from"): cv.string,
-        vol.Required("to"): cv.string,
-        vol.Optional("message"): cv.string,
-        vol.Optional("image"): cv.string,
+        vol.Required("to"): vol.All(cv.ensure_list, [cv.string], vol.Length(min=1)),
+        vol.Required("audio_url"): cv.string,
+        vol.Optional("transcode", default=False): cv.boolean,
+        vol.Optional("wave_size", default=0): cv.positive_int,
+        vol.Optional("wave_delay", default=DEFAULT_WAVE_DELAY): vol.All(
+            vol.Coerce(int), vol.Range(min=5)
+        ),
+        vol.Optional("timeout", default=DEFAULT_ESCALATION_TIMEOUT): vol.All(
+            vol.Coerce(int), vol.Range(min=10)
+        ),
+    }
+)
+
+START_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("cprofile", default=False): cv.boolean,
+        vol.Optional("duration", default=DEFAULT_PROFILE_DURATION): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=3600)
+        ),
     }
 )
 
+SEND_MMS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required("from"): cv.string,
+            vol.Required("to"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Exclusive("message", "content"): cv.string,
+            vol.Exclusive("template", "content"): vol.All(cv.string, valid_template),
+            **TEMPLATE_FIELDS,
+            vol.Optional("image"): cv.string,
+            vol.Exclusive("send_at", "schedule"): vol.Any(cv.datetime, cv.time),
+            vol.Exclusive("delay", "schedule"): cv.positive_time_period,
+            vol.Optional("dry_run"): cv.boolean,
+            **DELIVERY_FIELDS,
+        }
+    ),
+    cv.has_at_least_one_key("message", "template", "image"),
+)
+
+
+def _scheduled_time(data) -> datetime | None:
+    """Return when a send should happen, or None to send right away."""
+    now = dt_util.utcnow()
+    if data.get("delay"):
+        return now + data["delay"]
+    send_at = data.get("send_at")
+    if send_at is None:
+        return None
+    if not isinstance(send_at, datetime):
+        # A time of day means its next occurrence
+        send_at = datetime.combine(dt_util.now().date(), send_at, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        if send_at <= now:
+            send_at += timedelta(days=1)
+    send_at = dt_util.as_utc(send_at)
+    return send_at if send_at > now else None
+
+
+def _render_messages(data, recipients: list, country: str) -> dict:
+    """Return the message for each recipient, rendering the template if given."""
+    if data.get("template"):
+        # Recipients are normalized, so look their variables up the same way
+        recipient_variables = {
+            normalize(number, country) or number: variables
+            for number, variables in data.get("recipient_variables", {}).items()
+        }
+        return render_messages(
+            data["template"],
+            recipients,
+            data.get("variables", {}),
+            recipient_variables,
+        )
+    return dict.fromkeys(recipients, data.get("message"))
+
+
+def _without_schedule(data) -> dict:
+    """Return service data without the scheduling fields."""
+    return {key: value for key, value in data.items() if key not in ("send_at", "delay")}
+
+
+def _send_options(data, dry_run: bool, tracker: DeliveryTracker) -> dict:
+    """Return the extra API parameters for a send."""
+    if dry_run:
+        return {"dryrun": True}
+    if data.get("wait_for_delivery"):
+        return {"whendelivered": tracker.url}
+    return {}
+
+
+def _dry_run(data, options) -> bool:
+    """Return True if a send should only be validated and priced."""
+    return data.get("dry_run", options.get(CONF_DRY_RUN, False))
+
+
+def _send_response(results: dict, dry_run: bool, deliveries: dict = None) -> dict:
+    """Summarize the per-recipient send results, with costs in SEK."""
+    messages = []
+    for to_number, result in results.items():
+        message = {
+            "to": to_number,
+            "id": result.get("id"),
+            "status": result.get("status"),
+            "parts": int(result.get("parts") or 1),
+            "cost": parse_cost(result.get("estimated_cost", result.get("cost"))) / 10000,
+        }
+        if deliveries is not None:
+            delivery = deliveries.get(result.get("id"), {"status": None, "latency": None})
+            message["delivery_status"] = delivery["status"]
+            message["delivery_latency"] = delivery["latency"]
+        messages.append(message)
+    return {
+        "dry_run": dry_run,
+        "messages": messages,
+        "parts": sum(message["parts"] for message in messages),
+        "estimated_cost": round(sum(message["cost"] for message in messages), 4),
+    }
+
+
+async def _async_wait_for_delivery(tracker: DeliveryTracker, sent: dict, data) -> dict | None:
+    """Wait for delivery reports if the call asked for them."""
+    if not data.get("wait_for_delivery"):
+        return None
+    return await tracker.async_wait(sent, data.get("delivery_timeout", DEFAULT_DELIVERY_TIMEOUT))
+
+
+async def _async_send_each(recipients: list, send, concurrency: int) -> list:
+    """Send to every recipient with bounded concurrency, returning any errors."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_one(to_number: str) -> str | None:
+        async with semaphore:
+            try:
+                await send(to_number)
+            except Exception as err:  # pylint: disable=broad-except
+                return f"{to_number}: {err}"
+        return None
+
+    results = await asyncio.gather(*(send_one(to_number) for to_number in recipients))
+    return [error for error in results if error]
+
+
+def _create_session() -> requests.Session:
+    """Return a session whose connection pool is shared by concurrent requests."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=API_POOL_SIZE)
+    session.mount("https://", adapter)
+    return session
+
 
 class ElksApi:
     """API client for 46elks."""
 
-    def __init__(self, username: str, password: str) -> None:
+    def __init__(self, username: str, password: str, session: requests.Session = None) -> None:
         """Initialize the API client."""
         self.username = username
         self.password = password
         self.auth = (username, password)
+        self.timeout = API_TIMEOUT
+        self.session = session or _create_session()
+        # Set to a TrafficCapture to record requests for replay
+        self.capture = None
+        # Set to a HedgePolicy to hedge slow reads
+        self.hedging = None
+
+    def for_credentials(self, username: str, password: str) -> "ElksApi":
+        """Return a client for other credentials sharing this client's connection pool."""
+        api = ElksApi(username, password, session=self.session)
+        api.timeout = self.timeout
+        api.capture = self.capture
+        api.hedging = self.hedging
+        return api
+
+    async def _async_request(self, hass: HomeAssistant, method: str, path: str, **kwargs) -> requests.Response:
+        """Make an API request in the executor, hedging reads if enabled."""
+        # Only GETs are idempotent, a hedged send would be sent twice
+        if method == "GET" and self.hedging is not None and self.hedging.enabled:
+            return await self.hedging.async_request(
+                path, lambda hedge: self._async_execute(hass, method, path, kwargs, hedge)
+            )
+        return await self._async_execute(hass, method, path, kwargs)
+
+    async def _async_execute(
+        self, hass: HomeAssistant, method: str, path: str, kwargs: dict, hedge: bool = False
+    ) -> requests.Response:
+        """Make one attempt of an API request in the executor, hedge is set for a hedged duplicate."""
+        request = functools.partial(
+            self.session.request,
+            method,
+            f"{API_BASE_URL}{path}",
+            auth=self.auth,
+            timeout=self.timeout,
+            **kwargs,
+        )
+        capture = self.capture
+        if not PROFILER.enabled and capture is None:
+            return await hass.async_add_executor_job(request)
+
+        # Split the time spent waiting for an executor thread from the HTTP round-trip
+        timings = []
+
+        def timed_request() -> requests.Response:
+            timings.append(time.perf_counter())
+            response = None
+            try:
+                response = request()
+                return response
+            finally:
+                timings.append(time.perf_counter())
+                if capture is not None:
+                    capture.record(method, path, kwargs, response, timings[1] - timings[0], hedge)
+
+        submitted = time.perf_counter()
+        try:
+            return await hass.async_add_executor_job(timed_request)
+        finally:
+            if PROFILER.enabled and len(timings) == 2:
+                PROFILER.record("executor_queue", timings[0] - submitted, path)
+                PROFILER.record("http", timings[1] - timings[0], f"{method} {path}")
+
+    async def async_get_subaccounts(self, hass: HomeAssistant) -> list:
+        """Get the subaccounts of this account."""
+        try:
+            response = await self._async_request(hass, "GET", "/subaccounts")
+            response.raise_for_status()
+            data = response.json()
+            return data.get("data", [])
+        except requests.exceptions.RequestException as err:
+            _LOGGER.error("Error fetching subaccounts: %s", err)
+            return None
 
     async def async_get_account_info(self, hass: HomeAssistant) -> dict:
         """Get account information."""
         try:
-            response = await hass.async_add_executor_job(
-                lambda: requests.get(
-                    f"{API_BASE_URL}/me",
-                    auth=self.auth,
-                    timeout=API_TIMEOUT,
-                )
-            )
+            response = await self._async_request(hass, "GET", "/me")
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as err:
@@ -81,14 +369,7 @@ class ElksApi:
     async def async_get_sms_history(self, hass: HomeAssistant, limit: int = 10) -> list:
         """Get SMS history."""
         try:
-            response = await hass.async_add_executor_job(
-                lambda: requests.get(
-                    f"{API_BASE_URL}/sms",
-                    auth=self.auth,
-                    params={"limit": limit},
-                    timeout=API_TIMEOUT,
-                )
-            )
+            response = await self._async_request(hass, "GET", "/sms", params={"limit": limit})
             response.raise_for_status()
             data = response.json()
             return data.get("data", [])
@@ -99,14 +380,7 @@ class ElksApi:
     async def async_get_call_history(self, hass: HomeAssistant, limit: int = 10) -> list:
         """Get call history."""
         try:
-            response = await hass.async_add_executor_job(
-                lambda: requests.get(
-                    f"{API_BASE_URL}/calls",
-                    auth=self.auth,
-                    params={"limit": limit},
-                    timeout=API_TIMEOUT,
-                )
-            )
+            response = await self._async_request(hass, "GET", "/calls", params={"limit": limit})
             response.raise_for_status()
             data = response.json()
             return data.get("data", [])
@@ -114,16 +388,61 @@ class ElksApi:
             _LOGGER.error("Error fetching call history: %s", err)
             return []
 
+    async def async_get_mms_history(self, hass: HomeAssistant, limit: int = 10) -> list:
+        """Get MMS history."""
+        try:
+            response = await self._async_request(hass, "GET", "/mms", params={"limit": limit})
+            response.raise_for_status()
+            data = response.json()
+            return data.get("data", [])
+        except requests.exceptions.RequestException as err:
+            _LOGGER.error("Error fetching MMS history: %s", err)
+            return []
+
+    async def async_get_history_since(self, hass: HomeAssistant, resource: str, since: datetime) -> list:
+        """Get every record of a history resource created at or after since, paging as needed."""
+        params = {
+            "end": since.astimezone(timezone.utc).replace(tzinfo=None).isoformat(),
+            "limit": 100,
+        }
+        records = []
+        try:
+            while True:
+                response = await self._async_request(hass, "GET", f"/{resource}", params=params)
+                response.raise_for_status()
+                data = response.json()
+                page = data.get("data", [])
+                records.extend(page)
+                oldest = parse_created(page[-1].get("created")) if page else None
+                if not data.get("next") or oldest is None or oldest < since:
+                    break
+                params = {**params, "start": data["next"]}
+        except requests.exceptions.RequestException as err:
+            _LOGGER.error("Error fetching %s history: %s", resource, err)
+            return None
+        return records
+
+    def download_media(self, url: str, path: str) -> tuple:
+        """Stream a media file to path in chunks, returning its SHA-256 and size."""
+        # Never send our credentials to hosts other than 46elks
+        host = urlparse(url).hostname or ""
+        auth = self.auth if host == "46elks.com" or host.endswith(".46elks.com") else None
+
+        digest = hashlib.sha256()
+        size = 0
+        with self.session.get(url, auth=auth, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            with open(path, "wb") as file:
+                for chunk in response.iter_content(chunk_size=MEDIA_CHUNK_SIZE):
+                    file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        return digest.hexdigest(), size
+
     async def async_get_numbers(self, hass: HomeAssistant) -> list:
         """Get allocated phone numbers."""
         try:
-            response = await hass.async_add_executor_job(
-                lambda: requests.get(
-                    f"{API_BASE_URL}/numbers",
-                    auth=self.auth,
-                    timeout=API_TIMEOUT,
-                )
-            )
+            response = await self._async_request(hass, "GET", "/numbers")
             response.raise_for_status()
             data = response.json()
             return data.get("data", [])
@@ -131,6 +450,16 @@ class ElksApi:
             _LOGGER.error("Error fetching numbers: %s", err)
             return []
 
+    async def async_update_number(self, hass: HomeAssistant, number_id: str, data: dict) -> dict:
+        """Update the configuration of an allocated phone number."""
+        try:
+            response = await self._async_request(hass, "POST", f"/numbers/{number_id}", data=data)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as err:
+            _LOGGER.error("Error updating number %s: %s", number_id, err)
+            raise
+
     def get_mms_capable_numbers(self, numbers: list) -> list:
         """Filter for MMS-capable numbers."""
         mms_numbers = []
@@ -140,23 +469,26 @@ class ElksApi:
         return mms_numbers
 
     async def async_send_sms(
-        self, hass: HomeAssistant, from_number: str, to_number: str, message: str
+        self,
+        hass: HomeAssistant,
+        from_number: str,
+        to_number: str,
+        message: str,
+        dryrun: bool = False,
+        whendelivered: str = None,
     ) -> dict:
-        """Send an SMS."""
+        """Send an SMS, or only validate and price it if dryrun is set."""
         data = {
             "from": from_number,
             "to": to_number,
             "message": message,
         }
+        if dryrun:
+            data["dryrun"] = "yes"
+        if whendelivered:
+            data["whendelivered"] = whendelivered
         try:
-            response = await hass.async_add_executor_job(
-                lambda: requests.post(
-                    f"{API_BASE_URL}/sms",
-                    data=data,
-                    auth=self.auth,
-                    timeout=API_TIMEOUT,
-                )
-            )
+            response = await self._async_request(hass, "POST", "/sms", data=data)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as err:
@@ -164,7 +496,13 @@ class ElksApi:
             raise
 
     async def async_make_call(
-        self, hass: HomeAssistant, from_number: str, to_number: str, voice_start: str
+        self,
+        hass: HomeAssistant,
+        from_number: str,
+        to_number: str,
+        voice_start: str,
+        whenhangup: str = None,
+        timeout: int = None,
     ) -> dict:
         """Make a phone call."""
         data = {
@@ -172,25 +510,39 @@ class ElksApi:
             "to": to_number,
             "voice_start": voice_start,
         }
+        if whenhangup:
+            data["whenhangup"] = whenhangup
+        if timeout:
+            data["timeout"] = timeout
         try:
-            response = await hass.async_add_executor_job(
-                lambda: requests.post(
-                    f"{API_BASE_URL}/calls",
-                    data=data,
-                    auth=self.auth,
-                    timeout=API_TIMEOUT,
-                )
-            )
+            response = await self._async_request(hass, "POST", "/calls", data=data)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as err:
             _LOGGER.error("Error making call: %s", err)
             raise
 
+    async def async_hangup_call(self, hass: HomeAssistant, call_id: str) -> dict:
+        """End an ongoing phone call."""
+        try:
+            response = await self._async_request(hass, "POST", f"/calls/{call_id}", data={"hangup": "yes"})
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as err:
+            _LOGGER.error("Error hanging up call %s: %s", call_id, err)
+            raise
+
     async def async_send_mms(
-        self, hass: HomeAssistant, from_number: str, to_number: str, message: str = None, image: str = None
+        self,
+        hass: HomeAssistant,
+        from_number: str,
+        to_number: str,
+        message: str = None,
+        image: str = None,
+        dryrun: bool = False,
+        whendelivered: str = None,
     ) -> dict:
-        """Send an MMS."""
+        """Send an MMS, or only validate and price it if dryrun is set."""
         data = {
             "from": from_number,
             "to": to_number,
@@ -199,16 +551,13 @@ class ElksApi:
             data["message"] = message
         if image:
             data["image"] = image
+        if dryrun:
+            data["dryrun"] = "yes"
+        if whendelivered:
+            data["whendelivered"] = whendelivered
 
         try:
-            response = await hass.async_add_executor_job(
-                lambda: requests.post(
-                    f"{API_BASE_URL}/mms",
-                    data=data,
-                    auth=self.auth,
-                    timeout=API_TIMEOUT,
-                )
-            )
+            response = await self._async_request(hass, "POST", "/mms", data=data)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as err:
@@ -222,41 +571,167 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     password = entry.data[CONF_API_PASSWORD]
 
     api = ElksApi(username, password)
+    api.timeout = entry.options.get(CONF_API_TIMEOUT, API_TIMEOUT)
+    api.hedging = HedgePolicy()
+    api.hedging.enabled = entry.options.get(CONF_HEDGE_READS, False)
+    await _async_set_capture(hass, api, entry.options.get(CONF_CAPTURE_TRAFFIC, False))
 
     account_info = await api.async_get_account_info(hass)
     if account_info is None:
         raise ConfigEntryNotReady("Failed to connect to 46elks API")
 
+    ledger = BalanceLedger(hass, api, daily_cap=_daily_cap(entry.options))
+    ledger.reconcile(account_info)
+
+    contacts = ContactGroups(hass, entry.entry_id)
+    await contacts.async_load()
+
+    scheduler = SendScheduler(hass, entry.entry_id)
+    await scheduler.async_load()
+
+    media = MediaSync(hass, api, entry.entry_id)
+    media.history_limit = entry.options.get(CONF_HISTORY_LIMIT, HISTORY_FETCH_LIMIT)
+    await media.async_load()
+
+    async def async_periodic_media_sync(now: datetime) -> None:
+        """Sync media if enabled in the options."""
+        if entry.options.get(CONF_SYNC_MEDIA):
+            await media.async_sync()
+
+    entry.async_on_unload(
+        async_track_time_interval(hass, async_periodic_media_sync, MEDIA_SYNC_INTERVAL)
+    )
+
+    statistics = StatisticsImporter(hass, api, entry.entry_id)
+
+    async def async_import_statistics(now: datetime) -> None:
+        """Import completed hours into long-term statistics."""
+        try:
+            await statistics.async_import()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Failed to import 46elks statistics")
+
+    entry.async_on_unload(async_call_later(hass, 60, async_import_statistics))
+    entry.async_on_unload(
+        async_track_time_interval(hass, async_import_statistics, STATISTICS_INTERVAL)
+    )
+
+    escalations = EscalationManager(hass, api)
+    escalations.async_register()
+
+    deliveries = DeliveryTracker(hass)
+    deliveries.async_register()
+
+    routing = RoutingTable(entry.options.get(CONF_ROUTES, []))
+
+    audio = AudioAssets(hass)
+    audio.async_register()
+
+    analytics = TrafficAnalytics(hass, entry.entry_id)
+    await analytics.async_load()
+
+    webhook_id = entry.data.get(CONF_WEBHOOK_ID)
+    if webhook_id is None:
+        # The inbound webhook must stay the same across restarts
+        webhook_id = webhook.async_generate_id()
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_WEBHOOK_ID: webhook_id})
+    inbound = InboundSmsHandler(
+        hass,
+        webhook_id,
+        entry.options.get(CONF_COMMANDS, []),
+        entry.options.get(CONF_ALLOWED_SENDERS, []),
+    )
+    inbound.async_register()
+    if entry.options.get(CONF_REGISTER_SMS_URL):
+        await _async_register_sms_url(hass, api, inbound.url)
+
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = api
+    hass.data[DOMAIN][entry.entry_id] = {
+        "analytics": analytics,
+        "api": api,
+        "audio": audio,
+        "contacts": contacts,
+        "deliveries": deliveries,
+        "escalations": escalations,
+        "inbound": inbound,
+        "ledger": ledger,
+        "media": media,
+        "routing": routing,
+        "scheduler": scheduler,
+    }
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    async def handle_send_sms(call: ServiceCall) -> None:
+    async def handle_send_sms(call: ServiceCall) -> ServiceResponse:
         """Handle the send_sms service call."""
-        from_number = call.data.get("from", entry.data.get(CONF_DEFAULT_SENDER, "HomeAssistant"))
-        to_number = call.data["to"]
-        message = call.data["message"]
+        country = _country(entry.options)
+        recipients = normalize_recipients(contacts.expand(call.data["to"]), country)
+        messages = _render_messages(call.data, recipients, country)
+        # Pick senders and price the whole batch in one pass over the recipients
+        senders, costs = routing.plan(
+            messages, entry.data.get(CONF_DEFAULT_SENDER, "HomeAssistant"), call.data.get("from")
+        )
+        estimate = sum(costs.values())
+        dry_run = _dry_run(call.data, entry.options)
+        send_options = _send_options(call.data, dry_run, deliveries)
 
-        account_info = await api.async_get_account_info(hass)
-        if account_info and float(account_info.get("balance", 0)) <= 0:
-            raise HomeAssistantError("Insufficient balance to send SMS")
+        await ledger.async_check("send SMS", estimate)
 
-        try:
-            _LOGGER.debug("Sending SMS - From: %s, To: %s", from_number, to_number)
-            result = await api.async_send_sms(hass, from_number, to_number, message)
+        # Only schedule sends that would have been accepted now
+        if (send_at := _scheduled_time(call.data)) is not None:
+            job_id = scheduler.async_schedule(send_at, SERVICE_SEND_SMS, _without_schedule(call.data))
+            _LOGGER.info("SMS %s scheduled for %s", job_id, send_at)
+            return {"scheduled": job_id, "send_at": send_at.isoformat()}
+
+        results = {}
+        sent = {}
+
+        async def send(to_number: str) -> None:
+            from_number = senders[to_number]
+            # Concurrent sends and service calls are checked against what the others leave
+            reservation = 0 if dry_run else await ledger.async_reserve("send SMS", costs[to_number])
+            try:
+                _LOGGER.debug("Sending SMS - From: %s, To: %s", from_number, to_number)
+                result = await api.async_send_sms(
+                    hass, from_number, to_number, messages[to_number], **send_options
+                )
+            except Exception as err:
+                ledger.release(reservation)
+                _LOGGER.error("Failed to send SMS from '%s' to '%s': %s", from_number, to_number, err)
+                raise
+            results[to_number] = result
+            if result.get("id"):
+                sent[result["id"]] = time.monotonic()
+            if not dry_run:
+                ledger.debit(result, reservation)
+                analytics.async_record_send(to_number, result.get("id"))
             _LOGGER.info("SMS sent successfully: %s", result)
-        except HomeAssistantError:
-            raise
-        except Exception as err:
-            _LOGGER.error("Failed to send SMS from '%s' to '%s': %s", from_number, to_number, err)
-            raise HomeAssistantError(f"Failed to send SMS: {err}") from err
+
+        errors = await _async_send_each(recipients, send, _send_concurrency(entry.options))
+        if errors:
+            raise PartialSendError(
+                f"Failed to send SMS: {'; '.join(errors)}",
+                [to_number for to_number in recipients if to_number not in results],
+            )
+        if dry_run:
+            response = _send_response(results, dry_run)
+        else:
+            response = _send_response(
+                results, dry_run, await _async_wait_for_delivery(deliveries, sent, call.data)
+            )
+        for message in response["messages"]:
+            message["from"] = senders[message["to"]]
+        if routing:
+            response["routed_estimate"] = estimate / 10000
+        return response
 
     async def handle_make_call(call: ServiceCall) -> None:
         """Handle the make_call service call."""
         from_number = call.data["from"]
-        to_number = call.data["to"]
-        audio_url = call.data["audio_url"]
+        to_number = normalize_recipients([call.data["to"]], _country(entry.options))[0]
+        audio_url = await audio.async_url(call.data["audio_url"], call.data.get("transcode", False))
 
         numbers = await api.async_get_numbers(hass)
         voice_capable = [
@@ -279,27 +754,153 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         voice_start = json.dumps({"play": audio_url})
 
-        account_info = await api.async_get_account_info(hass)
-        if account_info and float(account_info.get("balance", 0)) <= 0:
-            raise HomeAssistantError("Insufficient balance to make call")
+        reservation = await ledger.async_reserve("make call", ESTIMATED_CALL_COST)
 
         try:
             result = await api.async_make_call(hass, from_number, to_number, voice_start)
-            _LOGGER.info("Call initiated successfully: %s", result)
         except HomeAssistantError:
+            ledger.release(reservation)
             raise
         except Exception as err:
+            ledger.release(reservation)
             _LOGGER.error("Failed to make call: %s", err)
             raise HomeAssistantError(f"Failed to make call: {err}") from err
+        ledger.debit(result, reservation)
+        _LOGGER.info("Call initiated successfully: %s", result)
+
+    async def handle_escalate_call(call: ServiceCall) -> ServiceResponse:
+        """Handle the escalate_call service call."""
+        from_number = call.data["from"]
+        to_numbers = normalize_recipients(contacts.expand(call.data["to"]), _country(entry.options))
+        if not to_numbers:
+            raise HomeAssistantError("Failed to make call: no recipients to escalate to")
+        audio_url = await audio.async_url(call.data["audio_url"], call.data.get("transcode", False))
+        wave_size = call.data["wave_size"] or len(to_numbers)
+        wave_delay = call.data["wave_delay"]
+        timeout = call.data["timeout"]
+
+        numbers = await api.async_get_numbers(hass)
+        voice_capable = [
+            num.get("number") for num in numbers
+            if num.get("active") == "yes" and "voice" in num.get("capabilities", [])
+        ]
+
+        if from_number not in voice_capable:
+            raise HomeAssistantError(
+                f"The number '{from_number}' cannot make calls. "
+                f"Voice-enabled numbers: {', '.join(voice_capable) or 'none'}"
+            )
+
+        await ledger.async_check("make call")
+
+        escalation = escalations.async_start(audio_url)
+        deadline = escalation.started + timeout
+        voice_start = escalations.callback_url(escalation, EVENT_ANSWER)
+        whenhangup = escalations.callback_url(escalation, EVENT_HANGUP)
+        reservations = {}
+
+        async def dial(number: str) -> None:
+            # Another leg of the same wave may answer before this one is dialed
+            if escalation.answered:
+                return
+            # Earlier waves keep ringing until the escalation deadline
+            ring_timeout = max(int(deadline - time.monotonic()), 1)
+            try:
+                reservations[number] = await ledger.async_reserve("make call", ESTIMATED_CALL_COST)
+                result = await api.async_make_call(
+                    hass, from_number, number, voice_start, whenhangup=whenhangup, timeout=ring_timeout
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                ledger.release(reservations.pop(number, 0))
+                _LOGGER.warning("Escalation call to '%s' failed: %s", number, err)
+                escalation.async_dial_failed(number)
+                return
+            escalation.async_dialed(number, result.get("id"))
+            if escalation.answered and escalation.answered_by != number and result.get("id"):
+                # Answered while this leg was being dialed
+                await escalations.async_hang_up([result["id"]])
+
+        waves = [to_numbers[i:i + wave_size] for i in range(0, len(to_numbers), wave_size)]
+        try:
+            for index, wave in enumerate(waves):
+                await asyncio.gather(*(dial(number) for number in wave))
+                is_last = index == len(waves) - 1
+                remaining = deadline - time.monotonic()
+                wait = remaining if is_last else min(wave_delay, remaining)
+                if await escalation.async_wait(max(wait, 0)) or remaining <= 0:
+                    break
+        finally:
+            escalations.async_finish(escalation)
+            # Only the answered leg is charged for more than a moment of ringing
+            for number, reservation in reservations.items():
+                if number == escalation.answered_by:
+                    ledger.debit(None, reservation)
+                else:
+                    ledger.release(reservation)
+
+        if not escalation.dialed:
+            raise HomeAssistantError("Failed to make call: no escalation legs could be dialed")
+
+        _LOGGER.info("Escalation finished: %s", escalation.as_response())
+        return escalation.as_response()
+
+    async def handle_sync_media(call: ServiceCall) -> ServiceResponse:
+        """Handle the sync_media service call."""
+        return {"downloaded": await media.async_sync()}
+
+    cancel_auto_stop = None
+
+    @callback
+    def async_cancel_auto_stop() -> None:
+        """Cancel the pending automatic stop of profiling."""
+        nonlocal cancel_auto_stop
+        if cancel_auto_stop is not None:
+            cancel_auto_stop()
+            cancel_auto_stop = None
 
-    async def handle_send_mms(call: ServiceCall) -> None:
+    @callback
+    def async_unload_profile() -> None:
+        """Stop profiling started from this entry."""
+        if cancel_auto_stop is not None and PROFILER.enabled:
+            PROFILER.stop()
+        async_cancel_auto_stop()
+
+    entry.async_on_unload(async_unload_profile)
+
+    async def handle_start_profile(call: ServiceCall) -> None:
+        """Handle the start_profile service call."""
+        nonlocal cancel_auto_stop
+        if PROFILER.enabled:
+            raise HomeAssistantError("Profiling is already running")
+        PROFILER.start(cprofile=call.data["cprofile"])
+        _LOGGER.info("Profiling started for %s seconds", call.data["duration"])
+
+        async def async_auto_stop(now: datetime) -> None:
+            nonlocal cancel_auto_stop
+            cancel_auto_stop = None
+            if PROFILER.enabled and PROFILER.started == started:
+                await _async_stop_profile(hass)
+
+        started = PROFILER.started
+        async_cancel_auto_stop()
+        cancel_auto_stop = async_call_later(hass, call.data["duration"], async_auto_stop)
+
+    async def handle_stop_profile(call: ServiceCall) -> ServiceResponse:
+        """Handle the stop_profile service call."""
+        if not PROFILER.enabled:
+            raise HomeAssistantError("Profiling is not running")
+        # A later profile must not be cut short by this one's timer
+        async_cancel_auto_stop()
+        return await _async_stop_profile(hass)
+
+    async def handle_send_mms(call: ServiceCall) -> ServiceResponse:
         """Handle the send_mms service call."""
+        country = _country(entry.options)
+        recipients = normalize_recipients(contacts.expand(call.data["to"]), country)
         from_number = call.data["from"]
-        to_number = call.data["to"]
-        message = call.data.get("message")
         image = call.data.get("image")
 
-        if not message and not image:
+        if not call.data.get("message") and not call.data.get("template") and not image:
             raise HomeAssistantError("MMS requires either a message or an image")
 
         numbers = await api.async_get_numbers(hass)
@@ -318,32 +919,194 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 "Visit https://46elks.se/allocate to get a number with MMS capability."
             )
 
-        account_info = await api.async_get_account_info(hass)
-        if account_info and float(account_info.get("balance", 0)) <= 0:
-            raise HomeAssistantError("Insufficient balance to send MMS")
+        messages = _render_messages(call.data, recipients, country)
+        dry_run = _dry_run(call.data, entry.options)
+        send_options = _send_options(call.data, dry_run, deliveries)
 
-        try:
-            _LOGGER.debug("Sending MMS - From: %s, To: %s", from_number, to_number)
-            result = await api.async_send_mms(hass, from_number, to_number, message, image)
+        await ledger.async_check("send MMS", ESTIMATED_MMS_COST * len(recipients))
+
+        # Only schedule sends that would have been accepted now
+        if (send_at := _scheduled_time(call.data)) is not None:
+            job_id = scheduler.async_schedule(send_at, SERVICE_SEND_MMS, _without_schedule(call.data))
+            _LOGGER.info("MMS %s scheduled for %s", job_id, send_at)
+            return {"scheduled": job_id, "send_at": send_at.isoformat()}
+
+        results = {}
+        sent = {}
+
+        async def send(to_number: str) -> None:
+            reservation = 0 if dry_run else await ledger.async_reserve("send MMS", ESTIMATED_MMS_COST)
+            try:
+                _LOGGER.debug("Sending MMS - From: %s, To: %s", from_number, to_number)
+                result = await api.async_send_mms(
+                    hass, from_number, to_number, messages[to_number], image, **send_options
+                )
+            except Exception as err:
+                ledger.release(reservation)
+                _LOGGER.error("Failed to send MMS from '%s' to '%s': %s", from_number, to_number, err)
+                raise
+            results[to_number] = result
+            if result.get("id"):
+                sent[result["id"]] = time.monotonic()
+            if not dry_run:
+                ledger.debit(result, reservation)
+                analytics.async_record_send(to_number, result.get("id"))
             _LOGGER.info("MMS sent successfully: %s", result)
-        except HomeAssistantError:
-            raise
-        except Exception as err:
-            _LOGGER.error("Failed to send MMS from '%s' to '%s': %s", from_number, to_number, err)
-            raise HomeAssistantError(f"Failed to send MMS: {err}") from err
 
-    hass.services.async_register(DOMAIN, SERVICE_SEND_SMS, handle_send_sms, schema=SEND_SMS_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_MAKE_CALL, handle_make_call, schema=MAKE_CALL_SCHEMA)
-    hass.services.async_register(DOMAIN, SERVICE_SEND_MMS, handle_send_mms, schema=SEND_MMS_SCHEMA)
+        errors = await _async_send_each(recipients, send, _send_concurrency(entry.options))
+        if errors:
+            raise PartialSendError(
+                f"Failed to send MMS: {'; '.join(errors)}",
+                [to_number for to_number in recipients if to_number not in results],
+            )
+        if dry_run:
+            return _send_response(results, dry_run)
+        return _send_response(
+            results, dry_run, await _async_wait_for_delivery(deliveries, sent, call.data)
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_SMS,
+        traced(f"service.{SERVICE_SEND_SMS}", handle_send_sms),
+        schema=SEND_SMS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_MAKE_CALL,
+        traced(f"service.{SERVICE_MAKE_CALL}", handle_make_call),
+        schema=MAKE_CALL_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ESCALATE_CALL,
+        traced(f"service.{SERVICE_ESCALATE_CALL}", handle_escalate_call),
+        schema=ESCALATE_CALL_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SYNC_MEDIA,
+        traced(f"service.{SERVICE_SYNC_MEDIA}", handle_sync_media),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_PROFILE,
+        handle_start_profile,
+        schema=START_PROFILE_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_PROFILE,
+        handle_stop_profile,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_MMS,
+        traced(f"service.{SERVICE_SEND_MMS}", handle_send_mms),
+        schema=SEND_MMS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    # Sends that came due while Home Assistant was down need the services above
+    scheduler.async_start()
 
     return True
 
 
+async def _async_stop_profile(hass: HomeAssistant) -> dict:
+    """Stop profiling, writing any cProfile output to the config directory."""
+    summary, profile = PROFILER.stop()
+    if profile is not None:
+        path = hass.config.path(f"{DOMAIN}_profile_{int(time.time())}.cprof")
+        await hass.async_add_executor_job(profile.dump_stats, path)
+        summary["profile"] = path
+    _LOGGER.info("Profiling stopped: %s", summary)
+    return summary
+
+
+async def _async_register_sms_url(hass: HomeAssistant, api: ElksApi, url: str) -> None:
+    """Point the sms_url of every active SMS number at the inbound webhook."""
+    for number in await api.async_get_numbers(hass):
+        if number.get("active") != "yes" or "sms" not in number.get("capabilities", []):
+            continue
+        if number.get("sms_url") == url:
+            continue
+        try:
+            await api.async_update_number(hass, number["id"], {"sms_url": url})
+            _LOGGER.info("Registered inbound SMS webhook for %s", number.get("number"))
+        except requests.exceptions.RequestException:
+            _LOGGER.warning("Could not register inbound SMS webhook for %s", number.get("number"))
+
+
+async def _async_set_capture(hass: HomeAssistant, api: ElksApi, enabled: bool) -> None:
+    """Start or stop recording API traffic to the capture file."""
+    if enabled and api.capture is None:
+        api.capture = TrafficCapture(hass.config.path(CAPTURE_FILE))
+    elif not enabled and api.capture is not None:
+        capture, api.capture = api.capture, None
+        await hass.async_add_executor_job(capture.close)
+
+
+def _country(options) -> str:
+    """Return the country national recipient numbers are read in."""
+    return options.get(CONF_DEFAULT_COUNTRY, DEFAULT_COUNTRY)
+
+
+def _send_concurrency(options) -> int:
+    """Return how many recipients may be sent to at once."""
+    return options.get(CONF_SEND_CONCURRENCY, DEFAULT_SEND_CONCURRENCY)
+
+
+def _daily_cap(options) -> int:
+    """Return the configured daily spend cap in 1/10000 SEK."""
+    cap = options.get(CONF_DAILY_SPEND_CAP)
+    if not cap:
+        return None
+    return int(cap * 10000)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options to the running entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    if bool(entry.options.get(CONF_SUBACCOUNTS)) != ("subaccounts" in data):
+        # Subaccount sensors are set up with the sensor platform
+        hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+        return
+
+    data["api"].timeout = entry.options.get(CONF_API_TIMEOUT, API_TIMEOUT)
+    data["api"].hedging.enabled = entry.options.get(CONF_HEDGE_READS, False)
+    await _async_set_capture(hass, data["api"], entry.options.get(CONF_CAPTURE_TRAFFIC, False))
+    data["media"].history_limit = entry.options.get(CONF_HISTORY_LIMIT, HISTORY_FETCH_LIMIT)
+    for name, coordinator in data.get("coordinators", {}).items():
+        coordinator.update_interval = update_interval(entry.options, name)
+    if subaccounts := data.get("subaccounts"):
+        subaccounts.update_interval = update_interval(entry.options, "sms")
+        subaccounts.history_limit = data["media"].history_limit
+        subaccounts.async_update_listeners()
+    data["ledger"].daily_cap = _daily_cap(entry.options)
+    data["inbound"].async_set_commands(
+        entry.options.get(CONF_COMMANDS, []), entry.options.get(CONF_ALLOWED_SENDERS, [])
+    )
+    data["routing"].set_routes(entry.options.get(CONF_ROUTES, []))
+    if entry.options.get(CONF_REGISTER_SMS_URL):
+        await _async_register_sms_url(hass, data["api"], data["inbound"].url)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        data["escalations"].async_unregister()
+        data["deliveries"].async_unregister()
+        data["inbound"].async_unregister()
+        data["scheduler"].async_shutdown()
+        await _async_set_capture(hass, data["api"], False)
+        await hass.async_add_executor_job(data["api"].session.close)
 
     return unload_ok
@@ -0,0 +1,264 @@
+"""Bounded-memory traffic analytics for the 46elks integration."""
+from collections import OrderedDict
+from datetime import datetime
+import zlib
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .models import Direction, HistoryRecord, Status
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 60
+
+WINDOW_DAYS = 30
+SKETCH_WIDTH = 256
+SKETCH_DEPTH = 3
+TOP_CAPACITY = 100
+SEEN_IDS = 5000
+
+
+class CountMinSketch:
+    """Approximate counts per key in fixed memory, never undercounting."""
+
+    __slots__ = ("width", "depth", "table")
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH) -> None:
+        """Initialize the sketch."""
+        self.width = width
+        self.depth = depth
+        self.table = [0] * (width * depth)
+
+    def _cells(self, key: str):
+        """Yield the cell of key in every row."""
+        data = key.encode()
+        for row in range(self.depth):
+            # Seeding crc32 with the row keeps hashes stable across restarts
+            yield row * self.width + zlib.crc32(data, row) % self.width
+
+    def add(self, key: str, count: int = 1) -> None:
+        """Count key."""
+        for cell in self._cells(key):
+            self.table[cell] += count
+
+    def estimate(self, key: str) -> int:
+        """Return the estimated count of key."""
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def as_dict(self) -> dict:
+        """Return the non-zero cells for storage."""
+        return {str(cell): count for cell, count in enumerate(self.table) if count}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CountMinSketch":
+        """Restore a sketch from storage."""
+        sketch = cls()
+        for cell, count in data.items():
+            if int(cell) < len(sketch.table):
+                sketch.table[int(cell)] = count
+        return sketch
+
+
+class SpaceSaving:
+    """Track the most frequent keys with a fixed number of counters."""
+
+    __slots__ = ("capacity", "counts")
+
+    def __init__(self, capacity: int = TOP_CAPACITY) -> None:
+        """Initialize the summary."""
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, key: str) -> None:
+        """Count key, evicting the least frequent key if full."""
+        if key in self.counts or len(self.counts) < self.capacity:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            return
+        # The newcomer inherits the evicted count, so counts only overestimate
+        evicted = min(self.counts, key=self.counts.get)
+        self.counts[key] = self.counts.pop(evicted) + 1
+
+    def top(self, count: int) -> list:
+        """Return the count most frequent keys, most frequent first."""
+        return sorted(self.counts, key=self.counts.get, reverse=True)[:count]
+
+
+class _Day:
+    """Counters for one local day."""
+
+    __slots__ = ("hours", "failures", "sent", "failed")
+
+    def __init__(self) -> None:
+        """Initialize the day."""
+        self.hours = [0] * 24
+        self.failures = 0
+        self.sent = CountMinSketch()
+        self.failed = CountMinSketch()
+
+
+class TrafficAnalytics:
+    """Hour-of-day histogram, top recipients and failure rates over 30 days."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the analytics."""
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.analytics")
+        # Local day ordinal -> counters, at most WINDOW_DAYS of them
+        self._days = {}
+        self._top = SpaceSaving()
+        # Message ids already counted, so sends are not counted again from history
+        self._sent_ids = OrderedDict()
+        self._failed_ids = OrderedDict()
+        self._listeners = []
+
+    async def async_load(self) -> None:
+        """Load the counters from storage."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        for ordinal, day in data.get("days", {}).items():
+            counters = self._days[int(ordinal)] = _Day()
+            counters.hours = day["hours"]
+            counters.failures = day["failures"]
+            counters.sent = CountMinSketch.from_dict(day["sent"])
+            counters.failed = CountMinSketch.from_dict(day["failed"])
+        self._top.counts = data.get("top", {})
+        self._sent_ids = OrderedDict.fromkeys(data.get("sent_ids", []))
+        self._failed_ids = OrderedDict.fromkeys(data.get("failed_ids", []))
+        self._prune(dt_util.now().date().toordinal())
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call update_callback when the counters change."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    def _day(self, when: datetime | None) -> _Day | None:
+        """Return the counters of the day of when, if it is inside the window."""
+        today = dt_util.now().date().toordinal()
+        ordinal = dt_util.as_local(when).date().toordinal() if when else today
+        if ordinal <= today - WINDOW_DAYS or ordinal > today:
+            return None
+        if ordinal not in self._days:
+            self._days[ordinal] = _Day()
+            self._prune(today)
+        return self._days[ordinal]
+
+    def _prune(self, today: int) -> None:
+        """Drop days that left the window."""
+        for ordinal in [ordinal for ordinal in self._days if ordinal <= today - WINDOW_DAYS]:
+            del self._days[ordinal]
+
+    @staticmethod
+    def _remember(ids: OrderedDict, message_id: str | None) -> bool:
+        """Remember message_id, returning False if it was already counted."""
+        if message_id is None:
+            return True
+        if message_id in ids:
+            return False
+        ids[message_id] = None
+        if len(ids) > SEEN_IDS:
+            ids.popitem(last=False)
+        return True
+
+    def _count_send(self, number: str, when: datetime | None, message_id: str | None) -> bool:
+        """Count a sent message, returning True if it was counted."""
+        if not number or not self._remember(self._sent_ids, message_id):
+            return False
+        day = self._day(when)
+        if day is None:
+            return False
+        day.hours[dt_util.as_local(when or dt_util.utcnow()).hour] += 1
+        day.sent.add(number)
+        self._top.add(number)
+        return True
+
+    def _count_failure(self, number: str, when: datetime | None, message_id: str | None) -> bool:
+        """Count a failed message, returning True if it was counted."""
+        if not number or not self._remember(self._failed_ids, message_id):
+            return False
+        day = self._day(when)
+        if day is None:
+            return False
+        day.failures += 1
+        day.failed.add(number)
+        return True
+
+    @callback
+    def async_record_send(self, number: str, message_id: str = None) -> None:
+        """Count a message sent by the integration."""
+        if self._count_send(number, dt_util.utcnow(), message_id):
+            self._async_changed()
+
+    @callback
+    def async_observe(self, items: list) -> None:
+        """Count outgoing messages and failures from fetched history."""
+        changed = False
+        for item in items:
+            record = HistoryRecord.from_api(item)
+            if record.direction != Direction.OUTGOING:
+                continue
+            changed |= self._count_send(record.to_number, record.created, record.id)
+            if record.status == Status.FAILED:
+                changed |= self._count_failure(record.to_number, record.created, record.id)
+        if changed:
+            self._async_changed()
+
+    def hour_histogram(self) -> list:
+        """Return the number of messages sent in each local hour of the day."""
+        return [sum(day.hours[hour] for day in self._days.values()) for hour in range(24)]
+
+    def overall_failure_rate(self) -> float | None:
+        """Return the share of all sent messages that failed."""
+        sent = sum(sum(day.hours) for day in self._days.values())
+        if not sent:
+            return None
+        return round(min(sum(day.failures for day in self._days.values()) / sent, 1.0), 3)
+
+    def sent(self, number: str) -> int:
+        """Return the estimated number of messages sent to number."""
+        return sum(day.sent.estimate(number) for day in self._days.values())
+
+    def failure_rate(self, number: str) -> float | None:
+        """Return the estimated share of messages to number that failed."""
+        sent = self.sent(number)
+        if not sent:
+            return None
+        failed = sum(day.failed.estimate(number) for day in self._days.values())
+        return round(min(failed / sent, 1.0), 3)
+
+    def top_recipients(self, count: int = 10) -> list:
+        """Return the most messaged recipients in the window, most messaged first."""
+        candidates = [(number, self.sent(number)) for number in self._top.top(TOP_CAPACITY)]
+        ranked = sorted((item for item in candidates if item[1]), key=lambda item: item[1], reverse=True)
+        return [
+            {"number": number, "sent": sent, "failure_rate": self.failure_rate(number)}
+            for number, sent in ranked[:count]
+        ]
+
+    @callback
+    def _async_changed(self) -> None:
+        """Notify listeners and schedule a save."""
+        for update_callback in list(self._listeners):
+            update_callback()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to store."""
+        return {
+            "days": {
+                str(ordinal): {
+                    "hours": day.hours,
+                    "failures": day.failures,
+                    "sent": day.sent.as_dict(),
+                    "failed": day.failed.as_dict(),
+                }
+                for ordinal, day in self._days.items()
+            },
+            "top": self._top.counts,
+            "sent_ids": list(self._sent_ids),
+            "failed_ids": list(self._failed_ids),
+        }
@@ -0,0 +1,247 @@
+"""Locally hosted call audio for the 46elks integration."""
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import secrets
+import shutil
+import subprocess
+
+import requests
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.network import NoURLAvailableError, get_url
+
+from .const import DOMAIN, MEDIA_CHUNK_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_AUDIO_VIEW = f"{DOMAIN}_audio_view"
+MEDIA_SOURCE_PREFIX = "media-source://"
+LOCAL_MEDIA_PREFIX = f"{MEDIA_SOURCE_PREFIX}media_source/"
+
+# Formats 46elks plays as they are
+PLAYABLE = {".mp3": "audio/mpeg", ".wav": "audio/wav", ".ogg": "audio/ogg"}
+# Mono 8 kHz 16-bit PCM, all a phone call carries anyway
+TRANSCODE_ARGS = ("-ac", "1", "-ar", "8000", "-c:a", "pcm_s16le", "-f", "wav")
+TRANSCODE_TIMEOUT = 120
+DOWNLOAD_TIMEOUT = 30
+# Assets never change once written, their names are hashes of their content
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_ASSET_NAME = re.compile(r"^[0-9a-f]{64}\.(mp3|wav|ogg)$")
+
+
+def audio_directory(hass: HomeAssistant) -> str:
+    """Return the directory prepared audio is stored in."""
+    return hass.config.path(DOMAIN, "audio")
+
+
+def _sha256(path: str) -> str:
+    """Return the SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(MEDIA_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ElksAudioView(HomeAssistantView):
+    """Serve prepared call audio to 46elks."""
+
+    url = f"/api/{DOMAIN}/audio/{{filename}}"
+    name = f"api:{DOMAIN}:audio"
+    # 46elks fetches the audio without credentials; names are unguessable content hashes
+    requires_auth = False
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self.hass = hass
+
+    async def get(self, request: web.Request, filename: str) -> web.StreamResponse:
+        """Return a prepared audio file."""
+        if not _ASSET_NAME.match(filename):
+            return web.Response(status=404)
+        path = os.path.join(audio_directory(self.hass), filename)
+        if not await self.hass.async_add_executor_job(os.path.isfile, path):
+            return web.Response(status=404)
+        return web.FileResponse(
+            path,
+            headers={
+                "Cache-Control": CACHE_CONTROL,
+                "Content-Type": PLAYABLE[os.path.splitext(filename)[1]],
+            },
+        )
+
+
+class AudioAssets:
+    """Prepare local audio once and serve it to 46elks from Home Assistant."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the assets."""
+        self.hass = hass
+        # (path, mtime, size, transcode) -> asset filename
+        self._assets = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def directory(self) -> str:
+        """Return the directory prepared audio is stored in."""
+        return audio_directory(self.hass)
+
+    @callback
+    def async_register(self) -> None:
+        """Register the view serving the assets, once for all entries."""
+        if self.hass.data.get(DATA_AUDIO_VIEW):
+            return
+        self.hass.http.register_view(ElksAudioView(self.hass))
+        self.hass.data[DATA_AUDIO_VIEW] = True
+
+    async def async_url(self, source: str, transcode: bool = False) -> str:
+        """Return a URL 46elks can fetch the audio of a URL, local path or media-source id from."""
+        if source.startswith(("http://", "https://")):
+            return source
+        if source.startswith(LOCAL_MEDIA_PREFIX):
+            path = self._local_media_path(source)
+        elif source.startswith(MEDIA_SOURCE_PREFIX):
+            return await self._async_media_source_url(source, transcode)
+        else:
+            path = source if os.path.isabs(source) else self.hass.config.path(source)
+
+        path = os.path.normpath(path)
+        if not self.hass.config.is_allowed_path(path):
+            raise HomeAssistantError(
+                f"Audio file '{source}' is not in a directory listed in allowlist_external_dirs"
+            )
+        base_url = self._base_url()
+        async with self._lock:
+            filename = await self.hass.async_add_executor_job(self._prepare, path, transcode, self._binary)
+        return f"{base_url}/api/{DOMAIN}/audio/{filename}"
+
+    @property
+    def _binary(self) -> str:
+        """Return the ffmpeg binary configured in Home Assistant."""
+        return getattr(self.hass.data.get("ffmpeg"), "binary", None) or "ffmpeg"
+
+    def _base_url(self) -> str:
+        """Return the URL 46elks reaches Home Assistant at."""
+        try:
+            return get_url(self.hass, prefer_external=True)
+        except NoURLAvailableError as err:
+            raise HomeAssistantError("Local audio needs an external URL for Home Assistant") from err
+
+    def _local_media_path(self, source: str) -> str:
+        """Return the file of a media-source id in a local media directory."""
+        media_dir, _, relative = source[len(LOCAL_MEDIA_PREFIX):].partition("/")
+        if media_dir not in self.hass.config.media_dirs:
+            raise HomeAssistantError(f"Unknown media directory '{media_dir}'")
+        return os.path.join(self.hass.config.media_dirs[media_dir], relative)
+
+    async def _async_media_source_url(self, source: str, transcode: bool) -> str:
+        """Fetch another media source, such as text-to-speech, and serve it like a local file."""
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components import media_source
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.media_player.browse_media import async_process_play_media_url
+
+        try:
+            media = await media_source.async_resolve_media(self.hass, source, None)
+        except media_source.Unresolvable as err:
+            raise HomeAssistantError(f"Could not resolve '{source}': {err}") from err
+
+        base_url = self._base_url()
+        # Signed and absolute, for Home Assistant to fetch from itself
+        url = async_process_play_media_url(self.hass, media.url)
+        extension = mimetypes.guess_extension(media.mime_type or "") or ""
+        async with self._lock:
+            filename = await self.hass.async_add_executor_job(
+                self._prepare_download, source, url, extension, transcode, self._binary
+            )
+        return f"{base_url}/api/{DOMAIN}/audio/{filename}"
+
+    def _prepare(self, path: str, transcode: bool, binary: str) -> str:
+        """Return the asset name of a file, copying or transcoding it on first use."""
+        try:
+            stat = os.stat(path)
+        except OSError as err:
+            raise HomeAssistantError(f"Could not read audio file '{path}': {err}") from err
+        key = (path, stat.st_mtime_ns, stat.st_size, transcode)
+        filename = self._assets.get(key)
+        if filename and os.path.isfile(os.path.join(self.directory, filename)):
+            return filename
+        filename = self._assets[key] = self._store(path, transcode, binary)
+        return filename
+
+    def _prepare_download(self, source: str, url: str, extension: str, transcode: bool, binary: str) -> str:
+        """Return the asset name of a media source, downloading it on first use."""
+        key = (source, transcode)
+        filename = self._assets.get(key)
+        if filename and os.path.isfile(os.path.join(self.directory, filename)):
+            return filename
+
+        os.makedirs(self.directory, exist_ok=True)
+        download = os.path.join(self.directory, f"download-{secrets.token_hex(8)}{extension}")
+        try:
+            with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                with open(download, "wb") as file:
+                    for chunk in response.iter_content(chunk_size=MEDIA_CHUNK_SIZE):
+                        file.write(chunk)
+            filename = self._assets[key] = self._store(download, transcode, binary)
+        except requests.exceptions.RequestException as err:
+            raise HomeAssistantError(f"Could not fetch '{source}': {err}") from err
+        finally:
+            if os.path.exists(download):
+                os.remove(download)
+        return filename
+
+    def _store(self, path: str, transcode: bool, binary: str) -> str:
+        """Copy or transcode a file to an asset named after its content, returning the name."""
+        digest = _sha256(path)
+        extension = os.path.splitext(path)[1].lower()
+        convert = transcode or extension not in PLAYABLE
+        if convert:
+            # Name transcoded assets after the source and the conversion, so they are converted once
+            conversion = hashlib.sha256(f"{digest} {' '.join(TRANSCODE_ARGS)}".encode()).hexdigest()
+            filename = f"{conversion}.wav"
+        else:
+            filename = f"{digest}{extension}"
+
+        target = os.path.join(self.directory, filename)
+        if not os.path.isfile(target):
+            os.makedirs(self.directory, exist_ok=True)
+            partial = f"{target}.part"
+            try:
+                if convert:
+                    _LOGGER.debug("Transcoding %s for calls", path)
+                    self._transcode(binary, path, partial)
+                else:
+                    shutil.copyfile(path, partial)
+                os.replace(partial, target)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+        return filename
+
+    @staticmethod
+    def _transcode(binary: str, source: str, target: str) -> None:
+        """Convert source to call audio with ffmpeg."""
+        try:
+            subprocess.run(
+                [binary, "-nostdin", "-loglevel", "error", "-y", "-i", source, *TRANSCODE_ARGS, target],
+                capture_output=True,
+                check=True,
+                timeout=TRANSCODE_TIMEOUT,
+            )
+        except FileNotFoundError as err:
+            raise HomeAssistantError("Transcoding audio needs ffmpeg") from err
+        except subprocess.CalledProcessError as err:
+            raise HomeAssistantError(
+                f"Could not transcode '{source}': {err.stderr.decode(errors='replace').strip()}"
+            ) from err
+        except subprocess.TimeoutExpired as err:
+            raise HomeAssistantError(f"Transcoding '{source}' timed out") from err
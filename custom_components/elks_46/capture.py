@@ -0,0 +1,143 @@
+"""Opt-in capture of 46elks API traffic for offline replay."""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+
+from .const import CAPTURE_BODY_LIMIT, CAPTURE_MAX_BYTES
+
+_LOGGER = logging.getLogger(__name__)
+
+REDACTED = "**REDACTED**"
+# Credentials, and callback URLs that embed webhook ids
+SENSITIVE_KEYS = frozenset(
+    {"password", "secret", "api_password", "authorization", "sms_url", "voice_start", "whendelivered", "whenhangup"}
+)
+# Personal data, masked unless a capture includes it
+PERSONAL_KEYS = frozenset({"email", "displayname"})
+MESSAGE_KEYS = frozenset({"message"})
+PHONE_NUMBER = re.compile(r"^\+[1-9]\d{6,14}$")
+_WORD = re.compile(r"\w")
+
+
+def redact(value, pseudonym=None):
+    """Return value with sensitive fields replaced, recursively.
+
+    Given pseudonym, a function mapping a phone number to a stand-in, personal
+    data is masked too: phone numbers are replaced, and message texts keep
+    only their length and punctuation.
+    """
+    if isinstance(value, dict):
+        return {key: _redact_field(str(key).lower(), item, pseudonym) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item, pseudonym) for item in value]
+    if pseudonym and isinstance(value, str) and PHONE_NUMBER.match(value):
+        return pseudonym(value)
+    return value
+
+
+def _redact_field(key: str, value, pseudonym):
+    """Return the redacted value of a field."""
+    if key in SENSITIVE_KEYS or (pseudonym and key in PERSONAL_KEYS):
+        return REDACTED
+    if pseudonym and key in MESSAGE_KEYS and isinstance(value, str):
+        return _WORD.sub("x", value)
+    return redact(value, pseudonym)
+
+
+class TrafficCapture:
+    """Append API requests and responses with timings to a size-bounded JSON lines file.
+
+    When the file reaches its size limit it is rotated to path.1, so at most
+    twice the limit is kept on disk. Records are written from executor threads.
+    Unless include_personal is set, phone numbers are replaced by keyed hashes
+    that stay the same within the capture, and messages and emails are masked.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = CAPTURE_MAX_BYTES, include_personal: bool = False
+    ) -> None:
+        """Initialize the capture."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.include_personal = include_personal
+        self.started = time.monotonic()
+        self._key = secrets.token_bytes(16)
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+    def record(
+        self, method: str, path: str, kwargs: dict, response, elapsed: float, hedge: bool = False
+    ) -> None:
+        """Record one request, or a failed request if response is None.
+
+        A hedged duplicate of a read is marked, so a replay does not issue it as a read of its own.
+        """
+        entry = {
+            "t": round(time.monotonic() - self.started - elapsed, 4),
+            "method": method,
+            "path": path,
+            "params": self._redact(kwargs.get("params")),
+            "data": self._redact(kwargs.get("data")),
+            "elapsed": round(elapsed, 4),
+        }
+        if hedge:
+            entry["hedge"] = True
+        if response is None:
+            entry["status"] = None
+        else:
+            entry["status"] = response.status_code
+            entry["body"] = self._body(response)
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+
+        try:
+            with self._lock:
+                self._write(line)
+        except OSError as err:
+            _LOGGER.warning("Could not write traffic capture: %s", err)
+
+    def _pseudonym(self, number: str) -> str:
+        """Return a stand-in for number with the same calling code prefix and length."""
+        digest = hmac.new(self._key, number.encode(), hashlib.sha256).hexdigest()
+        digits = str(int(digest, 16))
+        return f"{number[:3]}{digits[:len(number) - 3]}"
+
+    def _redact(self, value):
+        """Return value redacted for the capture."""
+        return redact(value, None if self.include_personal else self._pseudonym)
+
+    def _body(self, response):
+        """Return the redacted JSON body of a response, or None if it is too large."""
+        if len(response.content or b"") > CAPTURE_BODY_LIMIT:
+            return None
+        try:
+            return self._redact(response.json())
+        except ValueError:
+            return None
+
+    def _write(self, line: str) -> None:
+        """Write a line, rotating the file when it is full."""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+            self._size = self._file.tell()
+        if self._size and self._size + len(line) > self.max_bytes:
+            self._file.close()
+            os.replace(self.path, f"{self.path}.1")
+            self._file = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+            self._size = 0
+        self._file.write(line)
+        self._file.flush()
+        self._size += len(line)
+
+    def close(self) -> None:
+        """Close the capture file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -5,17 +5,41 @@ import re
 import requests
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import selector
 
 from .const import (
     API_BASE_URL,
     API_TIMEOUT,
+    CONF_ALLOWED_SENDERS,
     CONF_API_PASSWORD,
+    CONF_API_TIMEOUT,
     CONF_API_USERNAME,
+    CONF_CAPTURE_TRAFFIC,
+    CONF_COMMANDS,
+    CONF_DAILY_SPEND_CAP,
+    CONF_DEFAULT_COUNTRY,
     CONF_DEFAULT_SENDER,
+    CONF_DRY_RUN,
+    CONF_HEDGE_READS,
+    CONF_HISTORY_LIMIT,
+    CONF_REGISTER_SMS_URL,
+    CONF_ROUTES,
+    CONF_SEND_CONCURRENCY,
+    CONF_SUBACCOUNTS,
+    CONF_SYNC_MEDIA,
+    DEFAULT_COUNTRY,
+    DEFAULT_SEND_CONCURRENCY,
     DOMAIN,
+    HISTORY_BUFFER_SIZE,
+    HISTORY_FETCH_LIMIT,
+    UPDATE_INTERVALS,
 )
+from .contacts import parse_members
+from .inbound import COMMANDS_SCHEMA
+from .phone import COUNTRIES, normalize
+from .routing import ROUTES_SCHEMA
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,6 +64,16 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 )
 
 
+STEP_CONTACT_GROUP_SCHEMA = vol.Schema(
+    {
+        vol.Required("name"): str,
+        vol.Required("members"): selector.TextSelector(
+            selector.TextSelectorConfig(multiline=True)
+        ),
+    }
+)
+
+
 async def validate_credentials(hass: HomeAssistant, username: str, password: str) -> dict:
     """Validate the credentials by making a test API call."""
     try:
@@ -105,6 +139,295 @@ class ElksConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return ElksOptionsFlow(config_entry)
+
+
+class ElksOptionsFlow(config_entries.OptionsFlow):
+    """Handle 46elks options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    @property
+    def _contacts(self):
+        """Return the contact groups of the running entry, or None if it is not loaded."""
+        data = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        return data["contacts"] if data else None
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        """Show the options menu."""
+        return self.async_show_menu(
+            step_id="init",
+            menu_options=[
+                "contact_group",
+                "remove_contact_group",
+                "spending_limit",
+                "inbound_sms",
+                "routing",
+                "media_sync",
+                "subaccounts",
+                "performance",
+            ],
+        )
+
+    async def async_step_performance(self, user_input=None) -> FlowResult:
+        """Tune polling, timeouts and send concurrency."""
+        if user_input is not None:
+            user_input[CONF_HISTORY_LIMIT] = int(user_input[CONF_HISTORY_LIMIT])
+            user_input[CONF_SEND_CONCURRENCY] = int(user_input[CONF_SEND_CONCURRENCY])
+            return self.async_create_entry(title="", data={**self.config_entry.options, **user_input})
+
+        options = self.config_entry.options
+
+        def number(minimum, maximum, step=1, unit=None):
+            return selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=minimum,
+                    max=maximum,
+                    step=step,
+                    unit_of_measurement=unit,
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            )
+
+        return self.async_show_form(
+            step_id="performance",
+            data_schema=vol.Schema(
+                {
+                    **{
+                        vol.Required(
+                            option, default=options.get(option, default.total_seconds() / 60)
+                        ): number(1, 1440, unit="min")
+                        for option, default in UPDATE_INTERVALS.values()
+                    },
+                    vol.Required(
+                        CONF_API_TIMEOUT,
+                        default=options.get(CONF_API_TIMEOUT, API_TIMEOUT),
+                    ): number(1, 120, unit="s"),
+                    vol.Required(
+                        CONF_HISTORY_LIMIT,
+                        default=options.get(CONF_HISTORY_LIMIT, HISTORY_FETCH_LIMIT),
+                    ): number(1, HISTORY_BUFFER_SIZE),
+                    vol.Required(
+                        CONF_SEND_CONCURRENCY,
+                        default=options.get(CONF_SEND_CONCURRENCY, DEFAULT_SEND_CONCURRENCY),
+                    ): number(1, 32),
+                    vol.Required(
+                        CONF_DRY_RUN,
+                        default=options.get(CONF_DRY_RUN, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_HEDGE_READS,
+                        default=options.get(CONF_HEDGE_READS, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_CAPTURE_TRAFFIC,
+                        default=options.get(CONF_CAPTURE_TRAFFIC, False),
+                    ): bool,
+                }
+            ),
+        )
+
+    async def async_step_subaccounts(self, user_input=None) -> FlowResult:
+        """Configure subaccount polling."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**self.config_entry.options, **user_input})
+
+        return self.async_show_form(
+            step_id="subaccounts",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SUBACCOUNTS,
+                        default=self.config_entry.options.get(CONF_SUBACCOUNTS, False),
+                    ): bool,
+                }
+            ),
+        )
+
+    async def async_step_media_sync(self, user_input=None) -> FlowResult:
+        """Configure recording and MMS media sync."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**self.config_entry.options, **user_input})
+
+        return self.async_show_form(
+            step_id="media_sync",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SYNC_MEDIA,
+                        default=self.config_entry.options.get(CONF_SYNC_MEDIA, False),
+                    ): bool,
+                }
+            ),
+        )
+
+    async def async_step_inbound_sms(self, user_input=None) -> FlowResult:
+        """Configure inbound SMS commands."""
+        errors = {}
+
+        if user_input is not None:
+            country = self.config_entry.options.get(CONF_DEFAULT_COUNTRY, DEFAULT_COUNTRY)
+            senders = [
+                normalize(sender, country)
+                for sender in parse_members(user_input.get(CONF_ALLOWED_SENDERS) or "")
+            ]
+            try:
+                commands = COMMANDS_SCHEMA(user_input.get(CONF_COMMANDS) or [])
+            except vol.Invalid:
+                errors[CONF_COMMANDS] = "invalid_commands"
+            if None in senders:
+                errors[CONF_ALLOWED_SENDERS] = "invalid_senders"
+            if not errors:
+                return self.async_create_entry(
+                    title="",
+                    data={
+                        **self.config_entry.options,
+                        CONF_REGISTER_SMS_URL: user_input[CONF_REGISTER_SMS_URL],
+                        CONF_COMMANDS: commands,
+                        CONF_ALLOWED_SENDERS: list(dict.fromkeys(senders)),
+                    },
+                )
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="inbound_sms",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_REGISTER_SMS_URL,
+                        default=options.get(CONF_REGISTER_SMS_URL, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_COMMANDS,
+                        default=options.get(CONF_COMMANDS, []),
+                    ): selector.ObjectSelector(),
+                    vol.Optional(
+                        CONF_ALLOWED_SENDERS,
+                        default=", ".join(options.get(CONF_ALLOWED_SENDERS, [])),
+                    ): selector.TextSelector(selector.TextSelectorConfig(multiline=True)),
+                }
+            ),
+            errors=errors,
+        )
+
+    async def async_step_routing(self, user_input=None) -> FlowResult:
+        """Configure senders and prices per destination prefix, and the default country."""
+        errors = {}
+
+        if user_input is not None:
+            try:
+                routes = ROUTES_SCHEMA(user_input.get(CONF_ROUTES) or [])
+            except vol.Invalid:
+                errors[CONF_ROUTES] = "invalid_routes"
+            else:
+                return self.async_create_entry(
+                    title="",
+                    data={
+                        **self.config_entry.options,
+                        CONF_ROUTES: routes,
+                        CONF_DEFAULT_COUNTRY: user_input[CONF_DEFAULT_COUNTRY],
+                    },
+                )
+
+        return self.async_show_form(
+            step_id="routing",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_ROUTES,
+                        default=self.config_entry.options.get(CONF_ROUTES, []),
+                    ): selector.ObjectSelector(),
+                    vol.Required(
+                        CONF_DEFAULT_COUNTRY,
+                        default=self.config_entry.options.get(CONF_DEFAULT_COUNTRY, DEFAULT_COUNTRY),
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=list(COUNTRIES), mode=selector.SelectSelectorMode.DROPDOWN
+                        )
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
+    async def async_step_spending_limit(self, user_input=None) -> FlowResult:
+        """Configure the local daily spend cap."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**self.config_entry.options, **user_input})
+
+        return self.async_show_form(
+            step_id="spending_limit",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_DAILY_SPEND_CAP,
+                        default=self.config_entry.options.get(CONF_DAILY_SPEND_CAP, 0),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0,
+                            step=1,
+                            unit_of_measurement="SEK",
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    ),
+                }
+            ),
+        )
+
+    async def async_step_contact_group(self, user_input=None) -> FlowResult:
+        """Create or replace a contact group."""
+        if self._contacts is None:
+            return self.async_abort(reason="not_loaded")
+        errors = {}
+
+        if user_input is not None:
+            name = user_input["name"].strip()
+            members = parse_members(user_input["members"])
+            if not re.match(r"^(?=.*[A-Za-z])[A-Za-z0-9][A-Za-z0-9_ -]*$", name):
+                errors["name"] = "invalid_group_name"
+            elif not members:
+                errors["members"] = "invalid_members"
+            else:
+                try:
+                    await self._contacts.async_set_group(
+                        name,
+                        members,
+                        self.config_entry.options.get(CONF_DEFAULT_COUNTRY, DEFAULT_COUNTRY),
+                    )
+                except ValueError:
+                    errors["members"] = "invalid_members"
+                else:
+                    return self.async_create_entry(title="", data=dict(self.config_entry.options))
+
+        return self.async_show_form(
+            step_id="contact_group",
+            data_schema=STEP_CONTACT_GROUP_SCHEMA,
+            errors=errors,
+        )
+
+    async def async_step_remove_contact_group(self, user_input=None) -> FlowResult:
+        """Remove a contact group."""
+        if self._contacts is None:
+            return self.async_abort(reason="not_loaded")
+        groups = list(self._contacts.groups)
+        if not groups:
+            return self.async_abort(reason="no_contact_groups")
+
+        if user_input is not None:
+            await self._contacts.async_remove_group(user_input["name"])
+            return self.async_create_entry(title="", data=dict(self.config_entry.options))
+
+        return self.async_show_form(
+            step_id="remove_contact_group",
+            data_schema=vol.Schema({vol.Required("name"): vol.In(groups)}),
+        )
+
 
 class CannotConnect(Exception):
     """Error to indicate we cannot connect."""
@@ -1,21 +1,105 @@
 """Constants for the 46elks integration."""
 from datetime import timedelta
 
+from homeassistant.const import CONF_SCAN_INTERVAL
+
 DOMAIN = "elks_46"
 
 # Configuration
 CONF_API_USERNAME = "api_username"
 CONF_API_PASSWORD = "api_password"
 CONF_DEFAULT_SENDER = "default_sender"
+CONF_DAILY_SPEND_CAP = "daily_spend_cap"
+CONF_COMMANDS = "commands"
+CONF_ALLOWED_SENDERS = "allowed_senders"
+CONF_REGISTER_SMS_URL = "register_sms_url"
+CONF_SYNC_MEDIA = "sync_media"
+CONF_API_TIMEOUT = "api_timeout"
+CONF_HISTORY_LIMIT = "history_limit"
+CONF_SEND_CONCURRENCY = "send_concurrency"
+CONF_SUBACCOUNTS = "subaccounts"
+CONF_DRY_RUN = "dry_run"
+CONF_ROUTES = "routes"
+CONF_ACCOUNT_INTERVAL = "account_interval"
+CONF_CALL_INTERVAL = "call_interval"
+CONF_NUMBERS_INTERVAL = "numbers_interval"
+CONF_CAPTURE_TRAFFIC = "capture_traffic"
+CONF_HEDGE_READS = "hedge_reads"
+CONF_DEFAULT_COUNTRY = "default_country"
 
 # API
 API_BASE_URL = "https://api.46elks.com/a1"
 API_TIMEOUT = 10
+API_POOL_SIZE = 10
+
+# Hedged reads
+HEDGE_SAMPLES = 100
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.05
+HEDGE_WINDOW = 100
+HEDGE_MAX_RATE = 0.1
 
 # Services
 SERVICE_SEND_SMS = "send_sms"
 SERVICE_SEND_MMS = "send_mms"
 SERVICE_MAKE_CALL = "make_call"
+SERVICE_ESCALATE_CALL = "escalate_call"
+SERVICE_SYNC_MEDIA = "sync_media"
+SERVICE_START_PROFILE = "start_profile"
+SERVICE_STOP_PROFILE = "stop_profile"
+
+# Subaccounts
+SUBACCOUNT_CONCURRENCY = 4
+
+# Sending
+DEFAULT_SEND_CONCURRENCY = 4
+DEFAULT_COUNTRY = "SE"
+# Rough costs in 1/10000 SEK, held against the balance and spend cap until the real cost is known
+ESTIMATED_SMS_COST = 5200  # Per segment, for destinations without a routed price
+ESTIMATED_MMS_COST = 20000
+ESTIMATED_CALL_COST = 10000
+
+# Delivery confirmation
+DEFAULT_DELIVERY_TIMEOUT = 60
+DELIVERY_PENDING_LIMIT = 1000
+DELIVERY_REPORT_TTL = 300
+
+# Profiling
+DEFAULT_PROFILE_DURATION = 300
 
-# Sensor update interval
+# Traffic capture
+CAPTURE_FILE = f"{DOMAIN}_capture.jsonl"
+CAPTURE_MAX_BYTES = 5 * 1024 * 1024
+CAPTURE_BODY_LIMIT = 16 * 1024
+
+# Events
+EVENT_SMS_RECEIVED = f"{DOMAIN}_sms_received"
+EVENT_COMMAND = f"{DOMAIN}_command"
+
+# Call escalation
+DEFAULT_WAVE_DELAY = 30
+DEFAULT_ESCALATION_TIMEOUT = 120
+
+# Sensor update intervals, polled by separate coordinators
 SCAN_INTERVAL = timedelta(minutes=30)
+UPDATE_INTERVALS = {
+    "account": (CONF_ACCOUNT_INTERVAL, timedelta(minutes=5)),
+    "sms": (CONF_SCAN_INTERVAL, SCAN_INTERVAL),
+    "calls": (CONF_CALL_INTERVAL, SCAN_INTERVAL),
+    "numbers": (CONF_NUMBERS_INTERVAL, timedelta(hours=6)),
+}
+
+# History
+HISTORY_FETCH_LIMIT = 10
+HISTORY_BUFFER_SIZE = 1000
+
+# Media sync
+MEDIA_SYNC_INTERVAL = timedelta(hours=1)
+MEDIA_DOWNLOAD_CONCURRENCY = 3
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+# Long-term statistics
+STATISTICS_INTERVAL = timedelta(hours=1)
+STATISTICS_BACKFILL = timedelta(days=30)
+# Hours with calls still in progress wait this long for them to end and be priced
+STATISTICS_SETTLE_TIMEOUT = timedelta(hours=4)
@@ -0,0 +1,99 @@
+"""Contact groups for the 46elks integration."""
+import logging
+import re
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+
+from .const import DEFAULT_COUNTRY, DOMAIN
+from .phone import normalize
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def parse_members(value: str) -> list:
+    """Split a free-text member list into individual entries."""
+    return [member for member in SEPARATORS.split(value) if member]
+
+
+def group_key(name: str) -> str:
+    """Return the lookup key for a group name."""
+    return name.strip().casefold()
+
+
+class ContactGroups:
+    """Contact groups stored in Home Assistant storage."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the contact groups."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.contacts")
+        self._groups = {}
+        self._index = {}
+
+    @property
+    def groups(self) -> dict:
+        """Return the configured groups and their members."""
+        return dict(self._groups)
+
+    async def async_load(self) -> None:
+        """Load groups from storage."""
+        data = await self._store.async_load()
+        if data:
+            self._groups = data.get("groups", {})
+        self._rebuild_index()
+
+    async def async_set_group(self, name: str, members: list, country: str = DEFAULT_COUNTRY) -> None:
+        """Create or replace a group, reading national numbers as numbers in country."""
+        numbers = [normalize(member, country) for member in members]
+        if None in numbers:
+            invalid = [member for member, number in zip(members, numbers) if number is None]
+            raise ValueError(f"Invalid phone number {', '.join(repr(member) for member in invalid)}")
+        # Names differing only in case are the same group, the latest spelling is kept
+        self._discard(name)
+        self._groups[name.strip()] = numbers
+        await self._async_save()
+
+    async def async_remove_group(self, name: str) -> None:
+        """Remove a group."""
+        self._discard(name)
+        await self._async_save()
+
+    def _discard(self, name: str) -> None:
+        """Drop every spelling of a group name."""
+        for existing in list(self._groups):
+            if group_key(existing) == group_key(name):
+                del self._groups[existing]
+
+    async def _async_save(self) -> None:
+        """Persist groups and rebuild the recipient index."""
+        self._rebuild_index()
+        await self._store.async_save({"groups": self._groups})
+
+    def _rebuild_index(self) -> None:
+        """Precompute the deduplicated recipients of every group."""
+        self._index = {
+            group_key(name): tuple(dict.fromkeys(members))
+            for name, members in self._groups.items()
+        }
+
+    def expand(self, targets) -> list:
+        """Expand group names in targets to a deduplicated list of numbers."""
+        if isinstance(targets, str):
+            targets = [targets]
+
+        recipients = {}
+        for target in targets:
+            # Groups win, so names like "1st floor" are not taken for numbers
+            members = self._index.get(group_key(target))
+            if members is not None:
+                recipients.update(dict.fromkeys(members))
+            elif target.startswith("+") or target[:1].isdigit():
+                recipients[target] = None
+            else:
+                raise HomeAssistantError(f"Unknown contact group '{target}'")
+        return list(recipients)
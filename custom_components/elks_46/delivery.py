@@ -0,0 +1,132 @@
+"""Delivery confirmation for the 46elks integration."""
+import asyncio
+from collections import OrderedDict
+import logging
+import time
+
+from aiohttp import web
+from homeassistant.components import webhook
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DELIVERY_PENDING_LIMIT, DELIVERY_REPORT_TTL, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS_TIMEOUT = "timeout"
+
+
+class DeliveryTracker:
+    """Resolve futures for sent messages when 46elks reports their delivery."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self.webhook_id = webhook.async_generate_id()
+        # message_id -> (future, sent_at, expires_at), oldest first
+        self._pending = OrderedDict()
+        # Reports that arrived before the send response, message_id -> (status, received_at)
+        self._early = OrderedDict()
+
+    @property
+    def url(self) -> str:
+        """Return the URL to pass as whendelivered."""
+        return webhook.async_generate_url(self.hass, self.webhook_id)
+
+    @callback
+    def async_register(self) -> None:
+        """Register the delivery report webhook."""
+        webhook.async_register(
+            self.hass,
+            DOMAIN,
+            "46elks delivery reports",
+            self.webhook_id,
+            self._async_handle_webhook,
+            allowed_methods=["POST"],
+        )
+
+    @callback
+    def async_unregister(self) -> None:
+        """Unregister the webhook and give up on pending deliveries."""
+        webhook.async_unregister(self.hass, self.webhook_id)
+        for future, _, _ in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    @callback
+    def async_expect(self, message_id: str, sent_at: float, timeout: float) -> asyncio.Future:
+        """Return a future resolved with the delivery status of a sent message."""
+        now = time.monotonic()
+        self._expire(now)
+        future = self.hass.loop.create_future()
+
+        if (report := self._early.pop(message_id, None)) is not None:
+            status, received_at = report
+            future.set_result((status, max(received_at - sent_at, 0)))
+            return future
+
+        if len(self._pending) >= DELIVERY_PENDING_LIMIT:
+            old_id, (old, _, _) = self._pending.popitem(last=False)
+            _LOGGER.debug("Too many pending deliveries, no longer waiting for %s", old_id)
+            old.cancel()
+        self._pending[message_id] = (future, sent_at, now + timeout)
+        return future
+
+    @callback
+    def async_discard(self, message_id: str) -> None:
+        """Stop waiting for a message."""
+        if (pending := self._pending.pop(message_id, None)) is not None:
+            pending[0].cancel()
+
+    async def async_wait(self, sent: dict, timeout: float) -> dict:
+        """Wait for the delivery of sent messages, keyed by message id with their send time.
+
+        Returns the final status and latency in seconds of every message.
+        """
+        futures = {
+            message_id: self.async_expect(message_id, sent_at, timeout)
+            for message_id, sent_at in sent.items()
+        }
+        if futures:
+            await asyncio.wait(futures.values(), timeout=timeout)
+
+        deliveries = {}
+        for message_id, future in futures.items():
+            if future.done() and not future.cancelled():
+                status, latency = future.result()
+                deliveries[message_id] = {"status": status, "latency": round(latency, 2)}
+            else:
+                self.async_discard(message_id)
+                deliveries[message_id] = {"status": STATUS_TIMEOUT, "latency": None}
+        return deliveries
+
+    @callback
+    def _expire(self, now: float) -> None:
+        """Drop pending deliveries and early reports that are past their expiry."""
+        for message_id in [key for key, (_, _, expires_at) in self._pending.items() if expires_at <= now]:
+            self._pending.pop(message_id)[0].cancel()
+        while self._early and next(iter(self._early.values()))[1] + DELIVERY_REPORT_TTL <= now:
+            self._early.popitem(last=False)
+
+    async def _async_handle_webhook(
+        self, hass: HomeAssistant, webhook_id: str, request: web.Request
+    ) -> web.Response:
+        """Handle a delivery report from 46elks."""
+        data = await request.post()
+        self.async_report(data.get("id"), data.get("status"))
+        return web.Response(status=200)
+
+    @callback
+    def async_report(self, message_id: str, status: str) -> None:
+        """Resolve the future waiting for a message."""
+        if not message_id:
+            return
+        now = time.monotonic()
+        pending = self._pending.pop(message_id, None)
+        if pending is None:
+            self._early[message_id] = (status, now)
+            while len(self._early) > DELIVERY_PENDING_LIMIT:
+                self._early.popitem(last=False)
+            return
+        future, sent_at, _ = pending
+        if not future.done():
+            future.set_result((status, now - sent_at))
@@ -0,0 +1,181 @@
+"""Parallel call escalation for the 46elks integration."""
+import asyncio
+import json
+import logging
+import secrets
+import time
+from urllib.parse import urlencode
+
+import requests
+from aiohttp import web
+from homeassistant.components import webhook
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_ANSWER = "answer"
+EVENT_HANGUP = "hangup"
+
+
+class CallEscalation:
+    """Track the legs of a single call escalation."""
+
+    def __init__(self, escalation_id: str, audio_url: str) -> None:
+        """Initialize the escalation."""
+        self.escalation_id = escalation_id
+        self.audio_url = audio_url
+        self.started = time.monotonic()
+        self.dialed = []
+        self.failed = []
+        self.answered_by = None
+        self.answer_time = None
+        self._ringing = set()
+        self._call_ids = {}
+        self._done = asyncio.Event()
+
+    @property
+    def answered(self) -> bool:
+        """Return True once one of the legs has answered."""
+        return self.answered_by is not None
+
+    @callback
+    def async_dialed(self, number: str, call_id: str = None) -> None:
+        """Record that a leg is ringing."""
+        self.dialed.append(number)
+        if call_id:
+            self._call_ids[number] = call_id
+        if not self.answered:
+            self._ringing.add(number)
+            self._done.clear()
+
+    @callback
+    def async_dial_failed(self, number: str) -> None:
+        """Record that a leg could not be dialed."""
+        self.failed.append(number)
+
+    @callback
+    def async_answer(self, number: str) -> bool:
+        """Handle an answered leg, returning True if it won the escalation."""
+        self._ringing.discard(number)
+        if self.answered:
+            return False
+        self.answered_by = number
+        self.answer_time = round(time.monotonic() - self.started, 2)
+        self._done.set()
+        return True
+
+    @callback
+    def async_hangup(self, number: str) -> None:
+        """Handle a leg that has ended."""
+        self._ringing.discard(number)
+        if not self._ringing:
+            self._done.set()
+
+    def ringing_call_ids(self) -> list:
+        """Return the 46elks call ids of the legs still ringing."""
+        return [self._call_ids[number] for number in self._ringing if number in self._call_ids]
+
+    async def async_wait(self, timeout: float) -> bool:
+        """Wait until answered or all ringing legs ended, returning True if answered."""
+        if not self._ringing:
+            return self.answered
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.answered
+
+    def as_response(self) -> dict:
+        """Return the service response for this escalation."""
+        return {
+            "answered": self.answered,
+            "answered_by": self.answered_by,
+            "answer_time": self.answer_time,
+            "dialed": list(self.dialed),
+            "failed": list(self.failed),
+        }
+
+
+class EscalationManager:
+    """Route 46elks call callbacks to running escalations."""
+
+    def __init__(self, hass: HomeAssistant, api) -> None:
+        """Initialize the manager."""
+        self.hass = hass
+        self.api = api
+        self.webhook_id = webhook.async_generate_id()
+        self._escalations = {}
+
+    @callback
+    def async_register(self) -> None:
+        """Register the call callback webhook."""
+        webhook.async_register(
+            self.hass,
+            DOMAIN,
+            "46elks call events",
+            self.webhook_id,
+            self._async_handle_webhook,
+            allowed_methods=["POST"],
+        )
+
+    @callback
+    def async_unregister(self) -> None:
+        """Unregister the call callback webhook."""
+        webhook.async_unregister(self.hass, self.webhook_id)
+
+    @callback
+    def async_start(self, audio_url: str) -> CallEscalation:
+        """Start tracking a new escalation."""
+        escalation = CallEscalation(secrets.token_hex(8), audio_url)
+        self._escalations[escalation.escalation_id] = escalation
+        return escalation
+
+    @callback
+    def async_finish(self, escalation: CallEscalation) -> None:
+        """Stop tracking an escalation."""
+        self._escalations.pop(escalation.escalation_id, None)
+
+    async def async_hang_up(self, call_ids: list) -> None:
+        """End legs that are no longer needed."""
+        for call_id in call_ids:
+            try:
+                await self.api.async_hangup_call(self.hass, call_id)
+            except requests.exceptions.RequestException as err:
+                # The leg may have ended on its own in the meantime
+                _LOGGER.debug("Could not hang up call %s: %s", call_id, err)
+
+    def callback_url(self, escalation: CallEscalation, event: str) -> str:
+        """Return the callback URL 46elks should use for a call event."""
+        query = urlencode({"escalation": escalation.escalation_id, "event": event})
+        return f"{webhook.async_generate_url(self.hass, self.webhook_id)}?{query}"
+
+    async def _async_handle_webhook(
+        self, hass: HomeAssistant, webhook_id: str, request: web.Request
+    ) -> web.Response:
+        """Handle a call callback from 46elks."""
+        data = await request.post()
+        number = data.get("to")
+        event = request.query.get("event")
+        escalation = self._escalations.get(request.query.get("escalation"))
+
+        if event == EVENT_ANSWER:
+            if escalation and escalation.async_answer(number):
+                _LOGGER.info("Escalation %s answered by %s", escalation.escalation_id, number)
+                if call_ids := escalation.ringing_call_ids():
+                    hass.async_create_task(self.async_hang_up(call_ids))
+                return web.Response(
+                    text=json.dumps({"play": escalation.audio_url}),
+                    content_type="application/json",
+                )
+            # Someone else already answered, or the escalation is over
+            return web.Response(
+                text=json.dumps({"hangup": "reject"}),
+                content_type="application/json",
+            )
+
+        if event == EVENT_HANGUP and escalation:
+            escalation.async_hangup(number)
+
+        return web.Response(status=200)
@@ -0,0 +1,104 @@
+"""Hedged read requests for the 46elks API client."""
+import asyncio
+from collections import deque
+import time
+
+from .const import HEDGE_MAX_RATE, HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES, HEDGE_SAMPLES, HEDGE_WINDOW
+
+
+class HedgePolicy:
+    """Issue a second read when the first is slower than usual for its path.
+
+    The hedge delay is the p95 of recent latencies of the same path. At most
+    HEDGE_MAX_RATE of the last HEDGE_WINDOW reads are hedged, so a slow API
+    never gets twice the load.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the policy."""
+        self.enabled = False
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies = {}
+        self._recent = deque(maxlen=HEDGE_WINDOW)
+
+    def delay(self, path: str) -> float | None:
+        """Return how long to wait before hedging a read of path, or None to not hedge."""
+        samples = self._latencies.get(path)
+        if samples is None or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return max(ordered[int(len(ordered) * 0.95)], HEDGE_MIN_DELAY)
+
+    def observe(self, path: str, seconds: float) -> None:
+        """Record the latency of a read of path."""
+        samples = self._latencies.get(path)
+        if samples is None:
+            samples = self._latencies[path] = deque(maxlen=HEDGE_SAMPLES)
+        samples.append(seconds)
+
+    def _allow(self) -> bool:
+        """Return True if another hedge stays within the hedge rate cap."""
+        return sum(self._recent) < HEDGE_MAX_RATE * HEDGE_WINDOW
+
+    def _start(self, path: str, start_request, hedge: bool) -> asyncio.Future:
+        """Start an attempt, recording its latency when it ends.
+
+        An attempt cancelled because the other won is recorded with the time
+        it had run, a lower bound that keeps slow responses in the samples.
+        """
+        started = time.monotonic()
+        attempt = asyncio.ensure_future(start_request(hedge))
+        attempt.add_done_callback(lambda _: self.observe(path, time.monotonic() - started))
+        return attempt
+
+    async def async_request(self, path: str, start_request) -> object:
+        """Run start_request, starting it again if the first is slow; the first response wins.
+
+        start_request(hedge) returns an awaitable for one attempt of the same
+        idempotent read, hedge is True for the second attempt.
+        """
+        self.requests += 1
+        first = self._start(path, start_request, False)
+
+        delay = self.delay(path)
+        if delay is None:
+            self._recent.append(False)
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done or not self._allow():
+            self._recent.append(False)
+            return await first
+
+        self._recent.append(True)
+        self.hedged += 1
+        second = self._start(path, start_request, True)
+        attempts = (first, second)
+        pending = set(attempts)
+        while pending:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Fall back to the other attempt if the faster one failed
+            if any(attempt.done() and attempt.exception() is None for attempt in attempts):
+                break
+        # The executor thread finishes the losing request, its response is dropped
+        for attempt in pending:
+            attempt.cancel()
+        winner = next((attempt for attempt in attempts if attempt.done() and attempt.exception() is None), first)
+        if winner is second:
+            self.hedge_wins += 1
+        return winner.result()
+
+    def metrics(self) -> dict:
+        """Return hedging counters and the current hedge delays in milliseconds."""
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedged / self.requests, 3) if self.requests else None,
+            "delays_ms": {
+                path: round(delay * 1000, 1)
+                for path in sorted(self._latencies)
+                if (delay := self.delay(path)) is not None
+            },
+        }
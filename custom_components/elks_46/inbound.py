@@ -0,0 +1,155 @@
+"""Inbound SMS command dispatch for the 46elks integration."""
+import logging
+import re
+
+from aiohttp import web
+import voluptuous as vol
+from homeassistant.components import webhook
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, EVENT_COMMAND, EVENT_SMS_RECEIVED
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _valid_regex(value: str) -> str:
+    """Validate a regular expression."""
+    try:
+        re.compile(value)
+    except re.error as err:
+        raise vol.Invalid(f"Invalid pattern '{value}': {err}") from err
+    return value
+
+
+COMMAND_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required("name"): cv.slug,
+            vol.Exclusive("keyword", "match"): cv.string,
+            vol.Exclusive("pattern", "match"): vol.All(cv.string, _valid_regex),
+            vol.Optional("service"): cv.service,
+            vol.Optional("data", default={}): dict,
+            vol.Optional("reply"): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key("keyword", "pattern"),
+)
+
+COMMANDS_SCHEMA = vol.All(cv.ensure_list, [COMMAND_SCHEMA])
+
+
+class CommandTable:
+    """User-configured SMS commands, compiled once for cheap matching."""
+
+    def __init__(self, commands: list) -> None:
+        """Compile the command table."""
+        self.commands = commands
+        # Keywords match the first word of the message with a single dict lookup
+        self._keywords = {}
+        # Patterns are compiled separately, so their group names and numbers stay their own
+        self._patterns = []
+        for command in commands:
+            if "keyword" in command:
+                self._keywords.setdefault(command["keyword"].upper(), command)
+            else:
+                self._patterns.append((re.compile(command["pattern"], re.IGNORECASE), command))
+
+    def match(self, message: str) -> tuple:
+        """Return the matching command and its arguments, or (None, None)."""
+        text = message.strip()
+        words = text.split(maxsplit=1)
+        if words and (command := self._keywords.get(words[0].upper())):
+            return command, {"args": words[1] if len(words) > 1 else ""}
+
+        for pattern, command in self._patterns:
+            if found := pattern.match(text):
+                return command, found.groupdict()
+
+        return None, None
+
+
+class InboundSmsHandler:
+    """Receive inbound SMS from 46elks through a webhook."""
+
+    def __init__(
+        self, hass: HomeAssistant, webhook_id: str, commands: list, allowed_senders: list = ()
+    ) -> None:
+        """Initialize the handler."""
+        self.hass = hass
+        self.webhook_id = webhook_id
+        self.table = CommandTable(commands)
+        # Only these numbers may run commands; empty allows everyone
+        self.allowed_senders = frozenset(allowed_senders)
+
+    @property
+    def url(self) -> str:
+        """Return the URL to configure as the number's sms_url."""
+        return webhook.async_generate_url(self.hass, self.webhook_id)
+
+    @callback
+    def async_register(self) -> None:
+        """Register the inbound SMS webhook."""
+        webhook.async_register(
+            self.hass,
+            DOMAIN,
+            "46elks inbound SMS",
+            self.webhook_id,
+            self._async_handle_webhook,
+            allowed_methods=["POST"],
+        )
+
+    @callback
+    def async_unregister(self) -> None:
+        """Unregister the inbound SMS webhook."""
+        webhook.async_unregister(self.hass, self.webhook_id)
+
+    @callback
+    def async_set_commands(self, commands: list, allowed_senders: list = ()) -> None:
+        """Replace the command table and the senders allowed to use it."""
+        self.table = CommandTable(commands)
+        self.allowed_senders = frozenset(allowed_senders)
+
+    async def _async_handle_webhook(
+        self, hass: HomeAssistant, webhook_id: str, request: web.Request
+    ) -> web.Response:
+        """Handle an inbound SMS from 46elks."""
+        data = await request.post()
+        return web.Response(text=self.async_dispatch(dict(data)) or "")
+
+    @callback
+    def async_dispatch(self, data: dict) -> str | None:
+        """Fire events for an inbound SMS and run its command, returning any reply."""
+        message = data.get("message", "")
+        sms = {
+            "id": data.get("id"),
+            "from": data.get("from"),
+            "to": data.get("to"),
+            "message": message,
+            "created": data.get("created"),
+        }
+        self.hass.bus.async_fire(EVENT_SMS_RECEIVED, sms)
+
+        command, args = self.table.match(message)
+        if command is None:
+            return None
+        if self.allowed_senders and sms["from"] not in self.allowed_senders:
+            _LOGGER.warning("Ignored command %s from unknown sender %s", command["name"], sms["from"])
+            return None
+
+        _LOGGER.debug("Inbound SMS from %s matched command %s", sms["from"], command["name"])
+        self.hass.bus.async_fire(EVENT_COMMAND, {**sms, "command": command["name"], **args})
+
+        if "service" in command:
+            self.hass.async_create_task(self._async_call_service(command))
+
+        return command.get("reply")
+
+    async def _async_call_service(self, command: dict) -> None:
+        """Call the service of a command, logging a failure as nobody awaits it."""
+        domain, service = command["service"].split(".", 1)
+        try:
+            await self.hass.services.async_call(domain, service, dict(command["data"]), blocking=True)
+        except (HomeAssistantError, vol.Invalid) as err:
+            _LOGGER.error("Command %s failed to call %s: %s", command["name"], command["service"], err)
@@ -0,0 +1,112 @@
+"""Local balance ledger for the 46elks integration."""
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .models import parse_cost
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BalanceLedger:
+    """Track the account balance locally between API reconciliations.
+
+    Amounts are in 1/10000 SEK, the unit used by the 46elks API. Sends in
+    flight hold a reservation of their estimated cost until they are debited.
+    """
+
+    def __init__(self, hass: HomeAssistant, api, daily_cap: int = None) -> None:
+        """Initialize the ledger."""
+        self.hass = hass
+        self.api = api
+        self.daily_cap = daily_cap
+        self.balance = None
+        self._spent_today = 0
+        self._reserved = 0
+        self._day = dt_util.start_of_local_day()
+        self._lock = asyncio.Lock()
+
+    @property
+    def spent_today(self) -> int:
+        """Return the amount spent today."""
+        self._roll_day()
+        return self._spent_today
+
+    def _roll_day(self) -> None:
+        """Reset the daily spend at midnight."""
+        today = dt_util.start_of_local_day()
+        if today != self._day:
+            self._day = today
+            self._spent_today = 0
+
+    @callback
+    def reconcile(self, account_info: dict, spent_today: int = None) -> None:
+        """Replace the local balance with the balance reported by the API."""
+        if account_info is None:
+            return
+        balance = parse_cost(account_info.get("balance"))
+        if self.balance is not None and balance != self.balance:
+            _LOGGER.debug("Reconciled balance from %s to %s", self.balance, balance)
+        self.balance = balance
+        if spent_today is not None:
+            self._roll_day()
+            self._spent_today = max(self._spent_today, spent_today)
+
+    @callback
+    def debit(self, result: dict, reservation: int = 0) -> None:
+        """Debit the cost reported in a send response, settling its reservation."""
+        self.release(reservation)
+        # Calls are priced when they end, until the next reconciliation their estimate stands in
+        cost = parse_cost((result or {}).get("cost")) or reservation
+        if not cost:
+            return
+        self._roll_day()
+        self._spent_today += cost
+        if self.balance is not None:
+            self.balance -= cost
+
+    @callback
+    def release(self, reservation: int) -> None:
+        """Return a reservation whose send did not go through."""
+        self._reserved -= reservation
+
+    async def async_reserve(self, action: str, amount: int) -> int:
+        """Check action against what other sends in flight leave, and reserve its estimated cost."""
+        async with self._lock:
+            await self._async_check(action, amount)
+            self._reserved += amount
+        return amount
+
+    async def async_check(self, action: str, amount: int = 0) -> None:
+        """Raise if the balance or daily spend cap does not allow action.
+
+        amount is the estimated cost of the action, if known.
+        """
+        async with self._lock:
+            await self._async_check(action, amount)
+
+    async def _async_check(self, action: str, amount: int) -> None:
+        """Check action against the balance and spend cap left after reservations."""
+        if self.balance is not None and self.balance - self._reserved <= amount:
+            # The account may have been topped up since the last reconciliation
+            self.reconcile(await self.api.async_get_account_info(self.hass))
+            if self.balance - self._reserved <= 0:
+                raise HomeAssistantError(f"Insufficient balance to {action}")
+            if self.balance - self._reserved < amount:
+                raise HomeAssistantError(
+                    f"Insufficient balance to {action}, estimated cost is {amount / 10000:.2f} SEK"
+                )
+
+        spent = self.spent_today + self._reserved
+        if self.daily_cap is not None and spent >= self.daily_cap:
+            raise HomeAssistantError(
+                f"Daily spend cap of {self.daily_cap / 10000:.2f} SEK reached, refusing to {action}"
+            )
+        if self.daily_cap is not None and spent + amount > self.daily_cap:
+            raise HomeAssistantError(
+                f"Estimated cost of {amount / 10000:.2f} SEK would exceed the daily spend cap "
+                f"of {self.daily_cap / 10000:.2f} SEK, refusing to {action}"
+            )
@@ -0,0 +1,122 @@
+"""Call recording and MMS media sync for the 46elks integration."""
+import asyncio
+import logging
+import os
+from urllib.parse import urlparse
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, HISTORY_FETCH_LIMIT, MEDIA_DOWNLOAD_CONCURRENCY
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+def _as_list(value) -> list:
+    """Return value as a list of URLs."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [item for item in value if isinstance(item, str)]
+
+
+def discover_media(kind: str, records: list) -> list:
+    """Return (media_id, url) pairs referenced by history records."""
+    field_names = ("images",) if kind == "mms" else ("recording", "recordings")
+    media = []
+    for record in records:
+        urls = [url for field in field_names for url in _as_list(record.get(field))]
+        for index, url in enumerate(urls):
+            media.append((f"{kind}_{record.get('id')}_{index}", url))
+    return media
+
+
+class MediaSync:
+    """Download new recordings and MMS media to the media directory."""
+
+    def __init__(self, hass: HomeAssistant, api, entry_id: str) -> None:
+        """Initialize the media sync."""
+        self.hass = hass
+        self.api = api
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.media")
+        # media_id -> {"path", "sha256", "size"}
+        self._files = {}
+        self._checksums = {}
+        self.history_limit = HISTORY_FETCH_LIMIT
+        self._semaphore = asyncio.Semaphore(MEDIA_DOWNLOAD_CONCURRENCY)
+        self._lock = asyncio.Lock()
+
+    @property
+    def directory(self) -> str:
+        """Return the directory media is stored in."""
+        media_dir = self.hass.config.media_dirs.get("local", self.hass.config.path("media"))
+        return os.path.join(media_dir, DOMAIN)
+
+    async def async_load(self) -> None:
+        """Load the index of downloaded media."""
+        data = await self._store.async_load()
+        if data:
+            self._files = data.get("files", {})
+        self._checksums = {info["sha256"]: info["path"] for info in self._files.values()}
+
+    async def async_sync(self) -> int:
+        """Download media not seen before, returning how many files were added."""
+        if self._lock.locked():
+            return 0
+
+        async with self._lock:
+            mms_history = await self.api.async_get_mms_history(self.hass, limit=self.history_limit)
+            call_history = await self.api.async_get_call_history(self.hass, limit=self.history_limit)
+            pending = [
+                (media_id, url)
+                for media_id, url in discover_media("mms", mms_history) + discover_media("call", call_history)
+                if media_id not in self._files
+            ]
+            if not pending:
+                return 0
+
+            await self.hass.async_add_executor_job(os.makedirs, self.directory, 0o755, True)
+            results = await asyncio.gather(
+                *(self._async_download(media_id, url) for media_id, url in pending)
+            )
+            await self._store.async_save({"files": self._files})
+            return sum(results)
+
+    async def _async_download(self, media_id: str, url: str) -> bool:
+        """Stream one file to disk, deduplicating by checksum."""
+        extension = os.path.splitext(urlparse(url).path)[1] or ".bin"
+        path = os.path.join(self.directory, f"{media_id}{extension}")
+        partial = f"{path}.part"
+
+        async with self._semaphore:
+            try:
+                sha256, size = await self.hass.async_add_executor_job(
+                    self.api.download_media, url, partial
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning("Failed to download %s: %s", url, err)
+                await self.hass.async_add_executor_job(_remove, partial)
+                return False
+
+        if existing := self._checksums.get(sha256):
+            # Same content under another id, keep a single copy
+            await self.hass.async_add_executor_job(_remove, partial)
+            path = existing
+        else:
+            await self.hass.async_add_executor_job(os.replace, partial, path)
+            self._checksums[sha256] = path
+
+        self._files[media_id] = {"path": path, "sha256": sha256, "size": size}
+        _LOGGER.debug("Stored %s (%s bytes) at %s", media_id, size, path)
+        return True
+
+
+def _remove(path: str) -> None:
+    """Remove a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
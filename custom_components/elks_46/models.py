@@ -0,0 +1,161 @@
+"""Typed history records for the 46elks integration."""
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import StrEnum
+import sys
+
+MESSAGE_PREVIEW_LENGTH = 100
+
+
+class Direction(StrEnum):
+    """Direction of a message or call."""
+
+    INCOMING = "incoming"
+    OUTGOING = "outgoing"
+
+
+class Status(StrEnum):
+    """Status of a message or state of a call."""
+
+    CREATED = "created"
+    SENT = "sent"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+    ONGOING = "ongoing"
+    SUCCESS = "success"
+    BUSY = "busy"
+
+
+def _parse_enum(enum_cls, value):
+    """Return the enum member for value, or an interned string if unknown."""
+    if value is None:
+        return None
+    try:
+        return enum_cls(value)
+    except ValueError:
+        return sys.intern(str(value))
+
+
+def parse_created(value) -> datetime | None:
+    """Parse a 46elks timestamp into an aware UTC datetime."""
+    if not value:
+        return None
+    try:
+        created = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created
+
+
+def parse_cost(value) -> int:
+    """Parse a cost in 1/10000 SEK into an integer."""
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_duration(value) -> int:
+    """Parse a call duration in seconds into an integer."""
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass(slots=True, frozen=True)
+class HistoryRecord:
+    """A single SMS, MMS or call from the 46elks history."""
+
+    id: str
+    direction: Direction | str | None
+    status: Status | str | None
+    from_number: str | None
+    to_number: str | None
+    created: datetime | None
+    cost: int
+    message: str | None = None
+    duration: int = 0
+
+    @classmethod
+    def from_api(cls, data: dict) -> "HistoryRecord":
+        """Parse a record returned by the 46elks API."""
+        message = data.get("message")
+        return cls(
+            id=data.get("id"),
+            direction=_parse_enum(Direction, data.get("direction")),
+            status=_parse_enum(Status, data.get("status", data.get("state"))),
+            from_number=data.get("from"),
+            to_number=data.get("to"),
+            created=parse_created(data.get("created")),
+            cost=parse_cost(data.get("cost")),
+            message=message[:MESSAGE_PREVIEW_LENGTH] if message else message,
+            duration=parse_duration(data.get("duration")),
+        )
+
+    @property
+    def settled(self) -> bool:
+        """Return True once the cost of the record is final."""
+        return self.status is not Status.ONGOING
+
+    @property
+    def cost_sek(self) -> float:
+        """Return the cost in SEK."""
+        return round(self.cost / 10000, 2)
+
+
+class HistoryBuffer:
+    """Bounded, newest-first buffer of history records."""
+
+    def __init__(self, maxlen: int) -> None:
+        """Initialize the buffer."""
+        self._records = deque(maxlen=maxlen)
+        self._ids = set()
+
+    def __len__(self) -> int:
+        """Return the number of buffered records."""
+        return len(self._records)
+
+    def __iter__(self):
+        """Iterate over records, newest first."""
+        return iter(self._records)
+
+    def __bool__(self) -> bool:
+        """Return True if the buffer holds any records."""
+        return bool(self._records)
+
+    @property
+    def latest(self) -> HistoryRecord | None:
+        """Return the newest record."""
+        return self._records[0] if self._records else None
+
+    def merge(self, items: list) -> int:
+        """Merge newest-first API items into the buffer, returning how many were new."""
+        fetched = [HistoryRecord.from_api(item) for item in items]
+        fetched_ids = {record.id for record in fetched}
+        new = len(fetched_ids - self._ids)
+
+        # Refetched records replace their stale copies, which sit at the head
+        while self._records and self._records[0].id in fetched_ids:
+            self._ids.discard(self._records.popleft().id)
+
+        for record in reversed(fetched):
+            if record.id in self._ids:
+                continue
+            if len(self._records) == self._records.maxlen:
+                self._ids.discard(self._records.pop().id)
+            self._records.appendleft(record)
+            self._ids.add(record.id)
+        return new
+
+    def since(self, start: datetime):
+        """Yield records created at or after start, newest first."""
+        for record in self._records:
+            if record.created is None:
+                continue
+            if record.created < start:
+                break
+            yield record
@@ -0,0 +1,59 @@
+"""Recipient number normalization for the 46elks integration."""
+import re
+from functools import lru_cache
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DEFAULT_COUNTRY
+
+# Calling code and national trunk prefix of the countries national numbers can be read in
+COUNTRIES = {
+    "SE": ("46", "0"),
+    "NO": ("47", ""),
+    "DK": ("45", ""),
+    "FI": ("358", "0"),
+    "IS": ("354", ""),
+    "EE": ("372", ""),
+    "DE": ("49", "0"),
+    "NL": ("31", "0"),
+    "GB": ("44", "0"),
+    "FR": ("33", "0"),
+    "ES": ("34", ""),
+    "PL": ("48", ""),
+}
+
+E164_PATTERN = re.compile(r"^\+[1-9]\d{6,14}$")
+_PUNCTUATION = str.maketrans("", "", " \t-().")
+
+
+@lru_cache(maxsize=1024)
+def normalize(value: str, country: str = DEFAULT_COUNTRY) -> str | None:
+    """Return value in E.164, reading national numbers as numbers in country, or None if invalid."""
+    # A trunk prefix written as "+46 (0)70..." is not dialed from abroad
+    number = value.replace("(0)", "").translate(_PUNCTUATION)
+    if number.startswith("00"):
+        number = f"+{number[2:]}"
+    elif not number.startswith("+"):
+        calling_code, trunk = COUNTRIES[country]
+        if not number.startswith(trunk):
+            return None
+        number = f"+{calling_code}{number[len(trunk):]}"
+    return number if E164_PATTERN.match(number) else None
+
+
+def normalize_recipients(values: list, country: str = DEFAULT_COUNTRY) -> list:
+    """Normalize recipients to deduplicated E.164 numbers, rejecting all invalid ones at once."""
+    numbers = {}
+    invalid = []
+    for value in values:
+        number = normalize(value, country)
+        if number is None:
+            invalid.append(value)
+        else:
+            numbers[number] = None
+    if invalid:
+        raise HomeAssistantError(
+            f"Invalid phone number {', '.join(repr(value) for value in invalid)}. "
+            "Use international format like +46701234567, or a national number"
+        )
+    return list(numbers)
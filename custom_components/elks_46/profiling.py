@@ -0,0 +1,125 @@
+"""On-demand profiling for the 46elks integration."""
+import contextlib
+import cProfile
+import functools
+import heapq
+import itertools
+import time
+
+SLOWEST_SPANS = 20
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    """Time a block of code and record it with the profiler."""
+
+    __slots__ = ("profiler", "stage", "detail", "start")
+
+    def __init__(self, profiler: "Profiler", stage: str, detail: str) -> None:
+        """Initialize the span."""
+        self.profiler = profiler
+        self.stage = stage
+        self.detail = detail
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        """Start timing."""
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        """Record the elapsed time."""
+        self.profiler.record(self.stage, time.perf_counter() - self.start, self.detail)
+
+
+class Profiler:
+    """Collect per-stage timing spans, and optionally a cProfile, while enabled.
+
+    Spans are only created while enabled, so disabled profiling costs a single
+    attribute check per instrumented call.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the profiler."""
+        self.enabled = False
+        self.started = None
+        self._stages = {}
+        self._slowest = []
+        self._sequence = itertools.count()
+        self._cprofile = None
+
+    def start(self, cprofile: bool = False) -> None:
+        """Start collecting spans, discarding earlier results."""
+        self._stages = {}
+        self._slowest = []
+        self.started = time.monotonic()
+        if cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self.enabled = True
+
+    def stop(self) -> tuple:
+        """Stop collecting, returning the summary and the cProfile, if any."""
+        self.enabled = False
+        profile, self._cprofile = self._cprofile, None
+        if profile is not None:
+            profile.disable()
+        return self.summary(), profile
+
+    def span(self, stage: str, detail: str = None):
+        """Return a context manager timing stage while enabled."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, detail)
+
+    def record(self, stage: str, seconds: float, detail: str = None) -> None:
+        """Record a timed span."""
+        if not self.enabled:
+            return
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+
+        item = (seconds, next(self._sequence), stage, detail)
+        if len(self._slowest) < SLOWEST_SPANS:
+            heapq.heappush(self._slowest, item)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def summary(self) -> dict:
+        """Return timing statistics per stage and the slowest spans, in milliseconds."""
+        return {
+            "duration": round(time.monotonic() - self.started, 1) if self.started else 0,
+            "stages": {
+                stage: {
+                    "count": count,
+                    "total_ms": round(total * 1000, 2),
+                    "mean_ms": round(total * 1000 / count, 2),
+                    "max_ms": round(longest * 1000, 2),
+                }
+                for stage, (count, total, longest) in sorted(self._stages.items())
+            },
+            "slowest": [
+                {"stage": stage, "detail": detail, "ms": round(seconds * 1000, 2)}
+                for seconds, _, stage, detail in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+
+PROFILER = Profiler()
+
+
+def traced(stage: str, func):
+    """Wrap a coroutine function so calls are timed while profiling."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not PROFILER.enabled:
+            return await func(*args, **kwargs)
+        with PROFILER.span(stage):
+            return await func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,128 @@
+"""Destination-prefix routing for the 46elks integration."""
+from dataclasses import dataclass
+
+import voluptuous as vol
+from homeassistant.helpers import config_validation as cv
+
+from .const import ESTIMATED_SMS_COST
+
+# The GSM 03.38 alphabet; extension characters take two septets
+GSM_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM_EXTENSION = frozenset("^{}\\[~]|€\f")
+
+
+def _valid_prefix(value: str) -> str:
+    """Validate a destination prefix, returning its digits."""
+    value = str(value).strip().replace(" ", "")
+    if value.startswith("00"):
+        value = value[2:]
+    value = value.lstrip("+")
+    if not value.isdigit():
+        raise vol.Invalid(f"Invalid destination prefix '{value}'")
+    return value
+
+
+ROUTE_SCHEMA = vol.Schema(
+    {
+        vol.Required("prefix"): _valid_prefix,
+        vol.Optional("sender"): cv.string,
+        vol.Optional("price"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+ROUTES_SCHEMA = vol.All(cv.ensure_list, [ROUTE_SCHEMA])
+
+
+def count_segments(message: str) -> int:
+    """Return how many SMS segments a message is split into."""
+    septets = 0
+    for char in message:
+        if char in GSM_BASIC:
+            septets += 1
+        elif char in GSM_EXTENSION:
+            septets += 2
+        else:
+            # Anything outside GSM 03.38 makes the whole message UCS-2
+            units = len(message.encode("utf-16-le")) // 2
+            return 1 if units <= 70 else -(-units // 67)
+    return 1 if septets <= 160 else -(-septets // 153)
+
+
+@dataclass(slots=True, frozen=True)
+class Route:
+    """Sender and price for destinations under a prefix."""
+
+    prefix: str
+    sender: str | None
+    # Per segment, in 1/10000 SEK
+    price: int | None
+
+
+class _Node:
+    """A trie node, one per prefix digit."""
+
+    __slots__ = ("children", "route")
+
+    def __init__(self) -> None:
+        """Initialize the node."""
+        self.children = {}
+        self.route = None
+
+
+class RoutingTable:
+    """Longest-prefix match of destination numbers to routes."""
+
+    def __init__(self, routes: list) -> None:
+        """Initialize the table."""
+        self.set_routes(routes)
+
+    def set_routes(self, routes: list) -> None:
+        """Rebuild the trie from configured routes."""
+        root = _Node()
+        for item in routes:
+            price = item.get("price")
+            node = root
+            for digit in item["prefix"]:
+                node = node.children.setdefault(digit, _Node())
+            node.route = Route(
+                prefix=item["prefix"],
+                sender=item.get("sender"),
+                price=None if price is None else round(price * 10000),
+            )
+        self.routes = routes
+        self._root = root
+
+    def __bool__(self) -> bool:
+        """Return True if any routes are configured."""
+        return bool(self.routes)
+
+    def lookup(self, number: str) -> Route | None:
+        """Return the route with the longest prefix matching number."""
+        node = self._root
+        best = None
+        for digit in number[1:] if number.startswith("+") else number:
+            node = node.children.get(digit)
+            if node is None:
+                break
+            if node.route is not None:
+                best = node.route
+        return best
+
+    def plan(self, messages: dict, default_sender: str, sender: str = None) -> tuple:
+        """Pick the sender of every message and estimate what each one costs.
+
+        A sender given by the caller wins over routed senders. Costs are in
+        1/10000 SEK per segment, at the estimated SMS cost for destinations
+        without a configured price.
+        """
+        senders = {}
+        costs = {}
+        for number, message in messages.items():
+            route = self.lookup(number)
+            senders[number] = sender or (route and route.sender) or default_sender
+            price = ESTIMATED_SMS_COST if route is None or route.price is None else route.price
+            costs[number] = price * count_segments(message) if message else 0
+        return senders, costs
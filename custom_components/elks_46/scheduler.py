@@ -0,0 +1,168 @@
+"""Persistent scheduler for deferred 46elks sends."""
+from datetime import datetime, timedelta
+import heapq
+import itertools
+import logging
+import secrets
+
+import requests
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceNotFound
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 5
+# Wait before each retry of a failed send; it is dropped after the last one
+RETRY_DELAYS = (
+    timedelta(minutes=1),
+    timedelta(minutes=5),
+    timedelta(minutes=15),
+    timedelta(hours=1),
+)
+
+
+class PartialSendError(HomeAssistantError):
+    """A send that failed for some of its recipients."""
+
+    def __init__(self, message: str, failed: list) -> None:
+        """Initialize the error with the recipients a retry should be limited to."""
+        super().__init__(message)
+        self.failed = failed
+
+
+class SendScheduler:
+    """Hold pending sends in a min-heap driven by a single timer."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.scheduled")
+        # Heap entries are (timestamp, sequence, job_id, service, data, attempts)
+        self._heap = []
+        self._sequence = itertools.count()
+        self._armed_at = None
+        self._unsub_timer = None
+        self._started = False
+
+    def __len__(self) -> int:
+        """Return the number of pending sends."""
+        return len(self._heap)
+
+    async def async_load(self) -> None:
+        """Load pending sends from storage."""
+        data = await self._store.async_load()
+        if data:
+            self._heap = [
+                (
+                    job["at"],
+                    next(self._sequence),
+                    job["id"],
+                    job["service"],
+                    job["data"],
+                    job.get("attempts", 0),
+                )
+                for job in data.get("jobs", [])
+            ]
+            heapq.heapify(self._heap)
+
+    @callback
+    def async_start(self) -> None:
+        """Arm the timer, once the services due sends are dispatched to exist."""
+        self._started = True
+        self._async_arm()
+
+    @callback
+    def async_schedule(self, when: datetime, service: str, data: dict) -> str:
+        """Queue a send for later, returning its job id."""
+        job_id = secrets.token_hex(6)
+        heapq.heappush(
+            self._heap,
+            (dt_util.as_timestamp(when), next(self._sequence), job_id, service, dict(data), 0),
+        )
+        self._async_arm()
+        self._async_save()
+        return job_id
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the timer, keeping pending sends in storage."""
+        self._started = False
+        self._disarm()
+
+    @callback
+    def _disarm(self) -> None:
+        """Cancel the timer."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._armed_at = None
+
+    @callback
+    def _async_arm(self) -> None:
+        """Point the single timer at the earliest pending send."""
+        next_at = self._heap[0][0] if self._heap and self._started else None
+        if next_at == self._armed_at:
+            return
+        self._disarm()
+        if next_at is None:
+            return
+        self._armed_at = next_at
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_fire, dt_util.utc_from_timestamp(next_at)
+        )
+
+    @callback
+    def _async_fire(self, now: datetime) -> None:
+        """Dispatch every send that is due."""
+        self._unsub_timer = None
+        self._armed_at = None
+        timestamp = dt_util.as_timestamp(now)
+        while self._heap and self._heap[0][0] <= timestamp:
+            _, _, job_id, service, data, attempts = heapq.heappop(self._heap)
+            self.hass.async_create_task(self._async_dispatch(job_id, service, data, attempts))
+        self._async_arm()
+        self._async_save()
+
+    async def _async_dispatch(self, job_id: str, service: str, data: dict, attempts: int) -> None:
+        """Run a due send through the regular service, retrying it later if it may yet succeed."""
+        try:
+            await self.hass.services.async_call(DOMAIN, service, data, blocking=True)
+        except (PartialSendError, ServiceNotFound, requests.exceptions.RequestException) as err:
+            if attempts >= len(RETRY_DELAYS):
+                _LOGGER.error("Scheduled %s %s failed and was dropped: %s", service, job_id, err)
+                return
+            if isinstance(err, PartialSendError):
+                # Only retry the recipients that did not get it
+                data = {**data, "to": err.failed}
+            retry_at = dt_util.utcnow() + RETRY_DELAYS[attempts]
+            _LOGGER.warning("Scheduled %s %s failed, retrying at %s: %s", service, job_id, retry_at, err)
+            heapq.heappush(
+                self._heap,
+                (dt_util.as_timestamp(retry_at), next(self._sequence), job_id, service, data, attempts + 1),
+            )
+            self._async_arm()
+            self._async_save()
+        except Exception as err:  # pylint: disable=broad-except
+            # Invalid data, a spending cap or a sender that cannot send fail the same way again
+            _LOGGER.error("Scheduled %s %s was rejected and dropped: %s", service, job_id, err)
+
+    @callback
+    def _async_save(self) -> None:
+        """Persist pending sends, coalescing bursts of changes."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to store."""
+        return {
+            "jobs": [
+                {"at": at, "id": job_id, "service": service, "data": data, "attempts": attempts}
+                for at, _, job_id, service, data, attempts in self._heap
+            ]
+        }
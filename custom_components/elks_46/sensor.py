@@ -2,18 +2,29 @@
 from datetime import timedelta
 import logging
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
     UpdateFailed,
 )
-
-from .const import DOMAIN, SCAN_INTERVAL
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_HISTORY_LIMIT,
+    CONF_SUBACCOUNTS,
+    DOMAIN,
+    HISTORY_BUFFER_SIZE,
+    HISTORY_FETCH_LIMIT,
+    UPDATE_INTERVALS,
+)
+from .models import HistoryBuffer
+from .profiling import PROFILER, traced
+from .subaccounts import SubaccountCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,46 +35,160 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up 46elks sensors based on a config entry."""
-    api = hass.data[DOMAIN][entry.entry_id]
-
-    async def async_update_data():
-        """Fetch data from API."""
+    api = hass.data[DOMAIN][entry.entry_id]["api"]
+    ledger = hass.data[DOMAIN][entry.entry_id]["ledger"]
+    analytics = hass.data[DOMAIN][entry.entry_id]["analytics"]
+    sms_history = HistoryBuffer(HISTORY_BUFFER_SIZE)
+    call_history = HistoryBuffer(HISTORY_BUFFER_SIZE)
+
+    async def async_update_account():
+        """Fetch the account, reconciling the ledger with today's known spend."""
         account_info = await api.async_get_account_info(hass)
         if account_info is None:
             raise UpdateFailed("Failed to fetch account info")
 
-        sms_history = await api.async_get_sms_history(hass, limit=10)
-        call_history = await api.async_get_call_history(hass, limit=10)
-
-        return {
-            "account": account_info,
-            "sms_history": sms_history,
-            "call_history": call_history,
-        }
-
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name="46elks account",
-        update_method=async_update_data,
-        update_interval=SCAN_INTERVAL,
-    )
+        start = dt_util.start_of_local_day()
+        ledger.reconcile(
+            account_info,
+            spent_today=sum(
+                record.cost for history in (sms_history, call_history) for record in history.since(start)
+            ),
+        )
+        return {"account": account_info}
+
+    async def async_update_sms():
+        """Fetch new SMS history."""
+        # Read on every refresh so option changes apply without a reload
+        limit = entry.options.get(CONF_HISTORY_LIMIT, HISTORY_FETCH_LIMIT)
+        items = await api.async_get_sms_history(hass, limit=limit)
+        analytics.async_observe(items)
+        sms_history.merge(items)
+        return {"sms_history": sms_history}
+
+    async def async_update_calls():
+        """Fetch new call history."""
+        limit = entry.options.get(CONF_HISTORY_LIMIT, HISTORY_FETCH_LIMIT)
+        call_history.merge(await api.async_get_call_history(hass, limit=limit))
+        return {"call_history": call_history}
+
+    async def async_update_numbers():
+        """Fetch allocated numbers."""
+        return {"numbers": await api.async_get_numbers(hass)}
+
+    update_methods = {
+        "account": async_update_account,
+        "sms": async_update_sms,
+        "calls": async_update_calls,
+        "numbers": async_update_numbers,
+    }
+    # Each kind of data refreshes on its own interval and fails on its own
+    coordinators = {
+        name: DataUpdateCoordinator(
+            hass,
+            _LOGGER,
+            name=f"46elks {name}",
+            update_method=traced(f"refresh.{name}", update_method),
+            update_interval=update_interval(entry.options, name),
+        )
+        for name, update_method in update_methods.items()
+    }
+    hass.data[DOMAIN][entry.entry_id]["coordinators"] = coordinators
 
-    await coordinator.async_config_entry_first_refresh()
+    # History first, so the account refresh reconciles today's spend. Only a
+    # failing account blocks setup, other sensors stay unavailable until they succeed
+    for name in ("sms", "calls", "numbers"):
+        await coordinators[name].async_refresh()
+    await coordinators["account"].async_config_entry_first_refresh()
 
     async_add_entities(
         [
-            ElksBalanceSensor(coordinator, entry),
-            ElksAccountSensor(coordinator, entry),
-            ElksLastSmsSensor(coordinator, entry),
-            ElksLastCallSensor(coordinator, entry),
-            ElksSmsTodaySensor(coordinator, entry),
-            ElksCostTodaySensor(coordinator, entry),
+            ElksBalanceSensor(coordinators["account"], entry),
+            ElksAccountSensor(coordinators["account"], entry),
+            ElksLastSmsSensor(coordinators["sms"], entry),
+            ElksLastCallSensor(coordinators["calls"], entry),
+            ElksSmsTodaySensor(coordinators["sms"], entry),
+            ElksCostTodaySensor(coordinators["sms"], coordinators["calls"], entry),
+            ElksNumbersSensor(coordinators["numbers"], entry),
+            ElksBusiestHourSensor(coordinators["sms"], analytics, entry),
+            ElksTopRecipientsSensor(coordinators["sms"], analytics, entry),
+            ElksFailureRateSensor(coordinators["sms"], analytics, entry),
+            ElksHedgedReadsSensor(coordinators["account"], api.hedging, entry),
         ]
     )
 
+    if entry.options.get(CONF_SUBACCOUNTS):
+        await _async_setup_subaccounts(
+            hass, entry, api, update_interval(entry.options, "sms"), async_add_entities
+        )
+
+
+def update_interval(options: dict, name: str) -> timedelta:
+    """Return the configured update interval of a coordinator."""
+    option, default = UPDATE_INTERVALS[name]
+    return timedelta(minutes=options.get(option, default.total_seconds() / 60))
+
+
+async def _async_setup_subaccounts(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    api,
+    interval: timedelta,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Poll subaccounts from one coordinator, adding sensors as they are discovered."""
+    subaccounts = SubaccountCoordinator(hass, api, interval)
+    subaccounts.history_limit = entry.options.get(CONF_HISTORY_LIMIT, HISTORY_FETCH_LIMIT)
+    hass.data[DOMAIN][entry.entry_id]["subaccounts"] = subaccounts
+    known = set()
+
+    @callback
+    def _async_add_new_subaccounts() -> None:
+        """Create sensors for subaccounts seen for the first time."""
+        new = [subaccount_id for subaccount_id in subaccounts.data or {} if subaccount_id not in known]
+        if not new:
+            return
+        known.update(new)
+        async_add_entities(
+            sensor
+            for subaccount_id in new
+            for sensor in (
+                ElksSubaccountSmsTodaySensor(subaccounts, entry, subaccount_id),
+                ElksSubaccountCostTodaySensor(subaccounts, entry, subaccount_id),
+            )
+        )
+
+    entry.async_on_unload(subaccounts.async_add_listener(_async_add_new_subaccounts))
+    # A failed first poll only delays the sensors, the main account keeps working
+    await subaccounts.async_refresh()
+    _async_add_new_subaccounts()
+
 
-class ElksBalanceSensor(CoordinatorEntity, SensorEntity):
+class ElksSensorEntity(CoordinatorEntity, SensorEntity):
+    """Base class for 46elks sensors that only write state when it changed."""
+
+    _last_written = None
+
+    def _state_snapshot(self) -> tuple:
+        """Return everything that ends up in the written state."""
+        return (self.available, self.native_value, self.extra_state_attributes)
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity was added."""
+        await super().async_added_to_hass()
+        self._last_written = self._state_snapshot()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if the value or attributes changed."""
+        with PROFILER.span("sensor", self.entity_id):
+            snapshot = self._state_snapshot()
+        if snapshot == self._last_written:
+            return
+        self._last_written = snapshot
+        self.async_write_ha_state()
+
+
+class ElksBalanceSensor(ElksSensorEntity):
     """Sensor for 46elks account balance."""
 
     def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
@@ -100,9 +225,12 @@ class ElksBalanceSensor(CoordinatorEntity, SensorEntity):
         return {}
 
 
-class ElksAccountSensor(CoordinatorEntity, SensorEntity):
+class ElksAccountSensor(ElksSensorEntity):
     """Sensor for 46elks account information."""
 
+    # Contact details stay on the entity but out of the recorder database
+    _unrecorded_attributes = frozenset({"email", "mobile_number"})
+
     def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
@@ -132,23 +260,26 @@ class ElksAccountSensor(CoordinatorEntity, SensorEntity):
             balance_ore = float(account.get("balance", 0))
             return {
                 "account_id": account.get("id"),
-                "email": account.get("email"),
-                "mobile_number": account.get("mobilenumber"),
                 "balance": round(balance_ore / 10000, 2),
                 "currency": account.get("currency", "SEK"),
+                "email": account.get("email"),
+                "mobile_number": account.get("mobilenumber"),
             }
         return {}
 
 
-class ElksLastSmsSensor(CoordinatorEntity, SensorEntity):
+class ElksLastSmsSensor(ElksSensorEntity):
     """Sensor for last SMS sent."""
 
+    _unrecorded_attributes = frozenset({"message"})
+
     def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._attr_unique_id = f"{entry.entry_id}_last_sms"
         self._attr_name = "46elks Last SMS"
         self._attr_icon = "mdi:message-text"
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, entry.entry_id)},
             name="46elks Account",
@@ -161,31 +292,29 @@ class ElksLastSmsSensor(CoordinatorEntity, SensorEntity):
     def native_value(self):
         """Return the state of the sensor."""
         if self.coordinator.data and "sms_history" in self.coordinator.data:
-            sms_list = self.coordinator.data["sms_history"]
-            if sms_list and len(sms_list) > 0:
-                return sms_list[0].get("created", "Unknown")
+            last_sms = self.coordinator.data["sms_history"].latest
+            if last_sms:
+                return last_sms.created
         return None
 
     @property
     def extra_state_attributes(self):
         """Return additional attributes."""
         if self.coordinator.data and "sms_history" in self.coordinator.data:
-            sms_list = self.coordinator.data["sms_history"]
-            if sms_list and len(sms_list) > 0:
-                last_sms = sms_list[0]
-                cost_ore = float(last_sms.get("cost", 0))
+            last_sms = self.coordinator.data["sms_history"].latest
+            if last_sms:
                 return {
-                    "to": last_sms.get("to"),
-                    "from": last_sms.get("from"),
-                    "message": last_sms.get("message", "")[:100],
-                    "status": last_sms.get("status"),
-                    "cost": round(cost_ore / 10000, 2),
-                    "direction": last_sms.get("direction"),
+                    "to": last_sms.to_number,
+                    "from": last_sms.from_number,
+                    "message": last_sms.message or "",
+                    "status": last_sms.status,
+                    "cost": last_sms.cost_sek,
+                    "direction": last_sms.direction,
                 }
         return {}
 
 
-class ElksLastCallSensor(CoordinatorEntity, SensorEntity):
+class ElksLastCallSensor(ElksSensorEntity):
     """Sensor for last call made."""
 
     def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
@@ -194,6 +323,7 @@ class ElksLastCallSensor(CoordinatorEntity, SensorEntity):
         self._attr_unique_id = f"{entry.entry_id}_last_call"
         self._attr_name = "46elks Last Call"
         self._attr_icon = "mdi:phone"
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, entry.entry_id)},
             name="46elks Account",
@@ -206,31 +336,29 @@ class ElksLastCallSensor(CoordinatorEntity, SensorEntity):
     def native_value(self):
         """Return the state of the sensor."""
         if self.coordinator.data and "call_history" in self.coordinator.data:
-            call_list = self.coordinator.data["call_history"]
-            if call_list and len(call_list) > 0:
-                return call_list[0].get("created", "Unknown")
+            last_call = self.coordinator.data["call_history"].latest
+            if last_call:
+                return last_call.created
         return None
 
     @property
     def extra_state_attributes(self):
         """Return additional attributes."""
         if self.coordinator.data and "call_history" in self.coordinator.data:
-            call_list = self.coordinator.data["call_history"]
-            if call_list and len(call_list) > 0:
-                last_call = call_list[0]
-                cost_ore = float(last_call.get("cost", 0))
+            last_call = self.coordinator.data["call_history"].latest
+            if last_call:
                 return {
-                    "to": last_call.get("to"),
-                    "from": last_call.get("from"),
-                    "duration": last_call.get("duration", 0),
-                    "state": last_call.get("state"),
-                    "cost": round(cost_ore / 10000, 2),
-                    "direction": last_call.get("direction"),
+                    "to": last_call.to_number,
+                    "from": last_call.from_number,
+                    "duration": last_call.duration,
+                    "state": last_call.status,
+                    "cost": last_call.cost_sek,
+                    "direction": last_call.direction,
                 }
         return {}
 
 
-class ElksSmsTodaySensor(CoordinatorEntity, SensorEntity):
+class ElksSmsTodaySensor(ElksSensorEntity):
     """Sensor for SMS count today."""
 
     def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
@@ -250,31 +378,23 @@ class ElksSmsTodaySensor(CoordinatorEntity, SensorEntity):
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        from datetime import datetime, timezone
-
         if self.coordinator.data and "sms_history" in self.coordinator.data:
-            sms_list = self.coordinator.data["sms_history"]
-            today = datetime.now(timezone.utc).date()
-            count = 0
-            for sms in sms_list:
-                created_str = sms.get("created", "")
-                if created_str:
-                    try:
-                        created = datetime.fromisoformat(created_str.replace("Z", "+00:00"))
-                        if created.date() == today:
-                            count += 1
-                    except (ValueError, AttributeError):
-                        pass
-            return count
+            return sum(1 for _ in self.coordinator.data["sms_history"].since(dt_util.start_of_local_day()))
         return 0
 
 
-class ElksCostTodaySensor(CoordinatorEntity, SensorEntity):
+class ElksCostTodaySensor(ElksSensorEntity):
     """Sensor for total cost today."""
 
-    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        sms_coordinator: DataUpdateCoordinator,
+        call_coordinator: DataUpdateCoordinator,
+        entry: ConfigEntry,
+    ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(sms_coordinator)
+        self._call_coordinator = call_coordinator
         self._attr_unique_id = f"{entry.entry_id}_cost_today"
         self._attr_name = "46elks Cost Today"
         self._attr_native_unit_of_measurement = "SEK"
@@ -287,37 +407,260 @@ class ElksCostTodaySensor(CoordinatorEntity, SensorEntity):
             configuration_url="https://dashboard.46elks.com/",
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Also follow the call history coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._call_coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        from datetime import datetime, timezone
-
-        if not self.coordinator.data:
-            return 0
-
-        today = datetime.now(timezone.utc).date()
+        start = dt_util.start_of_local_day()
         total_cost = 0
 
-        if "sms_history" in self.coordinator.data:
-            for sms in self.coordinator.data["sms_history"]:
-                created_str = sms.get("created", "")
-                if created_str:
-                    try:
-                        created = datetime.fromisoformat(created_str.replace("Z", "+00:00"))
-                        if created.date() == today:
-                            total_cost += float(sms.get("cost", 0))
-                    except (ValueError, AttributeError):
-                        pass
-
-        if "call_history" in self.coordinator.data:
-            for call in self.coordinator.data["call_history"]:
-                created_str = call.get("created", "")
-                if created_str:
-                    try:
-                        created = datetime.fromisoformat(created_str.replace("Z", "+00:00"))
-                        if created.date() == today:
-                            total_cost += float(call.get("cost", 0))
-                    except (ValueError, AttributeError):
-                        pass
+        for coordinator, key in ((self.coordinator, "sms_history"), (self._call_coordinator, "call_history")):
+            if coordinator.data and key in coordinator.data:
+                total_cost += sum(record.cost for record in coordinator.data[key].since(start))
 
         return round(total_cost / 10000, 2)
+
+
+class ElksNumbersSensor(ElksSensorEntity):
+    """Sensor for allocated phone numbers."""
+
+    _unrecorded_attributes = frozenset({"numbers"})
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{entry.entry_id}_numbers"
+        self._attr_name = "46elks Numbers"
+        self._attr_icon = "mdi:dialpad"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name="46elks Account",
+            manufacturer="46elks",
+            model="SMS & Voice API",
+            configuration_url="https://dashboard.46elks.com/",
+        )
+
+    def _active(self) -> list:
+        """Return the active numbers."""
+        if self.coordinator.data and "numbers" in self.coordinator.data:
+            return [number for number in self.coordinator.data["numbers"] if number.get("active") == "yes"]
+        return []
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        if self.coordinator.data and "numbers" in self.coordinator.data:
+            return len(self._active())
+        return None
+
+    @property
+    def extra_state_attributes(self):
+        """Return additional attributes."""
+        return {
+            "numbers": {
+                number.get("number"): number.get("capabilities", []) for number in self._active()
+            }
+        }
+
+
+class ElksHedgedReadsSensor(ElksSensorEntity):
+    """Sensor for the share of API reads that were hedged."""
+
+    def __init__(self, coordinator: DataUpdateCoordinator, hedging, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._hedging = hedging
+        self._attr_unique_id = f"{entry.entry_id}_hedged_reads"
+        self._attr_name = "46elks Hedged Reads"
+        self._attr_native_unit_of_measurement = "%"
+        self._attr_icon = "mdi:call-split"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name="46elks Account",
+            manufacturer="46elks",
+            model="SMS & Voice API",
+            configuration_url="https://dashboard.46elks.com/",
+        )
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        rate = self._hedging.metrics()["hedge_rate"]
+        return None if rate is None else round(rate * 100, 1)
+
+    @property
+    def extra_state_attributes(self):
+        """Return additional attributes."""
+        metrics = self._hedging.metrics()
+        del metrics["hedge_rate"]
+        return {"enabled": self._hedging.enabled, **metrics}
+
+
+class ElksAnalyticsSensor(ElksSensorEntity):
+    """Base class for sensors showing traffic analytics."""
+
+    def __init__(self, coordinator: DataUpdateCoordinator, analytics, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._analytics = analytics
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name="46elks Account",
+            manufacturer="46elks",
+            model="SMS & Voice API",
+            configuration_url="https://dashboard.46elks.com/",
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Also update when a send is counted."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._analytics.async_add_listener(self._handle_coordinator_update))
+
+
+class ElksBusiestHourSensor(ElksAnalyticsSensor):
+    """Sensor for the hour of the day most messages are sent."""
+
+    _unrecorded_attributes = frozenset({"sent_per_hour"})
+
+    def __init__(self, coordinator: DataUpdateCoordinator, analytics, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, analytics, entry)
+        self._attr_unique_id = f"{entry.entry_id}_busiest_hour"
+        self._attr_name = "46elks Busiest Hour"
+        self._attr_icon = "mdi:chart-bar"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        histogram = self._analytics.hour_histogram()
+        if not any(histogram):
+            return None
+        return f"{histogram.index(max(histogram)):02d}:00"
+
+    @property
+    def extra_state_attributes(self):
+        """Return additional attributes."""
+        return {"sent_per_hour": self._analytics.hour_histogram()}
+
+
+class ElksTopRecipientsSensor(ElksAnalyticsSensor):
+    """Sensor for the most messaged recipients over the last 30 days."""
+
+    _unrecorded_attributes = frozenset({"recipients"})
+
+    def __init__(self, coordinator: DataUpdateCoordinator, analytics, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, analytics, entry)
+        self._attr_unique_id = f"{entry.entry_id}_top_recipients"
+        self._attr_name = "46elks Top Recipient"
+        self._attr_icon = "mdi:account-star"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        top = self._analytics.top_recipients(1)
+        return top[0]["number"] if top else None
+
+    @property
+    def extra_state_attributes(self):
+        """Return additional attributes."""
+        return {"recipients": self._analytics.top_recipients()}
+
+
+class ElksFailureRateSensor(ElksAnalyticsSensor):
+    """Sensor for the share of messages that failed over the last 30 days."""
+
+    def __init__(self, coordinator: DataUpdateCoordinator, analytics, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, analytics, entry)
+        self._attr_unique_id = f"{entry.entry_id}_failure_rate"
+        self._attr_name = "46elks Failure Rate"
+        self._attr_native_unit_of_measurement = "%"
+        self._attr_icon = "mdi:message-alert"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        rate = self._analytics.overall_failure_rate()
+        return None if rate is None else round(rate * 100, 1)
+
+
+class ElksSubaccountSensor(ElksSensorEntity):
+    """Base class for sensors of one subaccount."""
+
+    def __init__(self, coordinator: SubaccountCoordinator, entry: ConfigEntry, subaccount_id: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._subaccount_id = subaccount_id
+        name = coordinator.data[subaccount_id].name
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{entry.entry_id}_{subaccount_id}")},
+            name=f"46elks {name}",
+            manufacturer="46elks",
+            model="Subaccount",
+            via_device=(DOMAIN, entry.entry_id),
+        )
+
+    @property
+    def subaccount(self):
+        """Return the polled subaccount, if it still exists."""
+        return (self.coordinator.data or {}).get(self._subaccount_id)
+
+    @property
+    def available(self) -> bool:
+        """Return True if the subaccount was present in the last poll."""
+        return super().available and self.subaccount is not None
+
+
+class ElksSubaccountSmsTodaySensor(ElksSubaccountSensor):
+    """Sensor for a subaccount's SMS count today."""
+
+    def __init__(self, coordinator: SubaccountCoordinator, entry: ConfigEntry, subaccount_id: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, subaccount_id)
+        self._attr_unique_id = f"{entry.entry_id}_{subaccount_id}_sms_today"
+        self._attr_name = f"46elks {coordinator.data[subaccount_id].name} SMS Today"
+        self._attr_icon = "mdi:message-badge"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        if self.subaccount:
+            return self.subaccount.sms_since(dt_util.start_of_local_day())
+        return None
+
+
+class ElksSubaccountCostTodaySensor(ElksSubaccountSensor):
+    """Sensor for a subaccount's total cost today."""
+
+    def __init__(self, coordinator: SubaccountCoordinator, entry: ConfigEntry, subaccount_id: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, subaccount_id)
+        self._attr_unique_id = f"{entry.entry_id}_{subaccount_id}_cost_today"
+        self._attr_name = f"46elks {coordinator.data[subaccount_id].name} Cost Today"
+        self._attr_native_unit_of_measurement = "SEK"
+        self._attr_icon = "mdi:cash"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        if self.subaccount:
+            return round(self.subaccount.cost_since(dt_util.start_of_local_day()) / 10000, 2)
+        return None
+
+    @property
+    def extra_state_attributes(self):
+        """Return additional attributes."""
+        if self.subaccount:
+            return {
+                "subaccount_id": self._subaccount_id,
+                "balance_used": round(float(self.subaccount.balance_used or 0) / 10000, 2),
+            }
+        return {}
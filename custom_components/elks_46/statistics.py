@@ -0,0 +1,131 @@
+"""Long-term statistics import for the 46elks integration."""
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STATISTICS_BACKFILL, STATISTICS_SETTLE_TIMEOUT
+from .models import HistoryRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+# key -> (resource, name, unit)
+STATISTICS = {
+    "sms_count": ("sms", "46elks SMS", None),
+    "call_count": ("calls", "46elks calls", None),
+    "mms_count": ("mms", "46elks MMS", None),
+    "cost": (None, "46elks cost", "SEK"),
+}
+RESOURCES = ("sms", "calls", "mms")
+
+
+def aggregate_hourly(records: dict, since: datetime, until: datetime) -> dict:
+    """Sum counts and cost per hour for hours in [since, until).
+
+    records maps each resource to its raw API records. Every hour in the
+    range is present, so the import watermark advances through quiet hours,
+    up to the first hour with a call still in progress. That hour and the
+    ones after it are left for a later import, once the call is priced.
+    """
+    buckets = {}
+    unsettled = None
+    settle_after = until - STATISTICS_SETTLE_TIMEOUT
+    hour = since
+    while hour < until:
+        buckets[hour] = dict.fromkeys(STATISTICS, 0)
+        hour += timedelta(hours=1)
+
+    count_keys = {resource: key for key, (resource, _, _) in STATISTICS.items() if resource}
+    for resource, items in records.items():
+        for item in items:
+            record = HistoryRecord.from_api(item)
+            if record.created is None:
+                continue
+            hour = record.created.replace(minute=0, second=0, microsecond=0)
+            bucket = buckets.get(hour)
+            if bucket is None:
+                continue
+            if not record.settled and hour >= settle_after:
+                unsettled = hour if unsettled is None else min(unsettled, hour)
+            bucket[count_keys[resource]] += 1
+            bucket["cost"] += record.cost
+    if unsettled is None:
+        return buckets
+    return {hour: values for hour, values in buckets.items() if hour < unsettled}
+
+
+class StatisticsImporter:
+    """Import hourly SMS, call and MMS counts and cost as external statistics."""
+
+    def __init__(self, hass: HomeAssistant, api, entry_id: str) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.api = api
+        self._prefix = f"{DOMAIN}:{entry_id.lower()}"
+
+    def statistic_id(self, key: str) -> str:
+        """Return the statistic id for a key."""
+        return f"{self._prefix}_{key}"
+
+    async def _async_last(self, key: str) -> tuple:
+        """Return the start and sum of the last imported hour, if any."""
+        statistic_id = self.statistic_id(key)
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+        )
+        if not last.get(statistic_id):
+            return None, 0.0
+        row = last[statistic_id][0]
+        return dt_util.utc_from_timestamp(row["start"]), row.get("sum") or 0.0
+
+    async def async_import(self) -> None:
+        """Import every completed hour since the last import."""
+        until = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        last = {key: await self._async_last(key) for key in STATISTICS}
+
+        starts = [start for start, _ in last.values() if start is not None]
+        if len(starts) == len(STATISTICS):
+            since = min(starts) + timedelta(hours=1)
+        else:
+            since = until - STATISTICS_BACKFILL
+        if since >= until:
+            return
+
+        records = {}
+        for resource in RESOURCES:
+            items = await self.api.async_get_history_since(self.hass, resource, since)
+            if items is None:
+                # Try again next time rather than import a gap
+                return
+            records[resource] = items
+
+        buckets = aggregate_hourly(records, since, until)
+        for key, (_, name, unit) in STATISTICS.items():
+            start, total = last[key]
+            statistics = []
+            for hour, values in sorted(buckets.items()):
+                if start is not None and hour <= start:
+                    continue
+                value = values[key] / 10000 if key == "cost" else values[key]
+                total += value
+                statistics.append(StatisticData(start=hour, state=value, sum=total))
+            if not statistics:
+                continue
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=name,
+                source=DOMAIN,
+                statistic_id=self.statistic_id(key),
+                unit_of_measurement=unit,
+            )
+            async_add_external_statistics(self.hass, metadata, statistics)
+
+        _LOGGER.debug("Imported statistics from %s to %s", since, until)
@@ -0,0 +1,91 @@
+"""Subaccount polling for the 46elks integration."""
+import asyncio
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import HISTORY_BUFFER_SIZE, HISTORY_FETCH_LIMIT, SUBACCOUNT_CONCURRENCY
+from .models import HistoryBuffer
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Subaccount:
+    """Polled state of one subaccount."""
+
+    __slots__ = ("id", "name", "balance_used", "sms_history", "call_history")
+
+    def __init__(self, subaccount_id: str) -> None:
+        """Initialize the subaccount."""
+        self.id = subaccount_id
+        self.name = subaccount_id
+        self.balance_used = 0
+        self.sms_history = HistoryBuffer(HISTORY_BUFFER_SIZE)
+        self.call_history = HistoryBuffer(HISTORY_BUFFER_SIZE)
+
+    def sms_since(self, start: datetime) -> int:
+        """Return the number of SMS created since start."""
+        return sum(1 for _ in self.sms_history.since(start))
+
+    def cost_since(self, start: datetime) -> int:
+        """Return the SMS and call cost since start in 1/10000 SEK."""
+        return sum(
+            record.cost
+            for history in (self.sms_history, self.call_history)
+            for record in history.since(start)
+        )
+
+
+class SubaccountCoordinator(DataUpdateCoordinator):
+    """Discover and poll every subaccount of the main account in one update."""
+
+    def __init__(self, hass: HomeAssistant, api, update_interval: timedelta) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass, _LOGGER, name="46elks subaccounts", update_interval=update_interval
+        )
+        self.api = api
+        self.history_limit = HISTORY_FETCH_LIMIT
+        self._clients = {}
+        self._subaccounts = {}
+
+    async def _async_update_data(self) -> dict:
+        """Fetch the subaccount list, then each subaccount's history."""
+        listing = await self.api.async_get_subaccounts(self.hass)
+        if listing is None:
+            raise UpdateFailed("Failed to fetch subaccounts")
+
+        # Every client shares the main client's session and connection pool
+        semaphore = asyncio.Semaphore(SUBACCOUNT_CONCURRENCY)
+        polls = []
+        for item in listing:
+            subaccount_id, secret = item.get("id"), item.get("secret")
+            if not subaccount_id or not secret:
+                continue
+            subaccount = self._subaccounts.get(subaccount_id) or Subaccount(subaccount_id)
+            subaccount.name = item.get("name") or subaccount_id
+            subaccount.balance_used = item.get("balanceused", 0)
+            client = self._clients.get(subaccount_id)
+            if client is None or client.password != secret:
+                client = self._clients[subaccount_id] = self.api.for_credentials(subaccount_id, secret)
+            client.timeout = self.api.timeout
+            polls.append(self._async_poll(semaphore, client, subaccount))
+
+        subaccounts = await asyncio.gather(*polls)
+        self._subaccounts = {subaccount.id: subaccount for subaccount in subaccounts}
+        for subaccount_id in set(self._clients) - set(self._subaccounts):
+            del self._clients[subaccount_id]
+        return self._subaccounts
+
+    async def _async_poll(self, semaphore: asyncio.Semaphore, client, subaccount: Subaccount) -> Subaccount:
+        """Fetch the history of one subaccount."""
+        async with semaphore:
+            subaccount.sms_history.merge(
+                await client.async_get_sms_history(self.hass, limit=self.history_limit)
+            )
+            subaccount.call_history.merge(
+                await client.async_get_call_history(self.hass, limit=self.history_limit)
+            )
+        return subaccount
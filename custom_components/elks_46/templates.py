@@ -0,0 +1,78 @@
+"""Message templates for personalized 46elks sends."""
+from functools import lru_cache
+import re
+from string import Formatter
+
+import voluptuous as vol
+from homeassistant.exceptions import HomeAssistantError
+
+_FORMATTER = Formatter()
+# Precision and type only; a width could pad a message to any length
+_FORMAT_SPEC = re.compile(r"(?:\.\d{1,2})?[dfs%]?")
+
+
+class MessageTemplate:
+    """A message with {placeholders}, parsed once and rendered many times.
+
+    Placeholders are plain variable names, so a template cannot reach
+    attributes or items of the values it is given.
+    """
+
+    __slots__ = ("source", "fields", "_parts")
+
+    def __init__(self, source: str) -> None:
+        """Parse the template, raising ValueError if it is malformed."""
+        self.source = source
+        # (literal, field, format_spec) tuples
+        self._parts = []
+        for literal, field, format_spec, conversion in _FORMATTER.parse(source):
+            if field is not None:
+                if not field.isidentifier():
+                    raise ValueError("Template placeholders must be plain names, like {name}")
+                if conversion:
+                    raise ValueError(f"Conversions are not supported in {{{field}}}")
+                if not _FORMAT_SPEC.fullmatch(format_spec or ""):
+                    raise ValueError(f"Unsupported format '{format_spec}' in {{{field}}}")
+            self._parts.append((literal, field, format_spec or ""))
+        self.fields = frozenset(field for _, field, _ in self._parts if field is not None)
+
+    def render(self, variables: dict) -> str:
+        """Render the template with variables."""
+        output = []
+        for literal, field, format_spec in self._parts:
+            output.append(literal)
+            if field is not None:
+                output.append(format(variables[field], format_spec))
+        return "".join(output)
+
+
+@lru_cache(maxsize=128)
+def compile_template(source: str) -> MessageTemplate:
+    """Return the parsed template for source, reusing earlier parses."""
+    return MessageTemplate(source)
+
+
+def valid_template(value: str) -> str:
+    """Validate a message template."""
+    try:
+        compile_template(value)
+    except ValueError as err:
+        raise vol.Invalid(f"Invalid message template: {err}") from err
+    return value
+
+
+def render_messages(
+    source: str, recipients: list, variables: dict, recipient_variables: dict
+) -> dict:
+    """Render the template for every recipient before anything is sent."""
+    template = compile_template(source)
+    messages = {}
+    for recipient in recipients:
+        context = {**variables, **recipient_variables.get(recipient, {}), "recipient": recipient}
+        try:
+            messages[recipient] = template.render(context)
+        except (KeyError, AttributeError, IndexError, TypeError, ValueError) as err:
+            raise HomeAssistantError(
+                f"Could not render template for recipient '{recipient}': {err!r}"
+            ) from err
+    return messages
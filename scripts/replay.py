@@ -0,0 +1,274 @@
+"""Replay captured 46elks API traffic through the integration.
+
+Sets the integration up in a scratch Home Assistant instance whose API client
+talks to a stand-in for 46elks, answering with the responses and latencies of
+a capture file recorded with the capture_traffic option. Recorded sends are
+replayed as calls of the send services and recorded reads as refreshes of the
+coordinators that made them, so the whole path from service call to sensor
+data is measured. Comparing the replayed throughput and latency percentiles
+across releases shows client-side regressions without touching the real API:
+
+    python scripts/replay.py elks_46_capture.jsonl.1 elks_46_capture.jsonl
+"""
+import argparse
+import asyncio
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import json
+from pathlib import Path
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import requests
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+# Run from a checkout, the integration is imported from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.elks_46 import async_setup_entry, async_unload_entry  # noqa: E402
+from custom_components.elks_46.const import (  # noqa: E402
+    API_BASE_URL,
+    API_POOL_SIZE,
+    CONF_API_PASSWORD,
+    CONF_API_USERNAME,
+    DOMAIN,
+    SERVICE_MAKE_CALL,
+    SERVICE_SEND_MMS,
+    SERVICE_SEND_SMS,
+)
+
+PACKAGE = "custom_components.elks_46"
+# Recorded sends are replayed as calls of the service making them
+SERVICES = {"/sms": SERVICE_SEND_SMS, "/mms": SERVICE_SEND_MMS, "/calls": SERVICE_MAKE_CALL}
+# Recorded reads are replayed as refreshes of the coordinator making them
+COORDINATORS = {"/me": "account", "/sms": "sms", "/calls": "calls", "/numbers": "numbers"}
+# Call audio is not captured, public URLs are passed to the API as they are
+REPLAY_AUDIO_URL = "https://example.com/replay.mp3"
+
+
+def load(paths: list) -> list:
+    """Load capture files in order, keeping request start times increasing."""
+    entries = []
+    offset = 0.0
+    last = 0.0
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                # Every capture restarts its clock, so continue from the previous one
+                if entry["t"] + offset < last:
+                    offset = last - entry["t"]
+                entry["t"] += offset
+                last = entry["t"]
+                entries.append(entry)
+    return entries
+
+
+class ReplaySession:
+    """Stand-in for a requests session answering with recorded responses.
+
+    Responses to a method and path are given in recorded order. Once they run
+    out the last one is repeated, as a release may read more than was recorded.
+    """
+
+    def __init__(self, entries: list) -> None:
+        """Initialize the session."""
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._responses = defaultdict(deque)
+        for entry in entries:
+            self._responses[(entry["method"], entry["path"])].append(entry)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Return the next recorded response to method and url after its latency."""
+        path = url.removeprefix(API_BASE_URL)
+        with self._lock:
+            self.requests += 1
+            responses = self._responses.get((method, path))
+            if not responses:
+                raise requests.ConnectionError(f"No recorded response to {method} {path}")
+            entry = responses.popleft() if len(responses) > 1 else responses[0]
+        time.sleep(entry["elapsed"])
+        if entry["status"] is None:
+            raise requests.ConnectionError("Recorded request failed")
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.url = url
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(entry.get("body")).encode()  # pylint: disable=protected-access
+        return response
+
+    def close(self) -> None:
+        """Close the session."""
+
+
+class _ReplayConfigEntries:
+    """The config entry calls the integration makes, without the integration loader."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the stand-in."""
+        self.hass = hass
+
+    async def async_forward_entry_setups(self, entry: ConfigEntry, platforms: list) -> None:
+        """Set up the platforms of entry, discarding their entities."""
+        for platform in platforms:
+            module = importlib.import_module(f"{PACKAGE}.{platform}")
+            await module.async_setup_entry(self.hass, entry, lambda entities, update_before_add=False: None)
+
+    async def async_unload_platforms(self, entry: ConfigEntry, platforms: list) -> bool:
+        """Unload the platforms of entry."""
+        return True
+
+
+class _ReplayHttp:
+    """Stand-in for the HTTP server, nothing calls in during a replay."""
+
+    def register_view(self, view) -> None:
+        """Ignore a view."""
+
+
+def operation(entry: dict) -> tuple | None:
+    """Return the service or coordinator that made a recorded request, or None to skip it."""
+    # Hedged duplicates are made again by the replayed read if hedging is on
+    if entry.get("hedge"):
+        return None
+    if entry["method"] == "POST" and entry["path"] in SERVICES:
+        return "service", SERVICES[entry["path"]]
+    if entry["method"] == "GET" and entry["path"] in COORDINATORS:
+        return "refresh", COORDINATORS[entry["path"]]
+    return None
+
+
+def service_data(service: str, data: dict) -> dict:
+    """Rebuild the service call that made a recorded send."""
+    data = data or {}
+    call = {"from": data.get("from"), "to": data.get("to")}
+    if service == SERVICE_MAKE_CALL:
+        return {**call, "audio_url": REPLAY_AUDIO_URL}
+    if data.get("image"):
+        call["image"] = data["image"]
+    if data.get("message") or not data.get("image"):
+        call["message"] = data.get("message") or "x"
+    if data.get("dryrun") == "yes":
+        call["dry_run"] = True
+    return call
+
+
+def _stats(latencies: list, duration: float) -> dict:
+    """Return throughput and latency percentiles in milliseconds."""
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"requests": 0}
+
+    def percentile(share: float) -> float:
+        return round(ordered[min(int(share * len(ordered)), len(ordered) - 1)] * 1000, 2)
+
+    return {
+        "requests": len(ordered),
+        "duration": round(duration, 3),
+        "throughput": round(len(ordered) / duration, 2) if duration else None,
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+async def async_replay(entries: list, speed: float = 1.0) -> dict:
+    """Replay entries through the integration, returning recorded and replayed statistics.
+
+    Recorded requests are timed on their own, replayed ones as the service
+    call or refresh that makes them. They start at their recorded offsets
+    divided by speed; a speed of 0 starts them all at once.
+    """
+    operations = [(entry, found) for entry in entries if (found := operation(entry))]
+    if not operations:
+        return {"recorded": _stats([], 0), "replayed": _stats([], 0), "api_requests": 0, "errors": 0}
+
+    session = ReplaySession(entries)
+    latencies = []
+    errors = 0
+
+    with tempfile.TemporaryDirectory() as config_dir, patch(
+        f"{PACKAGE}._create_session", return_value=session
+    ):
+        hass = HomeAssistant(config_dir)
+        hass.config_entries = _ReplayConfigEntries(hass)
+        hass.http = _ReplayHttp()
+        entry = ConfigEntry(
+            version=1,
+            minor_version=1,
+            domain=DOMAIN,
+            title="46elks replay",
+            data={CONF_API_USERNAME: "replay", CONF_API_PASSWORD: "replay", CONF_WEBHOOK_ID: "replay"},
+            source="user",
+            options={},
+        )
+        await async_setup_entry(hass, entry)
+        coordinators = hass.data[DOMAIN][entry.entry_id]["coordinators"]
+        setup_requests = session.requests
+
+        async def replay_one(entry: dict, kind: str, target: str, start: float) -> None:
+            nonlocal errors
+            if speed:
+                await asyncio.sleep(max(start + (entry["t"] - first) / speed - time.perf_counter(), 0))
+            began = time.perf_counter()
+            if kind == "service":
+                try:
+                    await hass.services.async_call(
+                        DOMAIN, target, service_data(target, entry.get("data")), blocking=True
+                    )
+                except (HomeAssistantError, vol.Invalid):
+                    errors += 1
+            else:
+                await coordinators[target].async_refresh()
+                errors += not coordinators[target].last_update_success
+            latencies.append(time.perf_counter() - began)
+
+        first = operations[0][0]["t"]
+        start = time.perf_counter()
+        await asyncio.gather(*(replay_one(entry, *found, start) for entry, found in operations))
+        duration = time.perf_counter() - start
+
+        await async_unload_entry(hass, entry)
+        await entry._async_process_on_unload(hass)  # pylint: disable=protected-access
+        await hass.async_block_till_done()
+
+    recorded_duration = max(entry["t"] + entry["elapsed"] for entry in entries) - entries[0]["t"]
+    return {
+        "recorded": _stats([entry["elapsed"] for entry in entries], recorded_duration),
+        "replayed": _stats(latencies, duration),
+        "api_requests": session.requests - setup_requests,
+        "errors": errors,
+    }
+
+
+def main(argv: list = None) -> None:
+    """Replay capture files given on the command line and print the statistics."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="capture files, oldest first")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="compress the gaps between requests by this factor, 0 for no gaps"
+    )
+    parser.add_argument("--workers", type=int, default=API_POOL_SIZE, help="executor threads")
+    args = parser.parse_args(argv)
+
+    with asyncio.Runner() as runner:
+        # The executor sends requests, so size it like the API connection pool
+        runner.get_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.workers))
+        result = runner.run(async_replay(load(args.paths), args.speed))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
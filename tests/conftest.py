@@ -5,6 +5,19 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from homeassistant.core import HomeAssistant
 
 
+@pytest.fixture(autouse=True)
+def mock_storage():
+    """Keep Home Assistant storage in memory."""
+    with patch(
+        "homeassistant.helpers.storage.Store.async_load", AsyncMock(return_value=None)
+    ), patch(
+        "homeassistant.helpers.storage.Store.async_save", AsyncMock()
+    ) as save, patch(
+        "homeassistant.helpers.storage.Store.async_delay_save", MagicMock()
+    ):
+        yield save
+
+
 @pytest.fixture
 def mock_elks_api():
     """Mock ElksApi client."""
@@ -69,6 +82,7 @@ def mock_elks_api():
         # Mock send methods
         api.async_send_sms = AsyncMock(return_value={"id": "s124", "status": "created"})
         api.async_make_call = AsyncMock(return_value={"id": "c124", "status": "ongoing"})
+        api.async_hangup_call = AsyncMock(return_value={"id": "c124", "state": "success"})
         api.async_send_mms = AsyncMock(return_value={"id": "m123", "status": "created"})
 
         mock.return_value = api
@@ -80,12 +94,16 @@ def mock_hass():
     """Mock HomeAssistant instance."""
     hass = MagicMock(spec=HomeAssistant)
     hass.data = {}
-    hass.async_add_executor_job = AsyncMock(side_effect=lambda func: func())
+    hass.async_add_executor_job = AsyncMock(side_effect=lambda func, *args: func(*args))
 
     # Mock config_entries
     hass.config_entries = MagicMock()
     hass.config_entries.async_forward_entry_setups = AsyncMock(return_value=True)
 
+    # Mock event loop and bus used by timers and events
+    hass.loop = MagicMock()
+    hass.bus = MagicMock()
+
     # Mock services
     hass.services = MagicMock()
     hass.services.async_register = MagicMock()
@@ -0,0 +1,92 @@
+"""Test traffic analytics for 46elks integration."""
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.elks_46.analytics import CountMinSketch, SpaceSaving, TrafficAnalytics
+
+
+def _sms(message_id: str, to: str, status: str = "delivered", hours_ago: int = 0) -> dict:
+    """Return an outgoing SMS history record."""
+    created = dt_util.utcnow() - timedelta(hours=hours_ago)
+    return {
+        "id": message_id,
+        "to": to,
+        "direction": "outgoing",
+        "status": status,
+        "created": created.isoformat(),
+    }
+
+
+class TestSketches:
+    """Test the streaming sketches."""
+
+    def test_count_min_never_undercounts(self):
+        """Test estimates are at least the true count."""
+        sketch = CountMinSketch(width=16, depth=3)
+        for index in range(200):
+            sketch.add(f"+4670{index:07d}")
+        sketch.add("+46701234567", 5)
+
+        assert sketch.estimate("+46701234567") >= 5
+        assert len(sketch.table) == 48
+
+    def test_count_min_round_trip(self):
+        """Test a sketch survives storage."""
+        sketch = CountMinSketch()
+        sketch.add("+46701234567", 3)
+        assert CountMinSketch.from_dict(sketch.as_dict()).estimate("+46701234567") == 3
+
+    def test_space_saving_keeps_heavy_hitters(self):
+        """Test frequent keys survive a stream of rare keys."""
+        summary = SpaceSaving(capacity=5)
+        for index in range(1000):
+            summary.add("+46701234567")
+            summary.add(f"+4670{index:07d}")
+
+        assert len(summary.counts) == 5
+        assert summary.top(1) == ["+46701234567"]
+
+
+class TestTrafficAnalytics:
+    """Test the analytics fed by history and sends."""
+
+    def test_history_and_sends_are_counted_once(self):
+        """Test a send seen again in history is not counted twice."""
+        analytics = TrafficAnalytics(MagicMock(), "test_entry")
+        analytics.async_record_send("+46701234567", "s1")
+        analytics.async_observe([
+            _sms("s1", "+46701234567"),
+            _sms("s2", "+46701234567", status="failed"),
+            _sms("s3", "+46709876543"),
+            {"id": "s4", "to": "+46700000000", "direction": "incoming"},
+        ])
+        analytics.async_observe([_sms("s2", "+46701234567", status="failed")])
+
+        assert sum(analytics.hour_histogram()) == 3
+        assert analytics.top_recipients() == [
+            {"number": "+46701234567", "sent": 2, "failure_rate": 0.5},
+            {"number": "+46709876543", "sent": 1, "failure_rate": 0.0},
+        ]
+        assert analytics.overall_failure_rate() == 0.333
+
+    def test_window(self):
+        """Test messages older than 30 days are ignored."""
+        analytics = TrafficAnalytics(MagicMock(), "test_entry")
+        analytics.async_observe([_sms("s1", "+46701234567", hours_ago=31 * 24)])
+
+        assert analytics.top_recipients() == []
+        assert analytics.overall_failure_rate() is None
+
+    def test_memory_is_bounded(self):
+        """Test memory stays flat however many recipients are messaged."""
+        analytics = TrafficAnalytics(MagicMock(), "test_entry")
+        for index in range(10000):
+            analytics.async_record_send(f"+4670{index:07d}", f"s{index}")
+
+        day = next(iter(analytics._days.values()))
+        assert len(analytics._days) == 1
+        assert len(day.sent.table) == 256 * 3
+        assert len(analytics._top.counts) == 100
+        assert len(analytics._sent_ids) == 5000
@@ -0,0 +1,132 @@
+"""Test locally hosted call audio for 46elks integration."""
+import json
+import os
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.elks_46.audio import CACHE_CONTROL, AudioAssets, ElksAudioView, _sha256
+
+BASE_URL = "https://ha.example.com"
+
+
+@pytest.fixture
+def assets(mock_hass, tmp_path):
+    """Return audio assets with the config directory in tmp_path."""
+    mock_hass.config = MagicMock()
+    mock_hass.config.path = lambda *parts: os.path.join(str(tmp_path), *parts)
+    mock_hass.config.media_dirs = {"local": str(tmp_path / "media")}
+    mock_hass.config.is_allowed_path = lambda path: path.startswith(str(tmp_path))
+    with patch("custom_components.elks_46.audio.get_url", return_value=BASE_URL):
+        yield AudioAssets(mock_hass)
+
+
+class TestAudioAssets:
+    """Test preparing call audio."""
+
+    @pytest.mark.asyncio
+    async def test_public_url_passes_through(self, assets):
+        """Test public URLs are given to 46elks as they are."""
+        assert await assets.async_url("https://example.com/a.mp3") == "https://example.com/a.mp3"
+
+    @pytest.mark.asyncio
+    async def test_local_file_is_hashed_once(self, assets, tmp_path):
+        """Test a local file is served under its content hash and prepared once."""
+        (tmp_path / "media").mkdir()
+        (tmp_path / "media" / "alarm.mp3").write_bytes(b"ID3 audio")
+
+        with patch("custom_components.elks_46.audio._sha256", wraps=_sha256) as sha256:
+            url = await assets.async_url("media-source://media_source/local/alarm.mp3")
+            assert await assets.async_url("media/alarm.mp3") == url
+        assert sha256.call_count == 1
+
+        filename = url.rsplit("/", 1)[1]
+        assert url.startswith(f"{BASE_URL}/api/elks_46/audio/")
+        assert filename.endswith(".mp3") and len(filename) == 68
+        assert (tmp_path / "elks_46" / "audio" / filename).read_bytes() == b"ID3 audio"
+
+    @pytest.mark.asyncio
+    async def test_transcoded_once(self, assets, tmp_path):
+        """Test transcoding runs once and its result is reused."""
+        (tmp_path / "alarm.flac").write_bytes(b"fLaC audio")
+
+        def ffmpeg(args, **kwargs):
+            with open(args[-1], "wb") as file:
+                file.write(b"RIFF audio")
+
+        with patch("custom_components.elks_46.audio.subprocess.run", side_effect=ffmpeg) as run:
+            first = await assets.async_url("alarm.flac")
+            assets._assets.clear()
+            assert await assets.async_url("alarm.flac") == first
+        assert run.call_count == 1
+        assert first.endswith(".wav")
+
+    @pytest.mark.asyncio
+    async def test_media_source_served_externally(self, assets, tmp_path):
+        """Test text-to-speech audio is fetched once and served on the external URL."""
+        media = MagicMock(url="/api/tts_proxy/abc.mp3", mime_type="audio/mpeg")
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [b"ID3 ", b"speech"]
+
+        with patch(
+            "homeassistant.components.media_source.async_resolve_media", AsyncMock(return_value=media)
+        ), patch(
+            "homeassistant.components.media_player.browse_media.async_process_play_media_url",
+            return_value="http://homeassistant.local:8123/api/tts_proxy/abc.mp3?authSig=x",
+        ), patch("custom_components.elks_46.audio.requests.get", return_value=response) as get:
+            url = await assets.async_url("media-source://tts/cloud?message=Hello")
+            assert await assets.async_url("media-source://tts/cloud?message=Hello") == url
+        assert get.call_count == 1
+
+        filename = url.rsplit("/", 1)[1]
+        assert url.startswith(f"{BASE_URL}/api/elks_46/audio/")
+        assert filename.endswith(".mp3")
+        assert os.listdir(tmp_path / "elks_46" / "audio") == [filename]
+        assert (tmp_path / "elks_46" / "audio" / filename).read_bytes() == b"ID3 speech"
+
+    @pytest.mark.asyncio
+    async def test_disallowed_path(self, assets):
+        """Test files outside the allowed directories are refused."""
+        with pytest.raises(HomeAssistantError, match="allowlist_external_dirs"):
+            await assets.async_url("/etc/passwd")
+
+
+@pytest.mark.asyncio
+async def test_view_serves_cacheable_audio(assets, tmp_path):
+    """Test the view serves prepared audio with long-lived caching."""
+    (tmp_path / "alarm.mp3").write_bytes(b"ID3 audio")
+    filename = (await assets.async_url("alarm.mp3")).rsplit("/", 1)[1]
+    view = ElksAudioView(assets.hass)
+
+    response = await view.get(MagicMock(), filename)
+    assert response.headers["Cache-Control"] == CACHE_CONTROL
+    assert response.headers["Content-Type"] == "audio/mpeg"
+
+    assert (await view.get(MagicMock(), "../secrets.yaml")).status == 404
+
+
+@pytest.mark.asyncio
+async def test_make_call_with_local_audio(mock_hass, mock_elks_api):
+    """Test make_call plays a hosted copy of local audio."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {"api_username": "test_user", "api_password": "test_pass", "default_sender": "ELKS46"}
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+    audio = mock_hass.data["elks_46"]["test_entry"]["audio"]
+    audio.async_url = AsyncMock(return_value=f"{BASE_URL}/api/elks_46/audio/abc.mp3")
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"from": "+46766865802", "to": "0701234567", "audio_url": "alarm.mp3", "transcode": True}
+    await mock_hass.services.async_register.call_args_list[1][0][2](call)
+
+    audio.async_url.assert_called_once_with("alarm.mp3", True)
+    voice_start = mock_elks_api.async_make_call.call_args[0][3]
+    assert json.loads(voice_start) == {"play": f"{BASE_URL}/api/elks_46/audio/abc.mp3"}
@@ -0,0 +1,134 @@
+"""Test traffic capture and replay for 46elks integration."""
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from custom_components.elks_46 import ElksApi
+from custom_components.elks_46.capture import REDACTED, TrafficCapture, redact
+from scripts.replay import REPLAY_AUDIO_URL, async_replay, load, operation, service_data
+
+
+def _response(body, status=200):
+    """Return a mock API response."""
+    response = MagicMock()
+    response.status_code = status
+    response.content = json.dumps(body).encode()
+    response.json.return_value = body
+    return response
+
+
+class TestTrafficCapture:
+    """Test recording API traffic."""
+
+    def test_redact(self):
+        """Test credentials and callback URLs are redacted at any depth."""
+        value = {
+            "data": [{"id": "a1", "secret": "s3cret", "password": "pw"}],
+            "whendelivered": "https://example.com/api/webhook/abc",
+            "message": "Hello",
+        }
+
+        assert redact(value) == {
+            "data": [{"id": "a1", "secret": REDACTED, "password": REDACTED}],
+            "whendelivered": REDACTED,
+            "message": "Hello",
+        }
+
+    def test_file_is_bounded(self, tmp_path):
+        """Test the capture rotates to a single backup when full."""
+        path = str(tmp_path / "capture.jsonl")
+        capture = TrafficCapture(path, max_bytes=500)
+        for index in range(20):
+            capture.record("GET", "/sms", {"params": {"limit": index}}, _response({"data": []}), 0.01)
+        capture.close()
+
+        assert (tmp_path / "capture.jsonl").stat().st_size <= 500
+        assert (tmp_path / "capture.jsonl.1").stat().st_size <= 500
+        assert not (tmp_path / "capture.jsonl.2").exists()
+
+    def test_personal_data_is_masked(self, tmp_path):
+        """Test numbers are replaced consistently and messages and emails are masked."""
+        capture = TrafficCapture(str(tmp_path / "capture.jsonl"))
+        body = {
+            "email": "me@example.com",
+            "data": [{"from": "+46701234567", "to": "ELKS46", "message": "Code 1234, ok?"}],
+        }
+
+        masked = capture._redact(body)
+        assert masked["email"] == REDACTED
+        assert masked["data"][0]["message"] == "xxxx xxxx, xx?"
+        assert masked["data"][0]["to"] == "ELKS46"
+        number = masked["data"][0]["from"]
+        assert number != "+46701234567"
+        assert number.startswith("+46") and len(number) == 12
+        assert capture._redact({"to": "+46701234567"}) == {"to": number}
+
+        assert TrafficCapture(str(tmp_path / "full.jsonl"), include_personal=True)._redact(body) == body
+
+    def test_hedged_duplicate_is_marked(self, tmp_path):
+        """Test a hedged duplicate read is marked and not replayed as a read of its own."""
+        path = str(tmp_path / "capture.jsonl")
+        capture = TrafficCapture(path)
+        capture.record("GET", "/me", {}, _response({"balance": 1}), 0.01)
+        capture.record("GET", "/me", {}, _response({"balance": 1}), 0.01, hedge=True)
+        capture.close()
+
+        entries = load([path])
+        assert "hedge" not in entries[0]
+        assert entries[1]["hedge"] is True
+        assert [operation(entry) for entry in entries] == [("refresh", "account"), None]
+
+    @pytest.mark.asyncio
+    async def test_requests_are_captured(self, mock_hass, tmp_path):
+        """Test API requests are recorded with timings and without credentials."""
+        path = str(tmp_path / "capture.jsonl")
+        api = ElksApi("user", "pass", session=MagicMock())
+        api.session.request.return_value = _response({"id": "s1", "status": "created"})
+        api.capture = TrafficCapture(path)
+
+        await api.async_send_sms(mock_hass, "ELKS46", "+46701234567", "Hi", whendelivered="https://x/hook")
+        api.capture.close()
+
+        with open(path, encoding="utf-8") as file:
+            entry = json.loads(file.readline())
+        assert entry["method"] == "POST"
+        assert entry["path"] == "/sms"
+        assert entry["data"]["whendelivered"] == REDACTED
+        assert entry["status"] == 200
+        assert entry["body"] == {"id": "s1", "status": "created"}
+        assert entry["elapsed"] >= 0
+        assert "pass" not in json.dumps(entry)
+
+
+@pytest.mark.asyncio
+async def test_replay(tmp_path):
+    """Test a capture replays through the service handlers and coordinators."""
+    path = tmp_path / "capture.jsonl"
+    sms = {"from": "ELKS46", "to": "+46701234567", "message": "xx"}
+    lines = [
+        {"t": 0.0, "method": "GET", "path": "/me", "params": None, "data": None, "elapsed": 0.02, "status": 200, "body": {"balance": 1974000}},
+        {"t": 0.01, "method": "GET", "path": "/sms", "params": {"limit": 10}, "data": None, "elapsed": 0.01, "status": 200, "body": {"data": []}},
+        {"t": 0.02, "method": "POST", "path": "/sms", "params": None, "data": sms, "elapsed": 0.03, "status": 200, "body": {"id": "s1", "cost": 5200}},
+        {"t": 0.03, "method": "POST", "path": "/sms", "params": None, "data": sms, "elapsed": 0.01, "status": None},
+        {"t": 0.04, "method": "POST", "path": "/numbers/n1", "params": None, "data": {}, "elapsed": 0.01, "status": 200, "body": {}},
+    ]
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+    result = await async_replay(load([str(path)]), speed=0)
+
+    assert result["errors"] == 1
+    assert result["recorded"]["requests"] == 5
+    # The number update is not made by a service or coordinator
+    assert result["replayed"]["requests"] == 4
+    assert result["replayed"]["max_ms"] >= 20
+
+
+def test_service_data():
+    """Test recorded sends are turned back into service calls."""
+    assert service_data("send_sms", {"from": "ELKS46", "to": "+46701234567", "message": "xx", "dryrun": "yes"}) == {
+        "from": "ELKS46",
+        "to": "+46701234567",
+        "message": "xx",
+        "dry_run": True,
+    }
+    assert service_data("make_call", {"from": "+46766865802", "to": "+46701234567"})["audio_url"] == REPLAY_AUDIO_URL
@@ -0,0 +1,117 @@
+"""Test contact groups for 46elks integration."""
+import pytest
+from unittest.mock import MagicMock
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.elks_46.contacts import ContactGroups, parse_members
+
+
+class TestParseMembers:
+    """Test member list parsing."""
+
+    def test_parse_members(self):
+        """Test splitting a member list."""
+        assert parse_members("+46701111111, +46702222222\n+46703333333") == [
+            "+46701111111",
+            "+46702222222",
+            "+46703333333",
+        ]
+
+
+class TestContactGroups:
+    """Test contact group expansion."""
+
+    @pytest.mark.asyncio
+    async def test_expand_groups_deduplicates(self, mock_storage):
+        """Test expanding overlapping groups and numbers."""
+        contacts = ContactGroups(MagicMock(), "test_entry")
+        await contacts.async_load()
+        await contacts.async_set_group("Oncall", ["+46701111111", "+46702222222"])
+        await contacts.async_set_group("Managers", ["+46702222222", "+46703333333"])
+
+        assert contacts.expand(["oncall", "managers", "+46701111111"]) == [
+            "+46701111111",
+            "+46702222222",
+            "+46703333333",
+        ]
+        mock_storage.assert_called()
+
+    @pytest.mark.asyncio
+    async def test_members_are_normalized(self):
+        """Test members are stored in E.164, national numbers read in the given country."""
+        contacts = ContactGroups(MagicMock(), "test_entry")
+        await contacts.async_load()
+        await contacts.async_set_group("Oncall", ["+46 70-123 45 67", "0046702222222", "0703333333"])
+        await contacts.async_set_group("Kontor", ["040-123 45 67"], "NO")
+
+        assert contacts.groups == {
+            "Oncall": ["+46701234567", "+46702222222", "+46703333333"],
+            "Kontor": ["+470401234567"],
+        }
+
+        with pytest.raises(ValueError, match="'070'"):
+            await contacts.async_set_group("Broken", ["070", "+46701234567"])
+
+    @pytest.mark.asyncio
+    async def test_names_differing_in_case_are_one_group(self):
+        """Test saving a name in another case replaces the group."""
+        contacts = ContactGroups(MagicMock(), "test_entry")
+        await contacts.async_load()
+        await contacts.async_set_group("Oncall", ["+46701111111"])
+        await contacts.async_set_group("ONCALL", ["+46702222222"])
+
+        assert contacts.groups == {"ONCALL": ["+46702222222"]}
+        assert contacts.expand("oncall") == ["+46702222222"]
+
+    @pytest.mark.asyncio
+    async def test_group_named_like_a_number(self):
+        """Test groups are matched before targets are read as numbers."""
+        contacts = ContactGroups(MagicMock(), "test_entry")
+        await contacts.async_load()
+        await contacts.async_set_group("1st floor", ["+46701111111"])
+
+        assert contacts.expand(["1st Floor", "0702222222"]) == ["+46701111111", "0702222222"]
+
+    @pytest.mark.asyncio
+    async def test_expand_single_number(self):
+        """Test a plain number passes through."""
+        contacts = ContactGroups(MagicMock(), "test_entry")
+        await contacts.async_load()
+
+        assert contacts.expand("+46701234567") == ["+46701234567"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_group(self):
+        """Test expanding an unknown group."""
+        contacts = ContactGroups(MagicMock(), "test_entry")
+        await contacts.async_load()
+
+        with pytest.raises(HomeAssistantError, match="Unknown contact group"):
+            contacts.expand(["night-shift"])
+
+    @pytest.mark.asyncio
+    async def test_remove_group(self):
+        """Test removing a group rebuilds the index."""
+        contacts = ContactGroups(MagicMock(), "test_entry")
+        await contacts.async_load()
+        await contacts.async_set_group("Oncall", ["+46701111111"])
+        await contacts.async_remove_group("oncall")
+
+        with pytest.raises(HomeAssistantError):
+            contacts.expand(["Oncall"])
+
+
+@pytest.mark.asyncio
+async def test_options_abort_when_not_loaded(mock_hass):
+    """Test managing contact groups aborts while the entry is not loaded."""
+    from custom_components.elks_46.config_flow import ElksOptionsFlow
+
+    mock_hass.data = {}
+    flow = ElksOptionsFlow(MagicMock(entry_id="test_entry", options={}))
+    flow.hass = mock_hass
+    flow.flow_id = "test_flow"
+    flow.handler = "test_entry"
+
+    assert (await flow.async_step_contact_group())["reason"] == "not_loaded"
+    assert (await flow.async_step_remove_contact_group())["reason"] == "not_loaded"
@@ -0,0 +1,94 @@
+"""Test delivery confirmation for 46elks integration."""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.elks_46.delivery import DeliveryTracker
+
+
+def _tracker(mock_hass) -> DeliveryTracker:
+    """Return a delivery tracker running on the test loop."""
+    mock_hass.loop = asyncio.get_running_loop()
+    return DeliveryTracker(mock_hass)
+
+
+class TestDeliveryTracker:
+    """Test waiting for delivery reports."""
+
+    @pytest.mark.asyncio
+    async def test_report_resolves_wait(self, mock_hass):
+        """Test a delivery report resolves the waiting send."""
+        tracker = _tracker(mock_hass)
+        asyncio.get_running_loop().call_soon(tracker.async_report, "s1", "delivered")
+
+        deliveries = await tracker.async_wait({"s1": time.monotonic()}, 5)
+
+        assert deliveries["s1"]["status"] == "delivered"
+        assert deliveries["s1"]["latency"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_early_report(self, mock_hass):
+        """Test a report arriving before the send response is not lost."""
+        tracker = _tracker(mock_hass)
+        tracker.async_report("s1", "failed")
+
+        deliveries = await tracker.async_wait({"s1": time.monotonic()}, 5)
+
+        assert deliveries["s1"]["status"] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, mock_hass):
+        """Test messages without a report time out and are no longer pending."""
+        tracker = _tracker(mock_hass)
+        deliveries = await tracker.async_wait({"s1": time.monotonic()}, 0.01)
+
+        assert deliveries == {"s1": {"status": "timeout", "latency": None}}
+        assert not tracker._pending
+
+    @pytest.mark.asyncio
+    async def test_pending_table_is_bounded(self, mock_hass):
+        """Test the oldest pending delivery is dropped when the table is full."""
+        tracker = _tracker(mock_hass)
+        with patch("custom_components.elks_46.delivery.DELIVERY_PENDING_LIMIT", 2):
+            first = tracker.async_expect("s1", time.monotonic(), 60)
+            tracker.async_expect("s2", time.monotonic(), 60)
+            tracker.async_expect("s3", time.monotonic(), 60)
+
+        assert first.cancelled()
+        assert list(tracker._pending) == ["s2", "s3"]
+
+
+@pytest.mark.asyncio
+async def test_send_sms_waits_for_delivery(mock_hass, mock_elks_api):
+    """Test send_sms returns the delivery status when asked to wait."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {"api_username": "test_user", "api_password": "test_pass", "default_sender": "ELKS46"}
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+    mock_hass.loop = asyncio.get_running_loop()
+    tracker = mock_hass.data["elks_46"]["test_entry"]["deliveries"]
+
+    async def send_sms(hass, from_number, to_number, message, **kwargs):
+        asyncio.get_running_loop().call_soon(tracker.async_report, "s124", "delivered")
+        return {"id": "s124", "status": "created", "cost": 3500}
+
+    mock_elks_api.async_send_sms = AsyncMock(side_effect=send_sms)
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"to": "+46701234567", "message": "Test", "wait_for_delivery": True, "delivery_timeout": 5}
+    service_handler = mock_hass.services.async_register.call_args_list[0][0][2]
+    with patch(
+        "homeassistant.components.webhook.async_generate_url",
+        return_value="https://example.com/api/webhook/abc",
+    ):
+        response = await service_handler(call)
+
+    assert "whendelivered" in mock_elks_api.async_send_sms.call_args[1]
+    assert response["messages"][0]["delivery_status"] == "delivered"
@@ -0,0 +1,180 @@
+"""Test call escalation for 46elks integration."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.elks_46.escalation import CallEscalation, EscalationManager
+
+
+class TestCallEscalation:
+    """Test escalation leg tracking."""
+
+    def test_first_answer_wins(self):
+        """Test that only the first answered leg wins."""
+        escalation = CallEscalation("abc", "https://example.com/alarm.mp3")
+        escalation.async_dialed("+46701111111")
+        escalation.async_dialed("+46702222222")
+
+        assert escalation.async_answer("+46702222222") is True
+        assert escalation.async_answer("+46701111111") is False
+        assert escalation.answered_by == "+46702222222"
+        assert escalation.answer_time is not None
+
+    def test_all_legs_hung_up(self):
+        """Test escalation without an answer."""
+        escalation = CallEscalation("abc", "https://example.com/alarm.mp3")
+        escalation.async_dialed("+46701111111")
+        escalation.async_hangup("+46701111111")
+
+        response = escalation.as_response()
+        assert response["answered"] is False
+        assert response["dialed"] == ["+46701111111"]
+
+    def test_ringing_call_ids(self):
+        """Test the legs left ringing after an answer are known by call id."""
+        escalation = CallEscalation("abc", "https://example.com/alarm.mp3")
+        escalation.async_dialed("+46701111111", "c1")
+        escalation.async_dialed("+46702222222", "c2")
+        escalation.async_answer("+46701111111")
+
+        assert escalation.ringing_call_ids() == ["c2"]
+
+    @pytest.mark.asyncio
+    async def test_wait_returns_when_answered(self):
+        """Test waiting resolves as soon as a leg answers."""
+        escalation = CallEscalation("abc", "https://example.com/alarm.mp3")
+        escalation.async_dialed("+46701111111")
+        escalation.async_answer("+46701111111")
+
+        assert await escalation.async_wait(5) is True
+
+
+@pytest.mark.asyncio
+async def test_answer_hangs_up_other_legs(mock_hass):
+    """Test the first answer ends the legs that are still ringing."""
+    api = MagicMock()
+    api.async_hangup_call = AsyncMock()
+    manager = EscalationManager(mock_hass, api)
+    mock_hass.async_create_task = MagicMock(side_effect=lambda coro: coro)
+    escalation = manager.async_start("https://example.com/alarm.mp3")
+    escalation.async_dialed("+46701111111", "c1")
+    escalation.async_dialed("+46702222222", "c2")
+
+    request = MagicMock()
+    request.post = AsyncMock(return_value={"to": "+46701111111"})
+    request.query = {"escalation": escalation.escalation_id, "event": "answer"}
+    await manager._async_handle_webhook(mock_hass, manager.webhook_id, request)
+
+    await mock_hass.async_create_task.call_args[0][0]
+    api.async_hangup_call.assert_called_once_with(mock_hass, "c2")
+
+
+@pytest.mark.asyncio
+async def test_escalate_call_stops_after_answer(mock_hass, mock_elks_api):
+    """Test that later waves are not dialed once someone answers."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {
+        "api_username": "test_user",
+        "api_password": "test_pass",
+        "default_sender": "ELKS46",
+    }
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api), patch(
+        "custom_components.elks_46.EscalationManager.callback_url", return_value="https://hook"
+    ):
+        await async_setup_entry(mock_hass, entry)
+        escalations = mock_hass.data["elks_46"]["test_entry"]["escalations"]
+
+        async def answer(hass, from_number, to_number, voice_start, **kwargs):
+            # The first leg answers right away
+            escalation = next(iter(escalations._escalations.values()))
+            escalation.async_answer(to_number)
+            return {"id": "c1"}
+
+        mock_elks_api.async_make_call = AsyncMock(side_effect=answer)
+
+        call = MagicMock(spec=ServiceCall)
+        call.data = {
+            "from": "+46766865802",
+            "to": ["+46701111111", "+46702222222"],
+            "audio_url": "https://example.com/alarm.mp3",
+            "wave_size": 1,
+            "wave_delay": 30,
+            "timeout": 120,
+        }
+
+        service_handler = mock_hass.services.async_register.call_args_list[2][0][2]
+        response = await service_handler(call)
+
+    assert response["answered_by"] == "+46701111111"
+    assert mock_elks_api.async_make_call.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_leg_dialed_after_answer_is_hung_up(mock_hass, mock_elks_api):
+    """Test a leg of the same wave that was dialed while another answered is ended."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {"api_username": "test_user", "api_password": "test_pass", "default_sender": "ELKS46"}
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api), patch(
+        "custom_components.elks_46.EscalationManager.callback_url", return_value="https://hook"
+    ):
+        await async_setup_entry(mock_hass, entry)
+        escalations = mock_hass.data["elks_46"]["test_entry"]["escalations"]
+
+        async def make_call(hass, from_number, to_number, voice_start, **kwargs):
+            if to_number == "+46702222222":
+                # The first leg answers while the second is being dialed
+                next(iter(escalations._escalations.values())).async_answer("+46701111111")
+                return {"id": "c2"}
+            return {"id": "c1"}
+
+        mock_elks_api.async_make_call = AsyncMock(side_effect=make_call)
+
+        call = MagicMock(spec=ServiceCall)
+        call.data = {
+            "from": "+46766865802",
+            "to": ["+46701111111", "+46702222222"],
+            "audio_url": "https://example.com/alarm.mp3",
+            "wave_size": 0,
+            "wave_delay": 30,
+            "timeout": 120,
+        }
+        response = await mock_hass.services.async_register.call_args_list[2][0][2](call)
+
+    assert response["answered_by"] == "+46701111111"
+    mock_elks_api.async_hangup_call.assert_called_once_with(mock_hass, "c2")
+
+
+@pytest.mark.asyncio
+async def test_escalate_call_needs_recipients(mock_hass, mock_elks_api):
+    """Test an escalation to an empty group is refused."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {"api_username": "test_user", "api_password": "test_pass", "default_sender": "ELKS46"}
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+    mock_hass.data["elks_46"]["test_entry"]["contacts"].expand = MagicMock(return_value=[])
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"from": "+46766865802", "to": ["empty"], "audio_url": "https://example.com/a.mp3",
+                 "wave_size": 0, "wave_delay": 30, "timeout": 120}
+    with pytest.raises(HomeAssistantError, match="no recipients"):
+        await mock_hass.services.async_register.call_args_list[2][0][2](call)
+    mock_elks_api.async_make_call.assert_not_called()
@@ -0,0 +1,104 @@
+"""Test hedged reads for 46elks integration."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from custom_components.elks_46 import ElksApi
+from custom_components.elks_46.hedging import HedgePolicy
+
+
+def _policy(latency: float = 0.01) -> HedgePolicy:
+    """Return an enabled policy that has seen enough fast reads of /me."""
+    policy = HedgePolicy()
+    policy.enabled = True
+    for _ in range(20):
+        policy.observe("/me", latency)
+    return policy
+
+
+def _attempts(*results):
+    """Return a request starter whose attempts finish after the given delays."""
+    results = list(results)
+
+    async def start_request(hedge):
+        delay, value = results.pop(0)
+        await asyncio.sleep(delay)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    return start_request
+
+
+class TestHedgePolicy:
+    """Test when reads are hedged."""
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_samples(self):
+        """Test reads are not hedged before their latency is known."""
+        policy = HedgePolicy()
+        policy.enabled = True
+
+        assert await policy.async_request("/me", _attempts((0.1, "first"))) == "first"
+        assert policy.delay("/me") is None
+        assert policy.hedged == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_read_is_hedged(self):
+        """Test a read slower than the p95 is hedged and the first response wins."""
+        policy = _policy()
+
+        result = await policy.async_request("/me", _attempts((1, "first"), (0, "second")))
+
+        assert result == "second"
+        assert policy.metrics()["hedged"] == 1
+        assert policy.metrics()["hedge_wins"] == 1
+        assert policy.metrics()["delays_ms"]["/me"] == 50.0
+
+    @pytest.mark.asyncio
+    async def test_both_attempts_are_observed(self):
+        """Test the winner's latency and the time the cancelled loser had run are both recorded."""
+        policy = _policy()
+
+        await policy.async_request("/me", _attempts((1, "first"), (0, "second")))
+        # Let the cancellation of the first attempt finish
+        await asyncio.sleep(0.01)
+
+        samples = list(policy._latencies["/me"])[20:]
+        assert len(samples) == 2
+        # The first attempt ran for the hedge delay before it was cancelled
+        assert max(samples) >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_failed_hedge_falls_back(self):
+        """Test a failing hedge does not fail a read the first attempt answers."""
+        policy = _policy()
+
+        result = await policy.async_request("/me", _attempts((0.1, "first"), (0, ValueError("boom"))))
+
+        assert result == "first"
+        assert policy.hedge_wins == 0
+
+    @pytest.mark.asyncio
+    async def test_hedge_rate_is_capped(self):
+        """Test at most a tenth of recent reads are hedged."""
+        policy = _policy()
+        for _ in range(10):
+            await policy.async_request("/me", _attempts((1, "first"), (0, "second")))
+
+        assert await policy.async_request("/me", _attempts((0.06, "first"))) == "first"
+        assert policy.hedged == 10
+
+
+@pytest.mark.asyncio
+async def test_sends_are_never_hedged(mock_hass):
+    """Test only GET requests go through the hedge policy."""
+    api = ElksApi("user", "pass", session=MagicMock())
+    api.hedging = _policy()
+    api.hedging.async_request = AsyncMock(return_value=MagicMock())
+
+    await api.async_send_sms(mock_hass, "ELKS46", "+46701234567", "Hi")
+    api.hedging.async_request.assert_not_called()
+
+    await api.async_get_account_info(mock_hass)
+    api.hedging.async_request.assert_called_once()
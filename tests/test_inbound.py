@@ -0,0 +1,121 @@
+"""Test inbound SMS commands for 46elks integration."""
+import pytest
+import voluptuous as vol
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.elks_46.inbound import COMMANDS_SCHEMA, CommandTable, InboundSmsHandler
+
+COMMANDS = COMMANDS_SCHEMA(
+    [
+        {"name": "ack", "keyword": "ACK", "reply": "Alarm silenced"},
+        {
+            "name": "arm",
+            "pattern": r"arm (?P<zone>\w+)$",
+            "service": "alarm_control_panel.alarm_arm_away",
+            "data": {"entity_id": "alarm_control_panel.home"},
+        },
+        {"name": "status", "pattern": r"status\??$"},
+    ]
+)
+
+
+class TestCommandTable:
+    """Test command matching."""
+
+    def test_keyword_match(self):
+        """Test keywords match the first word case-insensitively."""
+        command, args = CommandTable(COMMANDS).match("ack please")
+        assert command["name"] == "ack"
+        assert args == {"args": "please"}
+
+    def test_pattern_match_with_groups(self):
+        """Test patterns expose their named groups."""
+        command, args = CommandTable(COMMANDS).match("ARM garage")
+        assert command["name"] == "arm"
+        assert args == {"zone": "garage"}
+
+    def test_second_pattern(self):
+        """Test later patterns are tried when earlier ones do not match."""
+        command, _ = CommandTable(COMMANDS).match("Status?")
+        assert command["name"] == "status"
+
+    def test_patterns_are_independent(self):
+        """Test patterns may reuse group names and keep their own backreferences."""
+        table = CommandTable(
+            COMMANDS_SCHEMA(
+                [
+                    {"name": "on", "pattern": r"on (?P<zone>\w+)$"},
+                    {"name": "off", "pattern": r"off (?P<zone>\w+)$"},
+                    {"name": "double", "pattern": r"(\w)\1$"},
+                ]
+            )
+        )
+        assert table.match("off hall") == (table.commands[1], {"zone": "hall"})
+        assert table.match("aa") == (table.commands[2], {})
+
+    def test_no_match(self):
+        """Test unknown messages."""
+        assert CommandTable(COMMANDS).match("hello") == (None, None)
+
+    def test_invalid_pattern(self):
+        """Test invalid patterns are rejected."""
+        with pytest.raises(vol.Invalid):
+            COMMANDS_SCHEMA([{"name": "bad", "pattern": "(unclosed"}])
+
+    def test_keyword_or_pattern_required(self):
+        """Test commands need something to match."""
+        with pytest.raises(vol.Invalid):
+            COMMANDS_SCHEMA([{"name": "empty"}])
+
+
+class TestInboundSmsHandler:
+    """Test inbound SMS dispatch."""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_fires_events_and_calls_service(self, mock_hass):
+        """Test a matched command fires events and calls its service."""
+        tasks = []
+        mock_hass.async_create_task = MagicMock(side_effect=tasks.append)
+        mock_hass.services.async_call = AsyncMock()
+        handler = InboundSmsHandler(mock_hass, "hook", COMMANDS)
+
+        reply = handler.async_dispatch({"id": "s1", "from": "+46701234567", "to": "+46766865802", "message": "arm garage"})
+
+        assert reply is None
+        events = [call[0][0] for call in mock_hass.bus.async_fire.call_args_list]
+        assert events == ["elks_46_sms_received", "elks_46_command"]
+        assert mock_hass.bus.async_fire.call_args[0][1]["zone"] == "garage"
+        await tasks[0]
+        mock_hass.services.async_call.assert_called_once_with(
+            "alarm_control_panel", "alarm_arm_away", {"entity_id": "alarm_control_panel.home"}, blocking=True
+        )
+
+    @pytest.mark.asyncio
+    async def test_failed_service_is_logged(self, mock_hass, caplog):
+        """Test a command whose service fails is logged with its name."""
+        tasks = []
+        mock_hass.async_create_task = MagicMock(side_effect=tasks.append)
+        mock_hass.services.async_call = AsyncMock(side_effect=HomeAssistantError("Entity not found"))
+        handler = InboundSmsHandler(mock_hass, "hook", COMMANDS)
+
+        handler.async_dispatch({"from": "+46701234567", "message": "arm garage"})
+        await tasks[0]
+
+        assert "Command arm failed to call alarm_control_panel.alarm_arm_away: Entity not found" in caplog.text
+
+    def test_dispatch_returns_reply(self, mock_hass):
+        """Test replies are returned to 46elks."""
+        handler = InboundSmsHandler(mock_hass, "hook", COMMANDS)
+
+        assert handler.async_dispatch({"from": "+46701234567", "message": "ACK"}) == "Alarm silenced"
+
+    def test_unknown_sender_runs_no_command(self, mock_hass):
+        """Test only allowed senders can run commands."""
+        handler = InboundSmsHandler(mock_hass, "hook", COMMANDS, ["+46701234567"])
+
+        assert handler.async_dispatch({"from": "+46709999999", "message": "ACK"}) is None
+        events = [call[0][0] for call in mock_hass.bus.async_fire.call_args_list]
+        assert events == ["elks_46_sms_received"]
+        assert handler.async_dispatch({"from": "+46701234567", "message": "ACK"}) == "Alarm silenced"
@@ -0,0 +1,145 @@
+"""Test the local balance ledger for 46elks integration."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.elks_46.ledger import BalanceLedger
+
+
+class TestBalanceLedger:
+    """Test balance tracking."""
+
+    def test_debit_send_cost(self):
+        """Test debiting the cost of a send response."""
+        ledger = BalanceLedger(MagicMock(), MagicMock())
+        ledger.reconcile({"balance": 1974000})
+        ledger.debit({"id": "s1", "cost": 3500})
+
+        assert ledger.balance == 1970500
+        assert ledger.spent_today == 3500
+
+    def test_reconcile_replaces_balance(self):
+        """Test reconciliation with the API balance."""
+        ledger = BalanceLedger(MagicMock(), MagicMock())
+        ledger.reconcile({"balance": 1974000})
+        ledger.debit({"cost": 3500})
+        ledger.reconcile({"balance": 1000000}, spent_today=10000)
+
+        assert ledger.balance == 1000000
+        assert ledger.spent_today == 10000
+
+    @pytest.mark.asyncio
+    async def test_check_rechecks_api_when_empty(self):
+        """Test an empty local balance is rechecked against the API."""
+        api = MagicMock()
+        api.async_get_account_info = AsyncMock(return_value={"balance": 50000})
+        ledger = BalanceLedger(MagicMock(), api)
+        ledger.reconcile({"balance": 0})
+
+        await ledger.async_check("send SMS")
+        assert ledger.balance == 50000
+
+    @pytest.mark.asyncio
+    async def test_daily_cap(self):
+        """Test the daily spend cap."""
+        ledger = BalanceLedger(MagicMock(), MagicMock(), daily_cap=5000)
+        ledger.reconcile({"balance": 1974000})
+        ledger.debit({"cost": 3500})
+        await ledger.async_check("send SMS")
+        ledger.debit({"cost": 3500})
+
+        with pytest.raises(HomeAssistantError, match="Daily spend cap"):
+            await ledger.async_check("send SMS")
+
+    @pytest.mark.asyncio
+    async def test_estimate_checked_up_front(self):
+        """Test a batch whose estimated cost exceeds the cap is refused before sending."""
+        ledger = BalanceLedger(MagicMock(), MagicMock(), daily_cap=50000)
+        ledger.reconcile({"balance": 1974000})
+
+        await ledger.async_check("send SMS", 40000)
+        with pytest.raises(HomeAssistantError, match="would exceed the daily spend cap"):
+            await ledger.async_check("send SMS", 60000)
+
+
+    @pytest.mark.asyncio
+    async def test_reservations_share_the_cap(self):
+        """Test sends in flight are counted against the cap until they are settled."""
+        ledger = BalanceLedger(MagicMock(), MagicMock(), daily_cap=10000)
+        ledger.reconcile({"balance": 1974000})
+
+        first = await ledger.async_reserve("send SMS", 5200)
+        with pytest.raises(HomeAssistantError, match="would exceed the daily spend cap"):
+            await ledger.async_reserve("send SMS", 5200)
+
+        ledger.debit({"cost": 3500}, first)
+        assert ledger.spent_today == 3500
+        await ledger.async_reserve("send SMS", 5200)
+
+    @pytest.mark.asyncio
+    async def test_unpriced_send_is_debited_its_estimate(self):
+        """Test a response without a cost is debited the reserved estimate, a failed send nothing."""
+        ledger = BalanceLedger(MagicMock(), MagicMock())
+        ledger.reconcile({"balance": 1974000})
+
+        ledger.debit({"id": "c1"}, await ledger.async_reserve("make call", 10000))
+        ledger.release(await ledger.async_reserve("make call", 10000))
+
+        assert ledger.spent_today == 10000
+        assert ledger.balance == 1964000
+
+@pytest.mark.asyncio
+async def test_send_sms_skips_account_lookup(mock_hass, mock_elks_api):
+    """Test that sending does not fetch account info."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {
+        "api_username": "test_user",
+        "api_password": "test_pass",
+        "default_sender": "ELKS46",
+    }
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"to": "+46701234567", "message": "Test"}
+    service_handler = mock_hass.services.async_register.call_args_list[0][0][2]
+    await service_handler(call)
+
+    # Only the setup call, not one per send
+    assert mock_elks_api.async_get_account_info.call_count == 1
+    mock_elks_api.async_send_sms.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sends_stop_at_cap(mock_hass, mock_elks_api):
+    """Test recipients sent to concurrently cannot overshoot the daily spend cap."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {"api_username": "test_user", "api_password": "test_pass", "default_sender": "ELKS46"}
+    # Room for two estimated SMS but not three
+    entry.options = {"daily_spend_cap": 1.2}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+    mock_elks_api.async_send_sms = AsyncMock(return_value={"id": "s1", "cost": 5200})
+    ledger = mock_hass.data["elks_46"]["test_entry"]["ledger"]
+    # Let the batch past the up-front check, as separate service calls would each be
+    ledger.async_check = AsyncMock()
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"to": ["+46701111111", "+46702222222", "+46703333333"], "message": "Test"}
+    with pytest.raises(HomeAssistantError, match="daily spend cap"):
+        await mock_hass.services.async_register.call_args_list[0][0][2](call)
+
+    assert mock_elks_api.async_send_sms.call_count == 2
+    assert ledger.spent_today == 10400
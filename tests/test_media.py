@@ -0,0 +1,89 @@
+"""Test media sync for 46elks integration."""
+import os
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.elks_46.media import MediaSync, discover_media
+
+
+class TestDiscoverMedia:
+    """Test media discovery in history records."""
+
+    def test_mms_images(self):
+        """Test discovering MMS images."""
+        records = [{"id": "m1", "images": ["https://api.46elks.com/a1/images/a.jpg", "https://api.46elks.com/a1/images/b.png"]}]
+        assert discover_media("mms", records) == [
+            ("mms_m1_0", "https://api.46elks.com/a1/images/a.jpg"),
+            ("mms_m1_1", "https://api.46elks.com/a1/images/b.png"),
+        ]
+
+    def test_call_recordings(self):
+        """Test discovering call recordings."""
+        records = [
+            {"id": "c1", "recording": "https://api.46elks.com/a1/recordings/r1.wav"},
+            {"id": "c2"},
+        ]
+        assert discover_media("call", records) == [("call_c1_0", "https://api.46elks.com/a1/recordings/r1.wav")]
+
+
+def _fake_response(chunks):
+    """Return a streaming response yielding chunks."""
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_content.return_value = iter(chunks)
+    return response
+
+
+class TestDownloadMedia:
+    """Test streaming downloads."""
+
+    def test_streams_to_file(self, tmp_path):
+        """Test the file is written chunk by chunk."""
+        from custom_components.elks_46 import ElksApi
+
+        api = ElksApi("user", "pass")
+        path = tmp_path / "a.jpg"
+        with patch.object(api.session, "get", return_value=_fake_response([b"abc", b"def"])) as get:
+            sha256, size = api.download_media("https://api.46elks.com/a1/images/a.jpg", str(path))
+
+        assert path.read_bytes() == b"abcdef"
+        assert size == 6
+        assert len(sha256) == 64
+        assert get.call_args[1]["stream"] is True
+        assert get.call_args[1]["auth"] == ("user", "pass")
+
+    def test_no_credentials_for_other_hosts(self, tmp_path):
+        """Test credentials are only sent to 46elks."""
+        from custom_components.elks_46 import ElksApi
+
+        api = ElksApi("user", "pass")
+        with patch.object(api.session, "get", return_value=_fake_response([b"x"])) as get:
+            api.download_media("https://example.com/a.jpg", str(tmp_path / "a.jpg"))
+
+        assert get.call_args[1]["auth"] is None
+
+
+@pytest.mark.asyncio
+async def test_sync_deduplicates(mock_hass, tmp_path):
+    """Test media is deduplicated by id and checksum."""
+    from custom_components.elks_46 import ElksApi
+
+    mock_hass.config = MagicMock()
+    mock_hass.config.media_dirs = {"local": str(tmp_path)}
+
+    api = ElksApi("user", "pass")
+    api.async_get_mms_history = AsyncMock(return_value=[
+        {"id": "m1", "images": ["https://api.46elks.com/a1/images/a.jpg"]},
+        {"id": "m2", "images": ["https://api.46elks.com/a1/images/b.jpg"]},
+    ])
+    api.async_get_call_history = AsyncMock(return_value=[])
+
+    sync = MediaSync(mock_hass, api, "test_entry")
+    await sync.async_load()
+
+    with patch.object(api.session, "get", side_effect=lambda *args, **kwargs: _fake_response([b"same"])) as get:
+        assert await sync.async_sync() == 2
+        assert await sync.async_sync() == 0
+
+    assert get.call_count == 2
+    assert os.listdir(tmp_path / "elks_46") == ["mms_m1_0.jpg"]
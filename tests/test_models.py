@@ -0,0 +1,99 @@
+"""Test history records for 46elks integration."""
+from datetime import datetime, timezone
+
+from custom_components.elks_46.models import Direction, HistoryBuffer, HistoryRecord, Status
+
+
+def _sms(record_id: str, created: str, status: str = "delivered") -> dict:
+    """Return a raw SMS record as returned by the API."""
+    return {
+        "id": record_id,
+        "from": "ELKS46",
+        "to": "+46701234567",
+        "message": "Test message",
+        "direction": "outgoing",
+        "status": status,
+        "created": created,
+        "cost": 3500,
+    }
+
+
+class TestHistoryRecord:
+    """Test parsing of API records."""
+
+    def test_parse_sms(self):
+        """Test parsing an SMS record."""
+        record = HistoryRecord.from_api(_sms("s1", "2025-12-02T10:30:00.123000"))
+
+        assert record.direction is Direction.OUTGOING
+        assert record.status is Status.DELIVERED
+        assert record.created == datetime(2025, 12, 2, 10, 30, 0, 123000, tzinfo=timezone.utc)
+        assert record.cost == 3500
+        assert record.cost_sek == 0.35
+
+    def test_parse_call_state(self):
+        """Test parsing call state into the status field."""
+        record = HistoryRecord.from_api({"id": "c1", "state": "success", "duration": "45", "cost": "1200"})
+
+        assert record.status is Status.SUCCESS
+        assert record.duration == 45
+        assert record.cost == 1200
+
+    def test_ongoing_call_is_not_settled(self):
+        """Test the cost of a call in progress is not final."""
+        assert not HistoryRecord.from_api({"id": "c1", "state": "ongoing"}).settled
+        assert HistoryRecord.from_api({"id": "c1", "state": "success"}).settled
+
+    def test_malformed_duration(self):
+        """Test durations that are not whole numbers do not fail parsing."""
+        assert HistoryRecord.from_api({"id": "c1", "duration": "45.0"}).duration == 45
+        assert HistoryRecord.from_api({"id": "c1", "duration": "n/a"}).duration == 0
+        assert HistoryRecord.from_api({"id": "c1", "duration": None}).duration == 0
+
+    def test_unknown_status_is_kept(self):
+        """Test unknown status values are kept as strings."""
+        record = HistoryRecord.from_api({"id": "s1", "status": "queued"})
+        assert record.status == "queued"
+
+    def test_message_is_truncated(self):
+        """Test long messages are truncated."""
+        record = HistoryRecord.from_api({"id": "s1", "message": "x" * 500})
+        assert len(record.message) == 100
+
+
+class TestHistoryBuffer:
+    """Test the bounded history buffer."""
+
+    def test_merge_keeps_newest_first(self):
+        """Test merging overlapping pages."""
+        buffer = HistoryBuffer(10)
+        assert buffer.merge([_sms("s2", "2025-12-02T11:00:00"), _sms("s1", "2025-12-02T10:00:00")]) == 2
+        assert buffer.merge([_sms("s3", "2025-12-02T12:00:00"), _sms("s2", "2025-12-02T11:00:00")]) == 1
+
+        assert [record.id for record in buffer] == ["s3", "s2", "s1"]
+
+    def test_merge_updates_status(self):
+        """Test refetched records replace stale copies."""
+        buffer = HistoryBuffer(10)
+        buffer.merge([_sms("s1", "2025-12-02T10:00:00", status="sent")])
+        buffer.merge([_sms("s1", "2025-12-02T10:00:00", status="delivered")])
+
+        assert len(buffer) == 1
+        assert buffer.latest.status is Status.DELIVERED
+
+    def test_buffer_is_bounded(self):
+        """Test the oldest records are evicted."""
+        buffer = HistoryBuffer(2)
+        buffer.merge([_sms("s1", "2025-12-02T10:00:00")])
+        buffer.merge([_sms("s2", "2025-12-02T11:00:00")])
+        buffer.merge([_sms("s3", "2025-12-02T12:00:00")])
+
+        assert [record.id for record in buffer] == ["s3", "s2"]
+
+    def test_since(self):
+        """Test selecting recent records."""
+        buffer = HistoryBuffer(10)
+        buffer.merge([_sms("s2", "2025-12-02T11:00:00"), _sms("s1", "2025-12-01T23:00:00")])
+
+        start = datetime(2025, 12, 2, tzinfo=timezone.utc)
+        assert [record.id for record in buffer.since(start)] == ["s2"]
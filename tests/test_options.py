@@ -0,0 +1,67 @@
+"""Test live option changes for 46elks integration."""
+import asyncio
+from datetime import timedelta
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.mark.asyncio
+async def test_update_options_applies_live(mock_hass, mock_elks_api):
+    """Test tuning options are applied to the running entry."""
+    from custom_components.elks_46 import async_setup_entry, async_update_options
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {
+        "api_username": "test_user",
+        "api_password": "test_pass",
+        "default_sender": "ELKS46",
+    }
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+
+    data = mock_hass.data["elks_46"]["test_entry"]
+    data["coordinators"] = {"account": MagicMock(), "sms": MagicMock(), "numbers": MagicMock()}
+
+    entry.options = {
+        "scan_interval": 5,
+        "account_interval": 1,
+        "api_timeout": 3,
+        "history_limit": 50,
+        "send_concurrency": 2,
+    }
+    await async_update_options(mock_hass, entry)
+
+    assert data["coordinators"]["sms"].update_interval == timedelta(minutes=5)
+    assert data["coordinators"]["account"].update_interval == timedelta(minutes=1)
+    assert data["coordinators"]["numbers"].update_interval == timedelta(hours=6)
+    assert mock_elks_api.timeout == 3
+    assert data["media"].history_limit == 50
+    mock_hass.config_entries.async_reload.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_each_bounds_concurrency():
+    """Test recipients are sent to with bounded concurrency."""
+    from custom_components.elks_46 import _async_send_each
+
+    running = 0
+    peak = 0
+
+    async def send(to_number):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        if to_number == "+46709999999":
+            raise ValueError("boom")
+
+    errors = await _async_send_each(
+        [f"+4670000000{index}" for index in range(8)] + ["+46709999999"], send, 3
+    )
+
+    assert peak == 3
+    assert errors == ["+46709999999: boom"]
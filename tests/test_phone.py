@@ -0,0 +1,40 @@
+"""Test recipient number normalization for 46elks integration."""
+import pytest
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.elks_46.phone import normalize, normalize_recipients
+
+
+class TestNormalize:
+    """Test normalizing single numbers."""
+
+    def test_national_numbers(self):
+        """Test national numbers are read in the default country."""
+        assert normalize("070-123 45 67") == "+46701234567"
+        assert normalize("0401234567", "FI") == "+358401234567"
+        assert normalize("91234567", "NO") == "+4791234567"
+
+    def test_international_numbers(self):
+        """Test international numbers keep their country code."""
+        assert normalize("+46 (0)70 123 45 67") == "+46701234567"
+        assert normalize("0047 912 34 567") == "+4791234567"
+        assert normalize("+46701234567", "NO") == "+46701234567"
+
+    def test_invalid(self):
+        """Test numbers that cannot be read are rejected."""
+        assert normalize("701234567") is None
+        assert normalize("ELKS46") is None
+        assert normalize("+0701234567") is None
+        assert normalize("+46123") is None
+
+
+def test_normalize_recipients():
+    """Test a list is normalized and deduplicated, and all bad numbers are reported."""
+    assert normalize_recipients(["0701234567", "+46701234567", "0709876543"]) == [
+        "+46701234567",
+        "+46709876543",
+    ]
+
+    with pytest.raises(HomeAssistantError, match="'123', 'abc'"):
+        normalize_recipients(["0701234567", "123", "abc"])
@@ -0,0 +1,139 @@
+"""Test profiling for 46elks integration."""
+import os
+import pytest
+from unittest.mock import MagicMock, patch
+
+from custom_components.elks_46.profiling import PROFILER, Profiler, traced
+
+
+@pytest.fixture(autouse=True)
+def stop_profiler():
+    """Make sure profiling never leaks between tests."""
+    yield
+    PROFILER.stop()
+
+
+class TestProfiler:
+    """Test span collection."""
+
+    def test_disabled_records_nothing(self):
+        """Test nothing is recorded while disabled."""
+        profiler = Profiler()
+        with profiler.span("http"):
+            pass
+        profiler.record("http", 1.0)
+
+        profiler.start()
+        assert profiler.summary()["stages"] == {}
+
+    def test_stages_and_slowest(self):
+        """Test spans are aggregated per stage and the slowest are kept."""
+        profiler = Profiler()
+        profiler.start()
+        for index in range(30):
+            profiler.record("http", index / 1000, f"GET /sms {index}")
+        profiler.record("executor_queue", 0.002)
+        summary, profile = profiler.stop()
+
+        assert profile is None
+        assert summary["stages"]["http"]["count"] == 30
+        assert summary["stages"]["http"]["max_ms"] == 29.0
+        assert summary["stages"]["executor_queue"]["count"] == 1
+        assert len(summary["slowest"]) == 20
+        assert summary["slowest"][0] == {"stage": "http", "detail": "GET /sms 29", "ms": 29.0}
+
+    @pytest.mark.asyncio
+    async def test_traced(self):
+        """Test traced coroutines are timed only while profiling."""
+
+        async def handler(call):
+            return call
+
+        wrapped = traced("service.send_sms", handler)
+        assert await wrapped(1) == 1
+
+        PROFILER.start()
+        assert await wrapped(2) == 2
+        summary, _ = PROFILER.stop()
+        assert summary["stages"]["service.send_sms"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_splits_queue_and_http(mock_hass):
+    """Test API requests record executor queueing and the HTTP round-trip."""
+    from custom_components.elks_46 import ElksApi
+
+    api = ElksApi("user", "pass")
+    response = MagicMock()
+    response.json.return_value = {"balance": 1}
+
+    PROFILER.start()
+    with patch.object(api.session, "request", return_value=response) as request:
+        assert await api.async_get_account_info(mock_hass) == {"balance": 1}
+    summary, _ = PROFILER.stop()
+
+    assert request.call_args[0] == ("GET", "https://api.46elks.com/a1/me")
+    assert summary["stages"]["executor_queue"]["count"] == 1
+    assert summary["stages"]["http"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_profile_services(mock_hass, mock_elks_api, tmp_path):
+    """Test start_profile and stop_profile write the cProfile output."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    mock_hass.config = MagicMock()
+    mock_hass.config.path = lambda name: str(tmp_path / name)
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {"api_username": "test_user", "api_password": "test_pass", "default_sender": "ELKS46"}
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+
+    handlers = {call[0][1]: call[0][2] for call in mock_hass.services.async_register.call_args_list}
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"cprofile": True, "duration": 60}
+
+    with patch("custom_components.elks_46.async_call_later") as call_later:
+        await handlers["start_profile"](call)
+    assert call_later.call_args[0][1] == 60
+
+    send = MagicMock(spec=ServiceCall)
+    send.data = {"to": "+46701234567", "message": "Test"}
+    await handlers["send_sms"](send)
+
+    summary = await handlers["stop_profile"](MagicMock(spec=ServiceCall))
+
+    assert summary["stages"]["service.send_sms"]["count"] == 1
+    assert os.path.exists(summary["profile"])
+    call_later.return_value.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_profile_ends_with_entry(mock_hass, mock_elks_api):
+    """Test unloading the entry cancels the automatic stop and ends profiling."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {"api_username": "test_user", "api_password": "test_pass", "default_sender": "ELKS46"}
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+
+    handlers = {call[0][1]: call[0][2] for call in mock_hass.services.async_register.call_args_list}
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"cprofile": False, "duration": 60}
+    with patch("custom_components.elks_46.async_call_later") as call_later:
+        await handlers["start_profile"](call)
+
+    for unload in [call[0][0] for call in entry.async_on_unload.call_args_list]:
+        unload()
+
+    call_later.return_value.assert_called_once()
+    assert not PROFILER.enabled
@@ -0,0 +1,78 @@
+"""Test destination routing for 46elks integration."""
+import pytest
+import voluptuous as vol
+
+from custom_components.elks_46.const import ESTIMATED_SMS_COST
+from custom_components.elks_46.routing import ROUTES_SCHEMA, RoutingTable, count_segments
+
+
+class TestCountSegments:
+    """Test SMS segment counting."""
+
+    def test_gsm(self):
+        """Test GSM 03.38 messages split at 160 and 153 characters."""
+        assert count_segments("a" * 160) == 1
+        assert count_segments("a" * 161) == 2
+        assert count_segments("a" * 306) == 2
+        assert count_segments("€" * 80) == 1
+
+    def test_unicode(self):
+        """Test messages outside GSM 03.38 split at 70 and 67 characters."""
+        assert count_segments("ä" * 160) == 1
+        assert count_segments("😀" * 35) == 1
+        assert count_segments("Ж" * 71) == 2
+
+
+class TestRoutingTable:
+    """Test longest-prefix matching."""
+
+    def _table(self):
+        return RoutingTable(ROUTES_SCHEMA([
+            {"prefix": "+4", "price": 1.0},
+            {"prefix": "+47", "sender": "+46766865802", "price": 0.55},
+            {"prefix": "0046 70", "sender": "Alarm"},
+        ]))
+
+    def test_longest_prefix_wins(self):
+        """Test the most specific prefix is used."""
+        table = self._table()
+        assert table.lookup("+4791234567").prefix == "47"
+        assert table.lookup("+46701234567").prefix == "4670"
+        assert table.lookup("+4412345678").prefix == "4"
+        assert table.lookup("+1555123456") is None
+
+    def test_plan(self):
+        """Test senders are routed and the batch is priced in one pass."""
+        senders, costs = self._table().plan(
+            {"+4791234567": "Hi", "+46701234567": "Hi", "+4412345678": "a" * 200, "+1555123456": "Hi"},
+            "ELKS46",
+        )
+
+        assert senders == {
+            "+4791234567": "+46766865802",
+            "+46701234567": "Alarm",
+            "+4412345678": "ELKS46",
+            "+1555123456": "ELKS46",
+        }
+        # The +4670 route has no price and +1 no route, so both fall back to the estimate
+        assert costs == {
+            "+4791234567": 5500,
+            "+46701234567": ESTIMATED_SMS_COST,
+            "+4412345678": 2 * 10000,
+            "+1555123456": ESTIMATED_SMS_COST,
+        }
+
+    def test_empty_message_is_free(self):
+        """Test a recipient without a message is priced at nothing."""
+        _, costs = self._table().plan({"+4791234567": ""}, "ELKS46")
+        assert costs == {"+4791234567": 0}
+
+    def test_caller_sender_wins(self):
+        """Test a sender given by the caller is used for every recipient."""
+        senders, _ = self._table().plan({"+4791234567": "Hi"}, "ELKS46", "Custom")
+        assert senders == {"+4791234567": "Custom"}
+
+    def test_invalid_prefix(self):
+        """Test prefixes must be digits."""
+        with pytest.raises(vol.Invalid):
+            ROUTES_SCHEMA([{"prefix": "+46x"}])
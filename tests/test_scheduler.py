@@ -0,0 +1,150 @@
+"""Test the deferred send scheduler for 46elks integration."""
+from datetime import timedelta
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from custom_components.elks_46.scheduler import SendScheduler
+
+
+@pytest.fixture
+def mock_track():
+    """Mock the point in time tracker."""
+    with patch("custom_components.elks_46.scheduler.async_track_point_in_utc_time") as track:
+        yield track
+
+
+class TestSendScheduler:
+    """Test the min-heap scheduler."""
+
+    @pytest.mark.asyncio
+    async def test_single_timer_follows_earliest_send(self, mock_hass, mock_track):
+        """Test the timer is only re-armed when the earliest send changes."""
+        scheduler = SendScheduler(mock_hass, "test_entry")
+        await scheduler.async_load()
+        scheduler.async_start()
+        now = dt_util.utcnow()
+
+        scheduler.async_schedule(now + timedelta(hours=2), "send_sms", {"to": ["+46701111111"]})
+        scheduler.async_schedule(now + timedelta(hours=3), "send_sms", {"to": ["+46702222222"]})
+        assert mock_track.call_count == 1
+
+        scheduler.async_schedule(now + timedelta(hours=1), "send_sms", {"to": ["+46703333333"]})
+        assert mock_track.call_count == 2
+        assert dt_util.as_timestamp(mock_track.call_args[0][2]) == pytest.approx(
+            dt_util.as_timestamp(now + timedelta(hours=1))
+        )
+        assert len(scheduler) == 3
+
+    @pytest.mark.asyncio
+    async def test_fire_dispatches_due_sends(self, mock_hass, mock_track):
+        """Test that only due sends are dispatched."""
+        mock_hass.services.async_call = AsyncMock()
+        mock_hass.async_create_task = MagicMock(side_effect=lambda coro: coro.close())
+        scheduler = SendScheduler(mock_hass, "test_entry")
+        await scheduler.async_load()
+        scheduler.async_start()
+        now = dt_util.utcnow()
+
+        scheduler.async_schedule(now - timedelta(minutes=1), "send_sms", {"to": ["+46701111111"]})
+        scheduler.async_schedule(now + timedelta(hours=1), "send_mms", {"to": ["+46702222222"]})
+        scheduler._async_fire(now)
+
+        assert mock_hass.async_create_task.call_count == 1
+        assert len(scheduler) == 1
+
+    @pytest.mark.asyncio
+    async def test_restore_from_storage(self, mock_hass, mock_track):
+        """Test pending sends survive a restart."""
+        at = dt_util.as_timestamp(dt_util.utcnow() + timedelta(hours=1))
+        stored = {"jobs": [{"at": at, "id": "abc", "service": "send_sms", "data": {"to": ["+46701111111"]}}]}
+
+        with patch("homeassistant.helpers.storage.Store.async_load", AsyncMock(return_value=stored)):
+            scheduler = SendScheduler(mock_hass, "test_entry")
+            await scheduler.async_load()
+
+        assert len(scheduler) == 1
+        assert scheduler._data_to_save()["jobs"][0]["at"] == at
+        # Not before the services exist
+        mock_track.assert_not_called()
+        scheduler.async_start()
+        mock_track.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_overdue_send_survives_restart(self, mock_hass, mock_track):
+        """Test a send that came due while stopped is retried if its service is missing."""
+        from homeassistant.exceptions import ServiceNotFound
+
+        at = dt_util.as_timestamp(dt_util.utcnow() - timedelta(hours=1))
+        stored = {"jobs": [{"at": at, "id": "abc", "service": "send_sms", "data": {"to": ["+46701111111"]}}]}
+        mock_hass.services.async_call = AsyncMock(side_effect=ServiceNotFound("elks_46", "send_sms"))
+        tasks = []
+        mock_hass.async_create_task = MagicMock(side_effect=tasks.append)
+
+        with patch("homeassistant.helpers.storage.Store.async_load", AsyncMock(return_value=stored)):
+            scheduler = SendScheduler(mock_hass, "test_entry")
+            await scheduler.async_load()
+        scheduler.async_start()
+        scheduler._async_fire(dt_util.utcnow())
+        await tasks[0]
+
+        assert len(scheduler) == 1
+        assert scheduler._data_to_save()["jobs"][0]["attempts"] == 1
+        assert scheduler._data_to_save()["jobs"][0]["at"] > dt_util.as_timestamp(dt_util.utcnow())
+
+    @pytest.mark.asyncio
+    async def test_partial_failure_retries_failed_recipients(self, mock_hass, mock_track):
+        """Test a retry only goes to the recipients that failed."""
+        from custom_components.elks_46.scheduler import PartialSendError
+
+        mock_hass.services.async_call = AsyncMock(side_effect=PartialSendError("boom", ["+46702222222"]))
+        scheduler = SendScheduler(mock_hass, "test_entry")
+        await scheduler.async_load()
+        scheduler.async_start()
+
+        await scheduler._async_dispatch("abc", "send_sms", {"to": ["+46701111111", "+46702222222"]}, 0)
+        assert scheduler._data_to_save()["jobs"][0]["data"]["to"] == ["+46702222222"]
+
+        scheduler._heap.clear()
+        await scheduler._async_dispatch("abc", "send_sms", {"to": ["+46702222222"]}, 4)
+        assert len(scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_rejected_send_is_not_retried(self, mock_hass, mock_track):
+        """Test a send failing validation is dropped instead of retried."""
+        mock_hass.services.async_call = AsyncMock(side_effect=HomeAssistantError("Daily spending cap reached"))
+        scheduler = SendScheduler(mock_hass, "test_entry")
+        await scheduler.async_load()
+        scheduler.async_start()
+
+        await scheduler._async_dispatch("abc", "send_sms", {"to": ["+46701111111"]}, 0)
+        assert len(scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_data_to_save(self, mock_hass, mock_track):
+        """Test the stored representation."""
+        scheduler = SendScheduler(mock_hass, "test_entry")
+        await scheduler.async_load()
+        scheduler.async_schedule(dt_util.utcnow() + timedelta(hours=1), "send_sms", {"message": "Hi"})
+
+        jobs = scheduler._data_to_save()["jobs"]
+        assert jobs[0]["service"] == "send_sms"
+        assert jobs[0]["data"] == {"message": "Hi"}
+
+
+def test_scheduled_time_delay():
+    """Test a delay schedules relative to now."""
+    from custom_components.elks_46 import _scheduled_time
+
+    when = _scheduled_time({"delay": timedelta(minutes=10)})
+    assert timedelta(minutes=9) < when - dt_util.utcnow() <= timedelta(minutes=10)
+
+
+def test_scheduled_time_past_sends_now():
+    """Test a time in the past sends right away."""
+    from custom_components.elks_46 import _scheduled_time
+
+    assert _scheduled_time({"send_at": dt_util.utcnow() - timedelta(minutes=1)}) is None
+    assert _scheduled_time({}) is None
@@ -0,0 +1,152 @@
+"""Test sensors for 46elks integration."""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.elks_46.models import HistoryBuffer
+from custom_components.elks_46.sensor import (
+    ElksAccountSensor,
+    ElksBalanceSensor,
+    ElksBusiestHourSensor,
+    ElksCostTodaySensor,
+    ElksLastSmsSensor,
+    ElksNumbersSensor,
+    ElksTopRecipientsSensor,
+    update_interval,
+)
+
+
+def _coordinator(balance: int = 1974000) -> MagicMock:
+    """Return a coordinator holding account and SMS data."""
+    sms_history = HistoryBuffer(10)
+    sms_history.merge([
+        {
+            "id": "s1",
+            "from": "ELKS46",
+            "to": "+46701234567",
+            "message": "Test message",
+            "direction": "outgoing",
+            "status": "delivered",
+            "created": "2025-12-02T10:30:00",
+            "cost": 3500,
+        }
+    ])
+    coordinator = MagicMock()
+    coordinator.last_update_success = True
+    coordinator.data = {
+        "account": {"id": "u1", "balance": balance, "email": "me@example.com", "mobilenumber": "+46700000000"},
+        "sms_history": sms_history,
+        "call_history": HistoryBuffer(10),
+    }
+    return coordinator
+
+
+def _entry(options: dict = None) -> MagicMock:
+    """Return a config entry."""
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.options = options or {}
+    return entry
+
+
+class TestStateWrites:
+    """Test that sensors skip redundant state writes."""
+
+    def test_unchanged_refresh_skips_write(self):
+        """Test a refresh with identical data does not write state."""
+        coordinator = _coordinator()
+        sensor = ElksBalanceSensor(coordinator, _entry())
+
+        with patch.object(sensor, "async_write_ha_state") as write:
+            sensor._handle_coordinator_update()
+            sensor._handle_coordinator_update()
+
+        assert write.call_count == 1
+
+    def test_changed_refresh_writes(self):
+        """Test a changed value writes state."""
+        coordinator = _coordinator()
+        sensor = ElksBalanceSensor(coordinator, _entry())
+
+        with patch.object(sensor, "async_write_ha_state") as write:
+            sensor._handle_coordinator_update()
+            coordinator.data["account"] = {"balance": 1000000}
+            sensor._handle_coordinator_update()
+
+        assert write.call_count == 2
+        assert sensor.native_value == 100.0
+
+
+class TestUnrecordedAttributes:
+    """Test personal attributes are shown but not recorded."""
+
+    def test_attributes_shown(self):
+        """Test message text and contact details stay in the state."""
+        coordinator = _coordinator()
+        assert ElksLastSmsSensor(coordinator, _entry()).extra_state_attributes["message"] == "Test message"
+        assert ElksAccountSensor(coordinator, _entry()).extra_state_attributes["email"] == "me@example.com"
+
+    def test_attributes_not_recorded(self):
+        """Test message text and contact details are excluded from the recorder."""
+        assert "message" in ElksLastSmsSensor._Entity__combined_unrecorded_attributes
+        assert ElksAccountSensor._Entity__combined_unrecorded_attributes >= {"email", "mobile_number"}
+
+    def test_bulky_attributes_not_recorded(self):
+        """Test attributes holding lists and tables are excluded from the recorder."""
+        assert "numbers" in ElksNumbersSensor._Entity__combined_unrecorded_attributes
+        assert "sent_per_hour" in ElksBusiestHourSensor._Entity__combined_unrecorded_attributes
+        assert "recipients" in ElksTopRecipientsSensor._Entity__combined_unrecorded_attributes
+
+
+class TestSplitCoordinators:
+    """Test sensors fed by separate coordinators."""
+
+    def test_update_intervals(self):
+        """Test every coordinator has its own interval."""
+        options = {"scan_interval": 10, "call_interval": 60}
+        assert update_interval(options, "account") == timedelta(minutes=5)
+        assert update_interval(options, "sms") == timedelta(minutes=10)
+        assert update_interval(options, "calls") == timedelta(minutes=60)
+        assert update_interval(options, "numbers") == timedelta(hours=6)
+
+    def test_cost_today_combines_coordinators(self):
+        """Test cost today sums SMS and call history from their own coordinators."""
+        now = datetime.now(timezone.utc).isoformat()
+        sms_history = HistoryBuffer(10)
+        sms_history.merge([{"id": "s1", "created": now, "cost": 3500}])
+        call_history = HistoryBuffer(10)
+        call_history.merge([{"id": "c1", "created": now, "cost": 12000}])
+        sms = MagicMock(data={"sms_history": sms_history})
+        calls = MagicMock(data={"call_history": call_history})
+
+        sensor = ElksCostTodaySensor(sms, calls, _entry())
+        assert sensor.native_value == 1.55
+
+        # A failed call history update does not hide the SMS cost
+        calls.data = None
+        assert sensor.native_value == 0.35
+
+    def test_today_is_the_local_day(self):
+        """Test today starts at local midnight, like the spending ledger's day."""
+        with patch.object(dt_util, "DEFAULT_TIME_ZONE", dt_util.get_time_zone("Pacific/Auckland")):
+            start = dt_util.start_of_local_day()
+            sms_history = HistoryBuffer(10)
+            sms_history.merge([
+                {"id": "s1", "created": (start + timedelta(minutes=1)).isoformat(), "cost": 3500},
+                {"id": "s2", "created": (start - timedelta(minutes=1)).isoformat(), "cost": 3500},
+            ])
+            sms = MagicMock(data={"sms_history": sms_history})
+
+            assert ElksCostTodaySensor(sms, MagicMock(data=None), _entry()).native_value == 0.35
+
+    def test_numbers(self):
+        """Test the numbers sensor counts active numbers."""
+        coordinator = MagicMock(data={"numbers": [
+            {"number": "+46766865802", "active": "yes", "capabilities": ["sms", "voice"]},
+            {"number": "+46766865803", "active": "no", "capabilities": ["sms"]},
+        ]})
+        sensor = ElksNumbersSensor(coordinator, _entry())
+
+        assert sensor.native_value == 1
+        assert sensor.extra_state_attributes == {"numbers": {"+46766865802": ["sms", "voice"]}}
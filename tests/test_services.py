@@ -19,6 +19,7 @@ async def test_send_mms_without_capability(mock_hass, mock_elks_api):
         "api_password": "test_pass",
         "default_sender": "ELKS46",
     }
+    entry.options = {}
 
     # Mock numbers without MMS capability
     mock_elks_api.async_get_numbers = AsyncMock(return_value=[
@@ -58,6 +59,7 @@ async def test_make_call_without_voice_capability(mock_hass, mock_elks_api):
         "api_password": "test_pass",
         "default_sender": "ELKS46",
     }
+    entry.options = {}
 
     # Mock numbers without voice capability
     mock_elks_api.async_get_numbers = AsyncMock(return_value=[
@@ -96,6 +98,7 @@ async def test_send_mms_with_capability(mock_hass, mock_elks_api):
         "api_password": "test_pass",
         "default_sender": "ELKS46",
     }
+    entry.options = {}
 
     # Mock numbers with MMS capability
     mock_elks_api.async_get_numbers = AsyncMock(return_value=[
@@ -144,6 +147,7 @@ async def test_insufficient_balance(mock_hass, mock_elks_api):
         "api_password": "test_pass",
         "default_sender": "ELKS46",
     }
+    entry.options = {}
 
     # Mock zero balance
     mock_elks_api.async_get_account_info = AsyncMock(return_value={
@@ -165,3 +169,124 @@ async def test_insufficient_balance(mock_hass, mock_elks_api):
 
     with pytest.raises(HomeAssistantError, match="Insufficient balance"):
         await service_handler(call)
+
+
+async def _setup(mock_hass, mock_elks_api, options: dict = None):
+    """Set up the integration and return its ledger."""
+    from custom_components.elks_46 import async_setup_entry
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {
+        "api_username": "test_user",
+        "api_password": "test_pass",
+        "default_sender": "ELKS46",
+    }
+    entry.options = options or {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+    return mock_hass.data["elks_46"]["test_entry"]["ledger"]
+
+
+@pytest.mark.asyncio
+async def test_send_sms_dry_run(mock_hass, mock_elks_api):
+    """Test a dry run prices every message without sending or debiting."""
+    from homeassistant.core import ServiceCall
+
+    ledger = await _setup(mock_hass, mock_elks_api)
+    mock_elks_api.async_send_sms = AsyncMock(
+        return_value={"status": "created", "estimated_cost": 7000, "parts": 2, "dryrun": "yes"}
+    )
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"to": ["+46701234567", "+46709876543"], "message": "Test", "dry_run": True}
+
+    service_handler = mock_hass.services.async_register.call_args_list[0][0][2]
+    response = await service_handler(call)
+
+    assert response["dry_run"] is True
+    assert response["parts"] == 4
+    assert response["estimated_cost"] == 1.4
+    assert all(call[1] == {"dryrun": True} for call in mock_elks_api.async_send_sms.call_args_list)
+    assert ledger.spent_today == 0
+
+
+@pytest.mark.asyncio
+async def test_dry_run_option(mock_hass, mock_elks_api):
+    """Test the dry run option applies unless a call overrides it."""
+    from homeassistant.core import ServiceCall
+
+    await _setup(mock_hass, mock_elks_api, {"dry_run": True})
+    service_handler = mock_hass.services.async_register.call_args_list[0][0][2]
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"to": "+46701234567", "message": "Test"}
+    assert (await service_handler(call))["dry_run"] is True
+
+    call.data = {"to": "+46701234567", "message": "Test", "dry_run": False}
+    assert (await service_handler(call))["dry_run"] is False
+    assert mock_elks_api.async_send_sms.call_args[1] == {}
+
+
+@pytest.mark.asyncio
+async def test_recipients_normalized(mock_hass, mock_elks_api):
+    """Test national numbers are sent in international format."""
+    from homeassistant.core import ServiceCall
+
+    await _setup(mock_hass, mock_elks_api)
+    service_handler = mock_hass.services.async_register.call_args_list[0][0][2]
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {
+        "to": ["070-123 45 67", "+46701234567"],
+        "template": "Hi {name}",
+        "recipient_variables": {"0701234567": {"name": "Anna"}},
+    }
+    await service_handler(call)
+
+    mock_elks_api.async_send_sms.assert_called_once_with(mock_hass, "ELKS46", "+46701234567", "Hi Anna")
+
+
+@pytest.mark.asyncio
+async def test_invalid_recipients_rejected_locally(mock_hass, mock_elks_api):
+    """Test an invalid recipient fails the call before any API request."""
+    from homeassistant.core import ServiceCall
+
+    await _setup(mock_hass, mock_elks_api)
+    mock_elks_api.async_get_numbers.reset_mock()
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"to": ["+46701234567", "12"], "message": "Test"}
+    with pytest.raises(HomeAssistantError, match="Invalid phone number '12'"):
+        await mock_hass.services.async_register.call_args_list[0][0][2](call)
+
+    call.data = {"from": "+46766865802", "to": "not a number", "audio_url": "https://example.com/a.mp3"}
+    with pytest.raises(HomeAssistantError, match="Invalid phone number"):
+        await mock_hass.services.async_register.call_args_list[1][0][2](call)
+
+    mock_elks_api.async_send_sms.assert_not_called()
+    mock_elks_api.async_get_numbers.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_scheduled_send_validated_upfront(mock_hass, mock_elks_api):
+    """Test a scheduled send is checked when it is scheduled, not only when it is due."""
+    from datetime import timedelta
+    from homeassistant.core import ServiceCall
+
+    await _setup(mock_hass, mock_elks_api)
+    scheduler = mock_hass.data["elks_46"]["test_entry"]["scheduler"]
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {"from": "+46766865802", "to": ["+46701234567"], "image": "https://example.com/a.jpg",
+                 "delay": timedelta(hours=1)}
+    with pytest.raises(HomeAssistantError, match="cannot send MMS"):
+        await mock_hass.services.async_register.call_args_list[-1][0][2](call)
+    assert len(scheduler) == 0
+
+    call.data = {"to": ["+46701234567"], "message": "Test", "delay": timedelta(hours=1)}
+    response = await mock_hass.services.async_register.call_args_list[0][0][2](call)
+    assert response["scheduled"]
+    assert len(scheduler) == 1
+    mock_elks_api.async_send_sms.assert_not_called()
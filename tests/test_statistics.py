@@ -0,0 +1,99 @@
+"""Test long-term statistics import for 46elks integration."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.elks_46.statistics import StatisticsImporter, aggregate_hourly
+
+HOUR = datetime(2025, 12, 2, 10, tzinfo=timezone.utc)
+
+
+def test_aggregate_hourly():
+    """Test records are bucketed per hour, including quiet hours."""
+    records = {
+        "sms": [
+            {"id": "s1", "created": "2025-12-02T10:05:00", "cost": 3500},
+            {"id": "s2", "created": "2025-12-02T10:55:00", "cost": 3500},
+            {"id": "s3", "created": "2025-12-02T13:00:00", "cost": 3500},
+        ],
+        "calls": [{"id": "c1", "created": "2025-12-02T11:30:00", "cost": 1200}],
+        "mms": [],
+    }
+
+    buckets = aggregate_hourly(records, HOUR, HOUR + timedelta(hours=3))
+
+    assert list(buckets) == [HOUR, HOUR + timedelta(hours=1), HOUR + timedelta(hours=2)]
+    assert buckets[HOUR]["sms_count"] == 2
+    assert buckets[HOUR]["cost"] == 7000
+    assert buckets[HOUR + timedelta(hours=1)]["call_count"] == 1
+    assert buckets[HOUR + timedelta(hours=2)] == {"sms_count": 0, "call_count": 0, "mms_count": 0, "cost": 0}
+
+
+
+def test_hours_with_ongoing_calls_wait():
+    """Test the hour of a call still in progress and later hours are left for a later import."""
+    records = {
+        "sms": [{"id": "s1", "created": "2025-12-02T12:05:00", "cost": 3500}],
+        "calls": [
+            {"id": "c1", "created": "2025-12-02T10:30:00", "state": "success", "cost": 1200},
+            {"id": "c2", "created": "2025-12-02T11:50:00", "state": "ongoing", "cost": 0},
+        ],
+        "mms": [],
+    }
+
+    buckets = aggregate_hourly(records, HOUR, HOUR + timedelta(hours=3))
+    assert list(buckets) == [HOUR]
+
+    # A call stuck as ongoing does not hold the import back forever
+    buckets = aggregate_hourly(records, HOUR, HOUR + timedelta(hours=6))
+    assert len(buckets) == 6
+
+@pytest.mark.asyncio
+async def test_import_continues_from_last_hour(mock_hass):
+    """Test import resumes after the last imported hour and continues the sum."""
+    api = MagicMock()
+    api.async_get_history_since = AsyncMock(side_effect=lambda hass, resource, since: (
+        [{"id": "s1", "created": "2025-12-02T11:10:00", "cost": 3500}] if resource == "sms" else []
+    ))
+    importer = StatisticsImporter(mock_hass, api, "01ABC")
+
+    last = {"start": HOUR.timestamp(), "sum": 5.0}
+    recorder = MagicMock()
+    recorder.async_add_executor_job = AsyncMock(
+        side_effect=lambda func, hass, number, statistic_id, *args: {statistic_id: [last]}
+    )
+
+    with patch("custom_components.elks_46.statistics.get_instance", return_value=recorder), patch(
+        "custom_components.elks_46.statistics.async_add_external_statistics"
+    ) as add, patch(
+        "custom_components.elks_46.statistics.dt_util.utcnow", return_value=HOUR + timedelta(hours=2, minutes=5)
+    ):
+        await importer.async_import()
+
+    since = api.async_get_history_since.call_args[0][2]
+    assert since == HOUR + timedelta(hours=1)
+
+    imported = {call[0][1]["statistic_id"]: call[0][2] for call in add.call_args_list}
+    sms = imported["elks_46:01abc_sms_count"]
+    assert [row["start"] for row in sms] == [HOUR + timedelta(hours=1)]
+    assert sms[0]["state"] == 1
+    assert sms[0]["sum"] == 6.0
+    assert imported["elks_46:01abc_cost"][0]["state"] == 0.35
+
+
+@pytest.mark.asyncio
+async def test_import_skips_on_fetch_error(mock_hass):
+    """Test nothing is imported when history cannot be fetched."""
+    api = MagicMock()
+    api.async_get_history_since = AsyncMock(return_value=None)
+    importer = StatisticsImporter(mock_hass, api, "01ABC")
+
+    recorder = MagicMock()
+    recorder.async_add_executor_job = AsyncMock(return_value={})
+
+    with patch("custom_components.elks_46.statistics.get_instance", return_value=recorder), patch(
+        "custom_components.elks_46.statistics.async_add_external_statistics"
+    ) as add:
+        await importer.async_import()
+
+    add.assert_not_called()
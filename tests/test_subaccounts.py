@@ -0,0 +1,87 @@
+"""Test subaccount polling for 46elks integration."""
+import asyncio
+from datetime import timedelta
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.elks_46.subaccounts import SubaccountCoordinator
+
+
+def _api(listing):
+    """Return a main account client listing subaccounts."""
+    from custom_components.elks_46 import ElksApi
+
+    api = ElksApi("main", "secret")
+    api.async_get_subaccounts = AsyncMock(return_value=listing)
+    return api
+
+
+@pytest.mark.asyncio
+async def test_polls_subaccounts_with_shared_session(mock_hass):
+    """Test every subaccount is polled with its own credentials over one session."""
+    api = _api([
+        {"id": "a1", "name": "Site 1", "secret": "s1", "balanceused": 20000},
+        {"id": "a2", "name": "Site 2", "secret": "s2"},
+        {"id": "a3", "name": "No secret"},
+    ])
+    running = 0
+    peak = 0
+    polled = []
+
+    async def history(self, hass, limit=10):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        polled.append((self.auth, self.session))
+        return [{"id": f"{self.username}_1", "created": "2025-12-02T10:30:00", "cost": 3500}]
+
+    from custom_components.elks_46 import ElksApi
+
+    coordinator = SubaccountCoordinator(mock_hass, api, timedelta(minutes=30))
+    with patch.object(ElksApi, "async_get_sms_history", history), patch.object(
+        ElksApi, "async_get_call_history", history
+    ):
+        data = await coordinator._async_update_data()
+
+    assert list(data) == ["a1", "a2"]
+    assert data["a1"].name == "Site 1"
+    assert data["a1"].balance_used == 20000
+    assert len(data["a1"].sms_history) == 1
+    assert {auth for auth, _ in polled} == {("a1", "s1"), ("a2", "s2")}
+    assert all(session is api.session for _, session in polled)
+    assert peak <= 4
+
+
+@pytest.mark.asyncio
+async def test_removed_subaccounts_are_dropped(mock_hass):
+    """Test subaccounts missing from the listing disappear from the data."""
+    api = _api([{"id": "a1", "secret": "s1"}, {"id": "a2", "secret": "s2"}])
+    api.for_credentials = MagicMock(
+        side_effect=lambda username, password: MagicMock(
+            password=password,
+            async_get_sms_history=AsyncMock(return_value=[]),
+            async_get_call_history=AsyncMock(return_value=[]),
+        )
+    )
+
+    coordinator = SubaccountCoordinator(mock_hass, api, timedelta(minutes=30))
+    await coordinator._async_update_data()
+    api.async_get_subaccounts.return_value = [{"id": "a2", "secret": "s2"}]
+    data = await coordinator._async_update_data()
+
+    assert list(data) == ["a2"]
+    # Clients are reused between polls
+    assert api.for_credentials.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_listing_failure_raises(mock_hass):
+    """Test a failed subaccount listing fails the update."""
+    coordinator = SubaccountCoordinator(mock_hass, _api(None), timedelta(minutes=30))
+
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
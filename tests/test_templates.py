@@ -0,0 +1,94 @@
+"""Test message templates for 46elks integration."""
+import pytest
+import voluptuous as vol
+from unittest.mock import MagicMock, patch
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.elks_46.templates import compile_template, render_messages, valid_template
+
+
+class TestMessageTemplate:
+    """Test template compilation and rendering."""
+
+    def test_render(self):
+        """Test rendering named placeholders with format specs."""
+        template = compile_template("Hi {name}, your slot is {time} ({price:.2f} kr)")
+        assert template.fields == {"name", "time", "price"}
+        assert template.render({"name": "Anna", "time": "10:00", "price": 5}) == (
+            "Hi Anna, your slot is 10:00 (5.00 kr)"
+        )
+
+    def test_compiled_once_per_source(self):
+        """Test templates are cached by source."""
+        assert compile_template("Hi {name}") is compile_template("Hi {name}")
+
+    def test_positional_placeholders_rejected(self):
+        """Test placeholders must be named."""
+        with pytest.raises(vol.Invalid):
+            valid_template("Hi {}")
+
+    def test_attribute_and_item_access_rejected(self):
+        """Test placeholders cannot reach into the values they are given."""
+        for source in ("{recipient.__class__}", "{name[0]}", "{name!r}", "{name:>1000000}", "{name:{width}}"):
+            with pytest.raises(vol.Invalid):
+                valid_template(source)
+
+    def test_malformed_template_rejected(self):
+        """Test unbalanced braces are rejected."""
+        with pytest.raises(vol.Invalid):
+            valid_template("Hi {name")
+
+    def test_render_messages_per_recipient(self):
+        """Test shared and per-recipient variables."""
+        messages = render_messages(
+            "Hi {name}, see you at {time}",
+            ["+46701111111", "+46702222222"],
+            {"time": "10:00"},
+            {"+46701111111": {"name": "Anna"}, "+46702222222": {"name": "Bo", "time": "11:00"}},
+        )
+        assert messages == {
+            "+46701111111": "Hi Anna, see you at 10:00",
+            "+46702222222": "Hi Bo, see you at 11:00",
+        }
+
+    def test_missing_variable(self):
+        """Test a missing variable fails before anything is sent."""
+        with pytest.raises(HomeAssistantError, match="\\+46702222222"):
+            render_messages(
+                "Hi {name}",
+                ["+46701111111", "+46702222222"],
+                {},
+                {"+46701111111": {"name": "Anna"}},
+            )
+
+
+@pytest.mark.asyncio
+async def test_send_sms_with_template(mock_hass, mock_elks_api):
+    """Test each recipient gets a personalized message."""
+    from custom_components.elks_46 import async_setup_entry
+    from homeassistant.core import ServiceCall
+
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {
+        "api_username": "test_user",
+        "api_password": "test_pass",
+        "default_sender": "ELKS46",
+    }
+    entry.options = {}
+
+    with patch("custom_components.elks_46.ElksApi", return_value=mock_elks_api):
+        await async_setup_entry(mock_hass, entry)
+
+    call = MagicMock(spec=ServiceCall)
+    call.data = {
+        "to": ["+46701111111", "+46702222222"],
+        "template": "Hi {name}!",
+        "recipient_variables": {"+46701111111": {"name": "Anna"}, "+46702222222": {"name": "Bo"}},
+    }
+    service_handler = mock_hass.services.async_register.call_args_list[0][0][2]
+    await service_handler(call)
+
+    sent = {call[0][2]: call[0][3] for call in mock_elks_api.async_send_sms.call_args_list}
+    assert sent == {"+46701111111": "Hi Anna!", "+46702222222": "Hi Bo!"}